@@ -118,6 +118,51 @@ class MarkPDFDownConfig:
         """Image extraction quality (DPI)"""
         return int(os.getenv("DPI", "200"))
 
+    @property
+    def ADAPTIVE_DPI(self) -> bool:
+        """Choose the DPI per page from its smallest font and image density"""
+        return os.getenv("ADAPTIVE_DPI", "false").lower() == "true"
+
+    @property
+    def DPI_MIN(self) -> int:
+        """Lowest DPI used by adaptive resolution (sparse text pages)"""
+        return int(os.getenv("DPI_MIN", "100"))
+
+    @property
+    def DPI_MAX(self) -> int:
+        """Highest DPI used by adaptive resolution (dense tables, small print)"""
+        return int(os.getenv("DPI_MAX", "300"))
+
+    @property
+    def VISION_RESIZE(self) -> bool:
+        """Render pages at the size the vision model keeps, with fewest tiles"""
+        return os.getenv("VISION_RESIZE", "false").lower() == "true"
+
+    @property
+    def VISION_MIN_DPI(self) -> int:
+        """Legibility floor when trimming image tiles (VISION_RESIZE)"""
+        return int(os.getenv("VISION_MIN_DPI", "80"))
+
+    @property
+    def RENDER_WORKERS(self) -> int:
+        """Processes used to rasterize PDF pages (1 = serial, 0 = all cores)"""
+        return int(os.getenv("RENDER_WORKERS", "1"))
+
+    @property
+    def PIPELINE_QUEUE_DEPTH(self) -> int:
+        """Pages buffered between the render, encode and LLM stages"""
+        return int(os.getenv("PIPELINE_QUEUE_DEPTH", "2"))
+
+    @property
+    def PAGE_CONCURRENCY(self) -> int:
+        """Page conversion requests kept in flight at once (main_fast.py)"""
+        return int(os.getenv("PAGE_CONCURRENCY", "1"))
+
+    @property
+    def TEXT_FAST_PATH(self) -> bool:
+        """Convert text-only PDF pages from the text layer, skipping the LLM"""
+        return os.getenv("TEXT_FAST_PATH", "false").lower() == "true"
+
     @property
     def TOP_P(self) -> float:
         """Nucleus sampling parameter"""
@@ -128,20 +173,94 @@ class MarkPDFDownConfig:
         """API request timeout in seconds"""
         return int(os.getenv("OPENAI_REQUEST_TIMEOUT", "60"))
 
+    @property
+    def HTTP_MAX_CONNECTIONS(self) -> int:
+        """Maximum open connections in the shared API connection pool"""
+        return int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+
+    @property
+    def HTTP_MAX_KEEPALIVE_CONNECTIONS(self) -> int:
+        """Idle keep-alive connections kept open for reuse"""
+        return int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+
+    @property
+    def HTTP_KEEPALIVE_EXPIRY(self) -> float:
+        """Seconds an idle keep-alive connection stays open"""
+        return float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+    @property
+    def HTTP2(self) -> bool:
+        """Use HTTP/2 for API requests (requires the h2 package)"""
+        return os.getenv("HTTP2", "false").lower() == "true"
+
     @property
     def RETRY_DELAY(self) -> float:
         """Delay between retries in seconds"""
         return float(os.getenv("OPENAI_RETRY_DELAY", "0.3"))
 
+    # =================================================================================
+    # CACHE CONFIGURATION
+    # =================================================================================
+
+    @property
+    def LLM_CACHE(self) -> bool:
+        """Reuse cached responses for unchanged pages (false = bypass cache)"""
+        return os.getenv("LLM_CACHE", "true").lower() == "true"
+
+    @property
+    def LLM_CACHE_PATH(self) -> Path:
+        """SQLite database holding cached page responses"""
+        return self.DEFAULT_TEMP_FOLDER / "cache" / "llm_responses.sqlite3"
+
+    @property
+    def LLM_CACHE_MAX_MB(self) -> int:
+        """Evict least recently used responses above this size (0 = no limit)"""
+        return int(os.getenv("LLM_CACHE_MAX_MB", "512"))
+
+    @property
+    def LLM_CACHE_MAX_AGE_DAYS(self) -> float:
+        """Evict responses unused for this many days (0 = no limit)"""
+        return float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30"))
+
+    @property
+    def PAGE_CACHE(self) -> bool:
+        """Reuse rendered page images across runs (false = always rasterize)"""
+        return os.getenv("PAGE_CACHE", "true").lower() == "true"
+
+    @property
+    def PAGE_CACHE_PATH(self) -> Path:
+        """Directory holding cached page renders"""
+        return self.DEFAULT_TEMP_FOLDER / "cache" / "pages"
+
+    @property
+    def PAGE_CACHE_MAX_MB(self) -> int:
+        """Evict least recently used page renders above this size (0 = no limit)"""
+        return int(os.getenv("PAGE_CACHE_MAX_MB", "2048"))
+
     # =================================================================================
     # BATCH PROCESSING CONFIGURATION
     # =================================================================================
 
     @property
     def CHECK_INTERVAL(self) -> int:
-        """Seconds between batch status checks"""
+        """Seconds between batch status checks (first interval when adaptive)"""
         return int(os.getenv("CHECK_INTERVAL", "30"))
 
+    @property
+    def BATCH_STATUS_CONCURRENCY(self) -> int:
+        """Batch status requests in flight at once"""
+        return int(os.getenv("BATCH_STATUS_CONCURRENCY", "8"))
+
+    @property
+    def BATCH_POLL_MIN_INTERVAL(self) -> int:
+        """Shortest interval between status checks of one batch (seconds)"""
+        return int(os.getenv("BATCH_POLL_MIN_INTERVAL", "5"))
+
+    @property
+    def BATCH_POLL_MAX_INTERVAL(self) -> int:
+        """Longest interval between status checks of one batch (seconds)"""
+        return int(os.getenv("BATCH_POLL_MAX_INTERVAL", "600"))
+
     @property
     def MAX_WAIT_TIME(self) -> int:
         """Maximum wait time for batch completion (seconds)"""
@@ -152,6 +271,101 @@ class MarkPDFDownConfig:
         """Number of requests per batch"""
         return int(os.getenv("OPENAI_BATCH_SIZE", "1"))
 
+    @property
+    def BATCH_MAX_FILE_MB(self) -> float:
+        """Maximum size of one batch input file (MB); larger jobs are sharded"""
+        return float(os.getenv("BATCH_MAX_FILE_MB", "190"))
+
+    @property
+    def BATCH_MAX_REQUESTS(self) -> int:
+        """Maximum requests in one batch; larger jobs are sharded"""
+        return int(os.getenv("BATCH_MAX_REQUESTS", "50000"))
+
+    @property
+    def BATCH_UPLOAD_PART_MB(self) -> float:
+        """Upload batch files larger than this in parts (MB, 0 = single request)"""
+        return float(os.getenv("BATCH_UPLOAD_PART_MB", "16"))
+
+    @property
+    def BATCH_UPLOAD_PART_WORKERS(self) -> int:
+        """Parts of one batch file uploaded concurrently"""
+        return int(os.getenv("BATCH_UPLOAD_PART_WORKERS", "4"))
+
+    @property
+    def BATCH_ENQUEUED_TOKEN_LIMIT(self) -> int:
+        """Estimated input tokens a sharded job may have enqueued at once (0 = no limit)"""
+        return int(os.getenv("BATCH_ENQUEUED_TOKEN_LIMIT", "2000000"))
+
+    @property
+    def BATCH_FALLBACK_IMAGE_TOKENS(self) -> int:
+        """Tokens counted per page image when the model's image pricing is unknown"""
+        return int(os.getenv("BATCH_FALLBACK_IMAGE_TOKENS", "1500"))
+
+    @property
+    def BATCH_UPLOAD_WORKERS(self) -> int:
+        """Batch shards uploaded and submitted concurrently"""
+        return int(os.getenv("BATCH_UPLOAD_WORKERS", "4"))
+
+    @property
+    def BATCH_RENDER_WORKERS(self) -> int:
+        """Processes rendering PDF pages while preparing a batch (1 = serial, 0 = all cores)"""
+        return int(os.getenv("BATCH_RENDER_WORKERS", "0"))
+
+    @property
+    def BATCH_RENDER_MAX_PAGES(self) -> int:
+        """Rendered pages held at once while preparing a batch, across all PDFs"""
+        return int(os.getenv("BATCH_RENDER_MAX_PAGES", "32"))
+
+    @property
+    def BATCH_BACKEND(self) -> str:
+        """Batch API to use: "openai", or "local" for servers without /v1/batches"""
+        return os.getenv("BATCH_BACKEND", "openai").lower()
+
+    @property
+    def BATCH_LOCAL_CONCURRENCY(self) -> int:
+        """Requests of one locally run batch in flight at once"""
+        return int(os.getenv("BATCH_LOCAL_CONCURRENCY", "4"))
+
+    @property
+    def BATCH_RESUBMIT_ROUNDS(self) -> int:
+        """Rounds of resubmitting failed or missing pages in automated runs (0 = never)"""
+        return int(os.getenv("BATCH_RESUBMIT_ROUNDS", "1"))
+
+    @property
+    def BATCH_JOB_STORE_PATH(self) -> Path:
+        """SQLite database tracking batch jobs, their shards and pages"""
+        return self.DEFAULT_TEMP_FOLDER / "temp_batch" / "batch_jobs.sqlite3"
+
+    @property
+    def HYBRID_SYNC_RPM(self) -> int:
+        """Synchronous requests per minute assumed until the API reports its limits"""
+        return int(os.getenv("HYBRID_SYNC_RPM", "500"))
+
+    @property
+    def HYBRID_SYNC_TPM(self) -> int:
+        """Synchronous tokens per minute assumed until the API reports its limits"""
+        return int(os.getenv("HYBRID_SYNC_TPM", "200000"))
+
+    @property
+    def HYBRID_PAGE_SECONDS(self) -> float:
+        """Synchronous seconds per page assumed until conversions are measured"""
+        return float(os.getenv("HYBRID_PAGE_SECONDS", "10"))
+
+    @property
+    def HYBRID_BATCH_TURNAROUND(self) -> float:
+        """Batch turnaround assumed until completed batches are recorded (seconds)"""
+        return float(os.getenv("HYBRID_BATCH_TURNAROUND", "86400"))
+
+    @property
+    def HYBRID_TURNAROUND_PERCENTILE(self) -> float:
+        """Percentile of recent batch turnarounds used as the expected turnaround"""
+        return float(os.getenv("HYBRID_TURNAROUND_PERCENTILE", "90"))
+
+    @property
+    def HYBRID_PREVIEW_PAGES(self) -> int:
+        """First pages of a batched document converted synchronously as a preview"""
+        return int(os.getenv("HYBRID_PREVIEW_PAGES", "0"))
+
     # =================================================================================
     # COST MANAGEMENT
     # =================================================================================
@@ -229,6 +443,27 @@ class MarkPDFDownConfig:
             "base_url": self.OPENAI_API_BASE,
         }
 
+    def get_render_config(self) -> dict[str, Any]:
+        """Get page rendering configuration dict"""
+        return {
+            "dpi": self.DPI,
+            "adaptive_dpi": self.ADAPTIVE_DPI,
+            "min_dpi": self.DPI_MIN,
+            "max_dpi": self.DPI_MAX,
+            "vision_model": self.OPENAI_DEFAULT_MODEL if self.VISION_RESIZE else "",
+            "vision_min_dpi": self.VISION_MIN_DPI,
+        }
+
+    def get_http_client_config(self) -> dict[str, Any]:
+        """Get shared HTTP connection pool configuration dict"""
+        return {
+            "timeout": float(self.REQUEST_TIMEOUT),
+            "max_connections": self.HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": self.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry": self.HTTP_KEEPALIVE_EXPIRY,
+            "http2": self.HTTP2,
+        }
+
     def get_model_config(self) -> dict[str, Any]:
         """Get model configuration dict"""
         return {
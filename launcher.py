@@ -13,9 +13,11 @@ Available tools:
   convert-single - Single file conversion tool
   optimize-lm   - Optimize LM Studio settings
   test-llm      - Test LLM connection
+  mock-api      - Offline OpenAI-compatible mock server for load tests
 """
 
-import subprocess
+import os
+import runpy
 import sys
 from pathlib import Path
 
@@ -33,6 +35,7 @@ TOOLS = {
     "convert-single": "tools/conversion/convert_single_clean.py",
     "optimize-lm": "tools/optimization/optimize_lm_studio.py",
     "test-llm": "tools/testing/simple_llm_test.py",
+    "mock-api": "src/utils/mock_openai_server.py",
 }
 
 
@@ -68,16 +71,17 @@ def main():
         print(f"Error: Tool script not found: {tool_script}")
         sys.exit(1)
 
-    # Execute the tool with remaining arguments
-    cmd = [sys.executable, str(tool_script)] + sys.argv[2:]
+    # Execute the tool in this interpreter, as if it had been run directly
+    sys.argv = [str(tool_script)] + sys.argv[2:]
+    sys.path.insert(0, str(tool_script.parent))
+    os.chdir(ROOT_DIR)
 
     try:
-        result = subprocess.run(cmd, cwd=ROOT_DIR, check=False)
-        sys.exit(result.returncode)
+        runpy.run_path(str(tool_script), run_name="__main__")
     except KeyboardInterrupt:
         print("\nInterrupted by user")
         sys.exit(130)
-    except (OSError, subprocess.SubprocessError) as e:
+    except OSError as e:
         print(f"Error running tool: {e}")
         sys.exit(1)
 
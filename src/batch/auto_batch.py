@@ -153,8 +153,7 @@ class AutoBatchProcessor:
         pdf_dir = Path(str(config.DEFAULT_PDF_FOLDER))
         pdf_files = [f.name for f in pdf_dir.glob("*.pdf")]
 
-        requests, file_mapping = self.converter.create_batch_requests(pdf_files)
-        batch_id = self.converter.submit_batch(requests, file_mapping)
+        batch_id, request_count = self.converter.submit_pdf_files(pdf_files)
 
         if batch_id is None:
             print(f"\n❌ BATCH SUBMISSION FAILED")
@@ -163,7 +162,7 @@ class AutoBatchProcessor:
             return None
 
         print(f"✅ Batch submitted: {batch_id}")
-        print(f"📊 Requests queued: {len(requests)}")
+        print(f"📊 Requests queued: {request_count}")
 
         return batch_id
 
@@ -183,7 +182,9 @@ class AutoBatchProcessor:
             )
 
             # Use the batch_api to check status (handles chunked batches automatically)
-            status_result = self.converter.check_batch_status(batch_id)
+            status_result = self.converter.check_batch_status(
+                batch_id, due_only=True
+            )
 
             if not status_result:
                 print("❌ Batch not found!")
@@ -230,7 +231,7 @@ class AutoBatchProcessor:
                         return False
                 else:
                     # Still processing
-                    time.sleep(30)
+                    time.sleep(self.converter.next_poll_delay(batch_id))
                     continue
 
             else:
@@ -266,7 +267,7 @@ class AutoBatchProcessor:
                         return False
                     else:
                         # Still processing
-                        time.sleep(30)
+                        time.sleep(self.converter.next_poll_delay(batch_id))
                         continue
                 except AttributeError:
                     # Handle case where status_result doesn't have expected attributes
@@ -284,6 +285,19 @@ class AutoBatchProcessor:
             print("❌ Failed to retrieve results")
             return False
 
+        # Resubmit pages that failed or expired and merge their late results
+        for round_num in range(1, config.BATCH_RESUBMIT_ROUNDS + 1):
+            resubmitted = self.converter.resubmit_missing(batch_id)
+            if not resubmitted:
+                break
+            print(f"🔁 Resubmission round {round_num}: {resubmitted} pages")
+            if not self.monitor_batch(batch_id):
+                print("⚠️  Resubmitted pages did not complete")
+                break
+            if not self.converter.retrieve_results(batch_id):
+                print("⚠️  Could not retrieve resubmitted pages")
+                break
+
         print("✅ Results retrieved successfully")
         return True
 
@@ -385,9 +399,8 @@ class AutoBatchProcessor:
                 "session_id": self.session_id,
                 "batch_id": report.get("batch_id"),
                 "total_cost": report.get("actual_results", {}).get("total_cost", 0),
-                "total_files": report.get("actual_results", {}).get(
-                    "total_requests", 0
-                ),
+                "total_files": len(report.get("file_details", []))
+                or report.get("actual_results", {}).get("total_requests", 0),
                 "total_pages": report.get("actual_results", {}).get("total_pages", 0),
                 "session_start": datetime.now().strftime(
                     "%Y-%m-%d %H:%M:%S"
@@ -402,6 +415,7 @@ class AutoBatchProcessor:
                     batch_data["files"].append(
                         {
                             "name": file_detail.get("file", "unknown.pdf"),
+                            "source_pdf": file_detail.get("source_pdf", "Unknown"),
                             "pages": file_detail.get("pages", 0),
                             "cost": file_detail.get("cost", 0),
                             "cost_per_page": file_detail.get("cost_per_page", 0),
@@ -445,6 +459,8 @@ class AutoBatchProcessor:
             "timestamp": datetime.now().isoformat(),
             "estimates": estimates,
             "actual_results": usage_stats,
+            # Per-document usage aggregated at retrieval, for the metadata embedder
+            "file_details": usage_stats.get("file_details", []),
             "comparison": {
                 "cost_difference": cost_diff,
                 "cost_difference_pct": cost_diff_pct,
@@ -20,6 +20,7 @@ import base64
 import importlib.util
 import json
 import os
+import re
 import shutil
 import sys
 import time
@@ -28,6 +29,36 @@ from pathlib import Path
 import openai
 from openai import OpenAI
 
+# Make src/core importable for the shared rendering helpers
+src_dir = Path(__file__).parent.parent
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from batch.batch_scheduler import BatchScheduler, RetryLater, estimate_text_tokens
+from batch.job_store import (
+    FINAL_STATUSES,
+    PAGE_DONE,
+    PAGE_FAILED,
+    PAGE_QUEUED,
+    get_job_store,
+)
+from batch.jsonl_writer import (
+    RequestTemplate,
+    ShardedRequestWriter,
+    build_request,
+)
+from batch.local_batch import LocalBatchClient
+from batch.multipart_upload import (
+    RETRYABLE_ERRORS,
+    upload_batch_file,
+    upload_state_file,
+)
+from batch.page_renderer import RENDER_ERRORS, iter_rendered_pdfs
+from batch.result_spool import ResultSpool, parse_result_line
+from batch.status_monitor import StatusMonitor
+from batch.usage_stats import UsageAggregator, token_cost
+from core.VisionTiling import predict_image_tokens
+
 # Import config using relative path
 current_dir = Path(__file__).parent
 root_dir = current_dir.parent.parent
@@ -44,14 +75,60 @@ if config_path.exists():
 else:
     raise ImportError("Config file not found")
 
+# Page separator written by BatchPDFConverter._write_batch_markdown
+PAGE_HEADER = re.compile(r"^---\n# Page (\d+)\n---\n\n", re.MULTILINE)
+
+
+def mapping_file_for(batch_file):
+    """Path of the file mapping written alongside a batch JSONL file"""
+    batch_file = Path(batch_file)
+    return batch_file.with_name(batch_file.stem + ".mapping.jsonl")
+
+
+def split_batch_markdown(text):
+    """Split a *_batch.md file written by _write_batch_markdown into its pages
+
+    Returns:
+        dict: page_num -> page markdown
+    """
+    body = text.rsplit("---\n\n## Processing Metadata\n", 1)[0]
+    parts = PAGE_HEADER.split(body)
+    # parts = [preamble, page_num, content, page_num, content, ...]
+    return {
+        int(page_num): content.removesuffix("\n\n")
+        for page_num, content in zip(parts[1::2], parts[2::2])  # noqa: B905
+    }
+
+
+def load_file_mapping(mapping_file):
+    """Read a .mapping.jsonl file back into {custom_id: (pdf_name, page_num, temp_dir)}"""
+    file_mapping = {}
+    with open(mapping_file) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                file_mapping[entry["custom_id"]] = tuple(entry["page"])
+    return file_mapping
+
 
 class BatchPDFConverter:
-    def __init__(self, prompt_type="batch"):
-        self.client = OpenAI(
-            api_key=config.OPENAI_API_KEY, base_url=config.OPENAI_API_BASE
-        )
+    def __init__(self, prompt_type="batch", client=None):
+        # A client can be shared with other components (see BatchService)
+        if client is None:
+            client = OpenAI(
+                api_key=config.OPENAI_API_KEY, base_url=config.OPENAI_API_BASE
+            )
+            if config.BATCH_BACKEND == "local":
+                # Server without files and batches: run batches in-process
+                client = LocalBatchClient(
+                    client,
+                    config.DEFAULT_TEMP_FOLDER / "local_batch",
+                    concurrency=config.BATCH_LOCAL_CONCURRENCY,
+                )
+        self.client = client
         self.model = config.OPENAI_DEFAULT_MODEL
         self.prompt_type = prompt_type
+        self._status_monitor = None
         
         # Initialize attributes that will be set by _load_prompts
         self.system_prompt = ""
@@ -223,17 +300,32 @@ Focus on creating clean, professional documentation that preserves all informati
             print(f"   This is usually temporary - try again in a few minutes.")
             return "server_error"
 
+        elif isinstance(error, openai.APIConnectionError):
+            print("🌐 CONNECTION ERROR")
+            print(f"   The connection to the API failed or timed out: {error}")
+            return "connection_error"
+
         else:
             print(f"❌ UNEXPECTED ERROR during {operation}: {error}")
             print(f"   Error type: {type(error).__name__}")
             return "unknown_error"
 
-    def _retry_with_exponential_backoff(self, func, max_retries=3, base_delay=1):
-        """Retry function with exponential backoff for transient errors"""
+    def _retry_with_exponential_backoff(
+        self,
+        func,
+        max_retries=3,
+        base_delay=1,
+        retryable=(openai.RateLimitError, openai.InternalServerError),
+    ):
+        """Retry function with exponential backoff for transient errors
+
+        Connection errors are only worth retrying for idempotent calls (such
+        as uploads), so callers opt in through retryable.
+        """
         for attempt in range(max_retries):
             try:
                 return func()
-            except (openai.RateLimitError, openai.InternalServerError) as e:
+            except retryable as e:
                 self._handle_openai_error(e, f"attempt {attempt + 1}")
                 if attempt < max_retries - 1:
                     delay = base_delay * (2**attempt)
@@ -304,28 +396,60 @@ Focus on creating clean, professional documentation that preserves all informati
         except Exception as e:
             print(f"⚠️  Warning: Could not clean up some temp directories: {e}")
 
-    def extract_pdf_pages(self, pdf_path):
-        """Extract pages from PDF as images"""
-        # Import the core modules from src/core directory
-        import sys
-        from pathlib import Path
+    def _load_pdf_worker(self):
+        """Load the PDFWorker class from src/core (imported once per process)"""
+        from core.PDFWorker import PDFWorker
+
+        return PDFWorker
+
+    def _get_page_cache(self):
+        """Get the shared rendered-page cache, or None when PAGE_CACHE is disabled"""
+        if not config.PAGE_CACHE:
+            return None
 
-        # Add the src directory to path to access core modules
         src_dir = Path(__file__).parent.parent  # Go up to src/
         if str(src_dir) not in sys.path:
             sys.path.insert(0, str(src_dir))
+        from core.PageCache import get_shared_page_cache
 
-        # Use absolute import to avoid conflicts with system-wide packages
-        import sys
-        import importlib.util
-        
-        pdf_worker_path = src_dir / "core" / "PDFWorker.py"
-        spec = importlib.util.spec_from_file_location("PDFWorker", pdf_worker_path)
-        if spec is None or spec.loader is None:
-            raise ImportError(f"Could not load PDFWorker from {pdf_worker_path}")
-        pdf_worker_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(pdf_worker_module)
-        PDFWorker = pdf_worker_module.PDFWorker
+        return get_shared_page_cache(
+            str(config.PAGE_CACHE_PATH),
+            max_bytes=config.PAGE_CACHE_MAX_MB * 1024 * 1024,
+        )
+
+    def _get_job_store(self):
+        """Get the shared batch job store (imports legacy batch_info files once)"""
+        return get_job_store(
+            config.BATCH_JOB_STORE_PATH,
+            legacy_dir=config.DEFAULT_TEMP_FOLDER / "temp_batch",
+        )
+
+    def _get_status_monitor(self):
+        """Get the monitor that schedules and parallelizes this converter's status checks"""
+        if self._status_monitor is None:
+            self._status_monitor = StatusMonitor(
+                lambda batch_id: self._retry_with_exponential_backoff(
+                    lambda: self.client.batches.retrieve(batch_id)
+                ),
+                concurrency=config.BATCH_STATUS_CONCURRENCY,
+                base_interval=config.CHECK_INTERVAL,
+                min_interval=config.BATCH_POLL_MIN_INTERVAL,
+                max_interval=config.BATCH_POLL_MAX_INTERVAL,
+            )
+        return self._status_monitor
+
+    def next_poll_delay(self, batch_id):
+        """Seconds until the next status check of a job's batches is due"""
+        if self._is_sharded(batch_id):
+            batch_ids = self._get_job_store().batch_ids(batch_id)
+        else:
+            batch_ids = [batch_id]
+        delay = self._get_status_monitor().delay(batch_ids)
+        return max(delay, config.BATCH_POLL_MIN_INTERVAL)
+
+    def extract_pdf_pages(self, pdf_path):
+        """Extract pages from PDF as images"""
+        PDFWorker = self._load_pdf_worker()
 
         # Create temporary directory for this PDF
         pdf_name = Path(pdf_path).stem
@@ -337,8 +461,11 @@ Focus on creating clean, professional documentation that preserves all informati
 
         # Convert PDF to images in temp directory
         page_images = worker.convert_to_images(
-            output_dir=str(temp_dir), dpi=200, fmt="jpg"
-        )  # Lower DPI for faster processing
+            output_dir=str(temp_dir),
+            fmt="jpg",
+            cache=self._get_page_cache(),
+            **config.get_render_config(),
+        )
 
         # Create page mapping
         page_list = []
@@ -347,73 +474,496 @@ Focus on creating clean, professional documentation that preserves all informati
 
         return page_list, temp_dir
 
-    def create_batch_requests(self, pdf_files):
-        """Create batch requests for all PDF pages"""
-        batch_requests = []
-        file_mapping = {}  # Maps custom_id to (pdf_name, page_num)
+    def render_pdf_pages(self, pdf_path, pages=None):
+        """Render PDF pages in memory, yielding (page_num, jpeg_bytes)
+
+        Args:
+            pdf_path: PDF to render
+            pages: Page numbers to render, starting from 1 (default all)
+        """
+        PDFWorker = self._load_pdf_worker()
+
+        worker = PDFWorker(pdf_path, 1, 0)  # All pages
+
+        # Renders are reused from the page cache when the same PDF was
+        # rendered before (retries, prompt switches)
+        yield from worker.iter_page_images(
+            fmt="jpg",
+            cache=self._get_page_cache(),
+            pages=pages,
+            **config.get_render_config(),
+        )
+
+    def iter_batch_pages(self, pdf_files, file_mapping, pages=None):
+        """Yield (custom_id, jpeg_bytes) per PDF page as soon as it is rendered
+
+        file_mapping is filled in (custom_id -> (pdf_name, page_num, temp_dir))
+        as pages are yielded, so nothing but the current page is held.
+        pages optionally maps a PDF file name to the page numbers to render.
+        """
+        page_count = 0
+        predicted_image_tokens = 0
 
+        found = []
         for pdf_file in pdf_files:
             pdf_path = Path(str(config.DEFAULT_PDF_FOLDER)) / pdf_file
             if not pdf_path.exists():
                 print(f"❌ PDF not found: {pdf_file}")
                 continue
+            found.append((pdf_file, pdf_path))
+
+        current = None
+        for pdf_file, pdf_path, page_num, image in self._iter_rendered_pages(
+            found, pages
+        ):
+            if pdf_file != current:
+                current = pdf_file
+                print(f"📄 Extracting pages from {pdf_file}...")
+
+            # Pages are kept in memory, so this directory is only a
+            # cleanup target for any legacy on-disk renders
+            temp_dir = config.DEFAULT_TEMP_FOLDER / f"temp_batch/{pdf_path.stem}"
+            custom_id = f"{Path(pdf_file).stem}_page_{page_num:04d}"
+            file_mapping[custom_id] = (
+                Path(pdf_file).stem,
+                page_num,
+                str(temp_dir),
+            )  # Convert to string
+
+            page_count += 1
+            predicted_image_tokens += predict_image_tokens([image], self.model)
+            yield custom_id, image
+
+        if page_count and predicted_image_tokens:
+            print(
+                f"🔢 Predicted image tokens: {predicted_image_tokens:,} "
+                f"({predicted_image_tokens // page_count:,} per page)"
+            )
 
-            print(f"📄 Extracting pages from {pdf_file}...")
-            try:
-                page_images, temp_dir = self.extract_pdf_pages(str(pdf_path))
-
-                for page_num, image_path in page_images:
-                    custom_id = f"{Path(pdf_file).stem}_page_{page_num:04d}"
-                    file_mapping[custom_id] = (
-                        Path(pdf_file).stem,
-                        page_num,
-                        str(temp_dir),
-                    )  # Convert to string
-
-                    # Encode image
-                    base64_image = self.encode_image(image_path)
-
-                    # Create batch request using centralized prompts
-                    request = {
-                        "custom_id": custom_id,
-                        "method": "POST",
-                        "url": "/v1/chat/completions",
-                        "body": {
-                            "model": self.model,
-                            "messages": [
-                                {"role": "system", "content": self.system_prompt},
-                                {
-                                    "role": "user",
-                                    "content": [
-                                        {"type": "text", "text": self.user_prompt},
-                                        {
-                                            "type": "image_url",
-                                            "image_url": {
-                                                "url": f"data:image/jpeg;base64,{base64_image}"
-                                            },
-                                        },
-                                    ],
-                                },
-                            ],
-                            "temperature": self.temperature,
-                            "max_tokens": self.max_tokens,
-                        },
-                    }
-                    batch_requests.append(request)
+    def _iter_rendered_pages(self, pdfs, pages=None):
+        """Render PDFs, yielding (pdf_file, pdf_path, page_num, jpeg_bytes) in order
 
-            except (OSError, ValueError) as e:
-                print(f"❌ Error processing {pdf_file}: {e}")
-                continue
+        pdfs is a list of (pdf_file, pdf_path). With more than one BATCH_RENDER_WORKERS, pages of several PDFs render
+        at once in a process pool, with at most BATCH_RENDER_MAX_PAGES pages
+        rendered ahead of the writer.
+        """
+
+        def selected(pdf_file):
+            return pages.get(pdf_file) if pages else None
+
+        workers = config.BATCH_RENDER_WORKERS or os.cpu_count() or 1
+        if workers <= 1 or not pdfs:
+            for pdf_file, pdf_path in pdfs:
+                try:
+                    for page_num, image in self.render_pdf_pages(
+                        str(pdf_path), selected(pdf_file)
+                    ):
+                        yield pdf_file, pdf_path, page_num, image
+                except RENDER_ERRORS as e:
+                    print(f"❌ Error processing {pdf_file}: {e}")
+            return
+
+        def report(position, error):
+            print(f"❌ Error processing {pdfs[position][0]}: {error}")
+
+        for position, page_num, image in iter_rendered_pdfs(
+            [(str(pdf_path), selected(pdf_file)) for pdf_file, pdf_path in pdfs],
+            workers=workers,
+            max_pages=config.BATCH_RENDER_MAX_PAGES,
+            cache=self._get_page_cache(),
+            on_error=report,
+            **config.get_render_config(),
+        ):
+            pdf_file, pdf_path = pdfs[position]
+            yield pdf_file, pdf_path, page_num, image
+
+    def iter_batch_requests(self, pdf_files, file_mapping):
+        """Yield one batch request dict per PDF page as soon as it is rendered"""
+        for custom_id, image in self.iter_batch_pages(pdf_files, file_mapping):
+            # Create batch request using centralized prompts
+            yield build_request(
+                custom_id,
+                f"data:image/jpeg;base64,{base64.b64encode(image).decode('utf-8')}",
+                self.model,
+                self.system_prompt,
+                self.user_prompt,
+                self.temperature,
+                self.max_tokens,
+            )
+
+    def create_batch_requests(self, pdf_files):
+        """Create batch requests for all PDF pages (held in memory)
 
+        Prefer write_batch_requests for large batches: it streams each
+        request to disk instead of keeping every page image in a list.
+        """
+        file_mapping = {}  # Maps custom_id to (pdf_name, page_num)
+        batch_requests = list(self.iter_batch_requests(pdf_files, file_mapping))
         return batch_requests, file_mapping
 
+    def write_batch_requests(self, pdf_files, batch_file, on_shard=None, pages=None):
+        """Stream batch requests for all PDF pages into size-limited JSONL shards
+
+        Each request is written as soon as its page is rendered: the shared
+        request envelope is serialized once and the image is base64-encoded
+        in chunks straight into the file, so peak memory is one page and no
+        per-page base64 string is built. Requests are split over
+        <stem>_partNNN.jsonl files that stay within the Batch API's per-file
+        byte limit (BATCH_MAX_FILE_MB) and per-batch request limit
+        (BATCH_MAX_REQUESTS), and whose estimated input tokens stay under
+        BATCH_ENQUEUED_TOKEN_LIMIT so any shard can be enqueued on its own;
+        page images of a model with unknown image pricing count as
+        BATCH_FALLBACK_IMAGE_TOKENS. Each shard's file mapping is appended line by line to a
+        .mapping.jsonl file next to it.
+
+        Args:
+            pdf_files: PDF file names in DEFAULT_PDF_FOLDER
+            batch_file: Base path for the shard files
+            on_shard: Called with (shard_file, request_count, shard_mapping,
+                estimated_tokens) as soon as each shard is complete
+            pages: PDF file name -> page numbers to write (default all pages)
+
+        Returns:
+            tuple: (number of requests written, file_mapping, shard files)
+        """
+        file_mapping = {}
+        shard_mappings = {}
+        shard_tokens = {}
+        mapping_f = None
+        prompt_tokens = estimate_text_tokens(self.system_prompt) + (
+            estimate_text_tokens(self.user_prompt)
+        )
+        fallback_tokens = config.BATCH_FALLBACK_IMAGE_TOKENS
+
+        template = RequestTemplate(
+            self.model,
+            self.system_prompt,
+            self.user_prompt,
+            self.temperature,
+            self.max_tokens,
+        )
+
+        def shard_done(shard_file, index, request_count):
+            mapping_f.close()
+            if on_shard:
+                on_shard(
+                    shard_file,
+                    request_count,
+                    shard_mappings.pop(index),
+                    shard_tokens.pop(index),
+                )
+
+        writer = ShardedRequestWriter(
+            batch_file,
+            template,
+            max_bytes=int(config.BATCH_MAX_FILE_MB * 1024 * 1024),
+            max_requests=config.BATCH_MAX_REQUESTS,
+            on_shard=shard_done,
+            max_tokens=config.BATCH_ENQUEUED_TOKEN_LIMIT,
+        )
+
+        try:
+            with writer:
+                for custom_id, image in self.iter_batch_pages(
+                    pdf_files, file_mapping, pages
+                ):
+                    tokens = prompt_tokens + (
+                        predict_image_tokens([image], self.model) or fallback_tokens
+                    )
+                    index = writer.write(custom_id, image, tokens)
+                    if index not in shard_mappings:
+                        mapping_f = open(mapping_file_for(writer.path), "w")
+                        shard_mappings[index] = {}
+                        shard_tokens[index] = 0
+                    shard_mappings[index][custom_id] = file_mapping[custom_id]
+                    shard_tokens[index] += tokens
+                    mapping_f.write(
+                        json.dumps(
+                            {"custom_id": custom_id, "page": file_mapping[custom_id]}
+                        )
+                        + "\n"
+                    )
+        finally:
+            if mapping_f is not None and not mapping_f.closed:
+                mapping_f.close()
+
+        shard_files = [path for path, _, _ in writer.shards]
+        return writer.requests_written, file_mapping, shard_files
+
+    def submit_pdf_files(self, pdf_files, pages=None):
+        """Render, write and submit all PDF pages, streaming to disk
+
+        Pages are sharded into Batch API input files that respect the per-file
+        byte limit and per-batch request limit. Shards are handed to a
+        BatchScheduler as soon as they are written, which uploads them on a
+        thread pool (BATCH_UPLOAD_WORKERS) while later pages are still being
+        rendered, as long as the job's estimated enqueued tokens stay under
+        BATCH_ENQUEUED_TOKEN_LIMIT. Shards over the limit wait in the job
+        store and are submitted by later status checks (or the "schedule"
+        command) as earlier shards finish.
+
+        A single shard is tracked like any other batch; several shards are
+        recorded under one chunked_<timestamp> master batch ID.
+
+        pages optionally maps a PDF file name to the page numbers to submit;
+        other PDFs are submitted whole.
+
+        Returns:
+            tuple: (batch_id or None, number of requests)
+        """
+        temp_batch_dir = config.DEFAULT_TEMP_FOLDER / "temp_batch"
+        temp_batch_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = int(time.time())
+        batch_file = temp_batch_dir / f"batch_requests_{timestamp}.jsonl"
+        master_batch_id = f"chunked_{timestamp}"
+
+        store = self._get_job_store()
+        scheduler = self._open_scheduler(master_batch_id)
+        request_count = self._write_and_schedule(
+            pdf_files, batch_file, scheduler, pages=pages
+        )
+
+        chunks = scheduler.chunks
+        if not request_count:
+            if not chunks:
+                print("❌ No valid requests created!")
+            # Drop every shard of an aborted job, submitted or not
+            for shard_file in temp_batch_dir.glob(f"{batch_file.stem}_part*"):
+                shard_file.unlink()
+            self._cancel_batches(scheduler.batch_ids)
+            store.delete_job(master_batch_id)
+            return None, 0
+
+        if not any(c["batch_id"] or c["status"] == "pending" for c in chunks):
+            print("❌ No batch shards could be submitted")
+            store.delete_job(master_batch_id)
+            return None, request_count
+
+        if len(chunks) == 1 and chunks[0]["batch_id"]:
+            # A lone batch is tracked under its own ID and has nothing to be
+            # requeued behind; one whose upload is to be retried stays a
+            # master batch, so status checks and "schedule" resume it
+            chunk = chunks[0]
+            store.rename_job(master_batch_id, chunk["batch_id"], "single")
+            store.update_job(chunk["batch_id"], status="submitted")
+            self._remove_batch_file(chunk["batch_file"])
+            store.update_shard(chunk["batch_id"], chunk["seq"], batch_file=None)
+            return chunk["batch_id"], request_count
+
+        store.update_job(master_batch_id, status="submitted")
+
+        submitted = [c for c in chunks if c["batch_id"]]
+        failed = [c for c in chunks if c["status"] == "failed"]
+        pending = scheduler.pending_count()
+
+        print(f"✅ {len(submitted)} of {len(chunks)} batch shards submitted")
+        print(f"📋 Master Batch ID: {master_batch_id}")
+        print(f"📊 Individual Batch IDs: {scheduler.batch_ids}")
+        if pending:
+            print(
+                f"⏳ {pending} shards are waiting for token budget or an upload "
+                f"retry (~{scheduler.in_flight_tokens():,}/"
+                f"{scheduler.token_limit:,} tokens in flight); checking status "
+                f"submits them"
+            )
+        if failed:
+            print(
+                f"⚠️  {sum(c['request_count'] for c in failed)} requests in "
+                f"{len(failed)} failed shards were not submitted"
+            )
+
+        return master_batch_id, request_count
+
+    def _write_and_schedule(self, pdf_files, batch_file, scheduler, pages=None):
+        """Write request shards and hand each one to the scheduler once complete
+
+        Returns:
+            int: Number of requests written (0 if writing failed)
+        """
+
+        def queue_shard(shard_file, request_count, shard_mapping, estimated_tokens):
+            print(
+                f"📦 Shard {len(scheduler.chunks) + 1} ready: {Path(shard_file).name} "
+                f"({request_count} requests, ~{estimated_tokens:,} tokens)"
+            )
+            scheduler.add_chunk(
+                shard_file, request_count, shard_mapping, estimated_tokens
+            )
+            scheduler.pump(refresh=False)
+
+        try:
+            request_count, _, _ = self.write_batch_requests(
+                pdf_files, batch_file, on_shard=queue_shard, pages=pages
+            )
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not write batch file: {e}")
+            request_count = 0
+        finally:
+            # Wait for every upload, including ones started before an error
+            scheduler.close()
+        return request_count
+
+    def _open_scheduler(self, master_batch_id, retrieve_batch=None):
+        """Create or resume the BatchScheduler of a chunked master batch
+
+        Args:
+            master_batch_id: Master batch ID
+            retrieve_batch: Status lookup for running shards (default: API)
+        """
+
+        def submit_chunk(batch_file, request_count):
+            # Keep the input file until the batch validates, so a batch
+            # rejected for the token limit can be submitted again
+            return self._submit_batch_file(
+                batch_file,
+                request_count,
+                load_file_mapping(mapping_file_for(batch_file)),
+                save_info=False,
+                keep_file=True,
+            )
+
+        return BatchScheduler(
+            self._get_job_store(),
+            master_batch_id,
+            submit_chunk,
+            retrieve_batch or self.client.batches.retrieve,
+            self._remove_batch_file,
+            token_limit=config.BATCH_ENQUEUED_TOKEN_LIMIT,
+            upload_workers=config.BATCH_UPLOAD_WORKERS,
+        )
+
+    def run_schedule(self, master_batch_id):
+        """Submit a chunked batch's waiting shards, blocking until all are accepted"""
+        if self._get_job_store().get_job(master_batch_id) is None:
+            print(f"❌ Master batch info not found: {master_batch_id}")
+            return False
+
+        scheduler = self._open_scheduler(master_batch_id)
+        try:
+            scheduler.run(config.CHECK_INTERVAL)
+        finally:
+            scheduler.close()
+        print(f"✅ All shards of {master_batch_id} submitted")
+        return True
+
+    def harvest_failed_requests(self, job_id):
+        """List the pages of a finished job that have no successful result
+
+        The error file (error_file_id) of every batch that still owes results
+        is read and its requests are marked failed; pages of finished batches
+        with neither a result nor an error (expired, cancelled) stay missing
+        as well.
+
+        Returns:
+            list: (custom_id, document, page_num, status) of the missing
+            pages, or None while some of the job's batches are still running
+        """
+        store = self._get_job_store()
+        outstanding = store.unresolved_shards(job_id)
+        for shard in store.shards(job_id):
+            if shard["seq"] not in outstanding:
+                continue
+            if not shard["batch_id"]:
+                if shard["status"] != "failed":
+                    print(f"⏳ Shard {shard['seq']} of {job_id} is not submitted yet")
+                    return None
+                continue  # never submitted: all of its pages are missing
+
+            try:
+                batch = self.client.batches.retrieve(shard["batch_id"])
+            except Exception as e:  # pylint: disable=broad-except
+                self._handle_openai_error(e, "batch status check")
+                return None
+            store.record_batch(batch)
+            if batch.status not in FINAL_STATUSES:
+                print(f"⏳ Batch {batch.id} is still {batch.status}")
+                return None
+
+            if batch.error_file_id:
+                failed = []
+                for line in self._iter_output_lines(batch.error_file_id):
+                    if line.strip():
+                        custom_id, content, _ = parse_result_line(line)
+                        if custom_id and content is None:
+                            failed.append(custom_id)
+                store.mark_pages(job_id, failed, PAGE_FAILED)
+
+        return store.missing_pages(job_id)
+
+    def resubmit_missing(self, job_id):
+        """Submit the pages of a job that have no successful result as new shards
+
+        Only the missing pages are rendered (from the page cache when it
+        holds them) and written; the shards join the same job, so status
+        checks follow them and retrieving the job again merges their results
+        into the existing markdown files.
+
+        Returns:
+            int: Number of pages resubmitted (0 if nothing is missing), or
+            None if the job is unknown, still running or the submission failed
+        """
+        store = self._get_job_store()
+        if store.get_job(job_id) is None:
+            print(f"❌ Batch info not found: {job_id}")
+            return None
+
+        missing = self.harvest_failed_requests(job_id)
+        if missing is None:
+            return None
+        if not missing:
+            print(f"✅ Every page of {job_id} has a result")
+            return 0
+
+        pages = {}
+        for _, document, page_num, _ in missing:
+            pages.setdefault(f"{document}.pdf", []).append(page_num)
+        print(
+            f"🔁 Resubmitting {len(missing)} missing pages from "
+            f"{len(pages)} documents..."
+        )
+
+        temp_batch_dir = config.DEFAULT_TEMP_FOLDER / "temp_batch"
+        temp_batch_dir.mkdir(parents=True, exist_ok=True)
+        batch_file = temp_batch_dir / f"batch_requests_{int(time.time())}_retry.jsonl"
+        scheduler = self._open_scheduler(job_id)
+        request_count = self._write_and_schedule(
+            list(pages), batch_file, scheduler, pages=pages
+        )
+        if not request_count:
+            print("❌ Missing pages could not be resubmitted")
+            return None
+
+        # The job is active again until the late results are retrieved
+        store.update_job(job_id, status="submitted", retrieved_at=None)
+        print(f"✅ {request_count} pages resubmitted under {job_id}")
+        return request_count
+
+    def _cancel_batches(self, batch_ids):
+        """Best-effort cancel of batches submitted for an aborted job"""
+        for batch_id in batch_ids:
+            try:
+                self.client.batches.cancel(batch_id)
+                print(f"🛑 Cancelled batch {batch_id}")
+            except Exception as e:  # pylint: disable=broad-except
+                print(f"⚠️  Could not cancel batch {batch_id}: {e}")
+
     def submit_batch(self, requests, file_mapping):
         """Submit single batch to OpenAI Batch API for 50% cost savings"""
         # Always submit as single batch to get OpenAI Batch API 50% discount
         return self._submit_single_batch(requests, file_mapping)
 
+    def _remove_batch_file(self, batch_file):
+        """Delete a local batch JSONL file, its mapping file and upload state"""
+        for path in (
+            Path(batch_file),
+            mapping_file_for(batch_file),
+            upload_state_file(batch_file),
+        ):
+            if path.exists():
+                path.unlink()
+
     def _submit_single_batch(self, requests, file_mapping):
-        """Submit a single batch with comprehensive error handling"""
+        """Write in-memory requests to a JSONL file and submit them as one batch"""
         # Create temp directory for batch files
         temp_batch_dir = config.DEFAULT_TEMP_FOLDER / "temp_batch"
         temp_batch_dir.mkdir(parents=True, exist_ok=True)
@@ -425,38 +975,93 @@ Focus on creating clean, professional documentation that preserves all informati
             with open(batch_file, "w") as f:
                 for request in requests:
                     f.write(json.dumps(request) + "\n")
+        except OSError as e:
+            print(f"❌ Could not write batch file: {e}")
+            self._remove_batch_file(batch_file)
+            self.cleanup_temp_directories(file_mapping)
+            return None
+
+        return self._submit_batch_file(batch_file, len(requests), file_mapping)
+
+    def _save_batch_info(self, batch_id, file_mapping, batch_file):
+        """Record a submitted single batch in the job store for status checks and retrieval"""
+        store = self._get_job_store()
+        store.create_job(batch_id, "single", status="submitted")
+        store.add_shard(
+            batch_id,
+            len(file_mapping),
+            file_mapping,
+            batch_file=batch_file,
+            status="submitted",
+            batch_id=batch_id,
+        )
 
-            print(f"📤 Uploading batch file with {len(requests)} requests...")
+    def _submit_batch_file(
+        self, batch_file, request_count, file_mapping, save_info=True, keep_file=False
+    ):
+        """Upload a written JSONL batch file and submit it with comprehensive error handling
+
+        Args:
+            batch_file: JSONL file to upload
+            request_count: Number of requests in the file
+            file_mapping: custom_id -> (pdf_name, page_num, temp_dir) for the file
+            save_info: Record the batch as a job in the job store (False for
+                shards of a master batch, which records them itself)
+            keep_file: Keep the input file after a successful submission, and
+                after an upload that failed on connection, rate limit or
+                server errors
+
+        Returns:
+            str: Batch ID, or None if the batch could not be submitted
+
+        Raises:
+            RetryLater: The upload of a kept file failed on a transient error
+                and can be resumed
+        """
+        batch_file = Path(batch_file)
 
-            # Upload file with error handling
+        try:
+            print(f"📤 Uploading batch file with {request_count} requests...")
+
+            # Upload file with error handling; large files go up in
+            # concurrent, individually retried parts and resume on retry,
+            # including on a later attempt when the file is kept
             def upload_file():
-                with open(batch_file, "rb") as f:
-                    return self.client.files.create(file=f, purpose="batch")
+                return upload_batch_file(
+                    self.client,
+                    batch_file,
+                    part_bytes=int(config.BATCH_UPLOAD_PART_MB * 1024 * 1024),
+                    workers=config.BATCH_UPLOAD_PART_WORKERS,
+                )
 
             try:
-                batch_input_file = self._retry_with_exponential_backoff(upload_file)
+                batch_input_file = self._retry_with_exponential_backoff(
+                    upload_file, retryable=RETRYABLE_ERRORS
+                )
                 if batch_input_file is None:
                     print("❌ Failed to upload batch file - received None from API")
-                    if batch_file.exists():
-                        batch_file.unlink()
+                    self._remove_batch_file(batch_file)
                     self.cleanup_temp_directories(file_mapping)
                     return None
             except Exception as e:
                 error_type = self._handle_openai_error(e, "file upload")
+                if keep_file and isinstance(e, RETRYABLE_ERRORS):
+                    # Keep the file and its upload state so the next attempt
+                    # sends only the parts that are missing
+                    print(f"⏸️  Upload interrupted; kept {batch_file.name} to resume")
+                    raise RetryLater(str(e)) from e
                 if error_type in ["billing_limit", "insufficient_quota", "auth_error"]:
                     print(
                         f"\n🛑 CANNOT CONTINUE: Please resolve the above issue before retrying."
                     )
                     # Clean up batch file on critical error
-                    if batch_file.exists():
-                        batch_file.unlink()
+                    self._remove_batch_file(batch_file)
                     # Clean up temp directories from PDF extraction
                     print(f"🧹 Cleaning up temporary files...")
                     self.cleanup_temp_directories(file_mapping)
                     return None
                 # Clean up batch file on any upload error
-                if batch_file.exists():
-                    batch_file.unlink()
+                self._remove_batch_file(batch_file)
                 # Clean up temp directories on any upload error
                 self.cleanup_temp_directories(file_mapping)
                 raise
@@ -468,7 +1073,7 @@ Focus on creating clean, professional documentation that preserves all informati
                     endpoint="/v1/chat/completions",
                     completion_window="24h",
                     metadata={
-                        "description": f"PDF conversion batch - {len(requests)} pages"
+                        "description": f"PDF conversion batch - {request_count} pages"
                     },
                 )
 
@@ -485,15 +1090,13 @@ Focus on creating clean, professional documentation that preserves all informati
                         f"\n🛑 CANNOT CONTINUE: Please resolve the above issue before retrying."
                     )
                     # Clean up batch file on critical error
-                    if batch_file.exists():
-                        batch_file.unlink()
+                    self._remove_batch_file(batch_file)
                     # Clean up temp directories from PDF extraction
                     print(f"🧹 Cleaning up temporary files...")
                     self.cleanup_temp_directories(file_mapping)
                     return None
                 # Clean up batch file on any submission error
-                if batch_file.exists():
-                    batch_file.unlink()
+                self._remove_batch_file(batch_file)
                 raise
 
             print("✅ Batch submitted successfully!")
@@ -501,31 +1104,22 @@ Focus on creating clean, professional documentation that preserves all informati
             print(f"📊 Status: {batch.status}")
             print(f"🔢 Requests: {batch.request_counts}")
 
-            # Save batch info for later retrieval
-            batch_info = {
-                "batch_id": batch.id,
-                "file_mapping": file_mapping,
-                "batch_file": str(batch_file),  # Store full path for potential cleanup
-                "submitted_at": time.time(),
-                "is_chunked": False,
-            }
-
-            batch_info_file = temp_batch_dir / f"batch_info_{batch.id}.json"
-
-            with open(batch_info_file, "w") as f:
-                json.dump(batch_info, f, indent=2)
+            if save_info:
+                self._save_batch_info(batch.id, file_mapping, batch_file)
 
             # Clean up local batch file after successful submission
-            if batch_file.exists():
-                batch_file.unlink()
+            if not keep_file:
+                self._remove_batch_file(batch_file)
 
             return batch.id
 
+        except RetryLater:
+            raise
         except Exception as e:
             # Force cleanup batch file on any error
             if batch_file.exists():
                 try:
-                    batch_file.unlink()
+                    self._remove_batch_file(batch_file)
                     print(f"🧹 Cleaned up batch file: {batch_file.name}")
                 except OSError:
                     print(f"⚠️  Could not remove batch file: {batch_file}")
@@ -538,144 +1132,42 @@ Focus on creating clean, professional documentation that preserves all informati
             print(f"   Error: {e}")
             print(f"   Please check your OpenAI account status and try again.")
             return None
-        temp_batch_dir.mkdir(parents=True, exist_ok=True)
-        batch_info_file = temp_batch_dir / f"batch_info_{batch.id}.json"
-
-        with open(batch_info_file, "w") as f:
-            json.dump(batch_info, f, indent=2)
-
-        # Clean up local batch file
-        os.remove(batch_file)
 
-        return batch.id
-
-    def _submit_chunked_batches(self, requests, file_mapping, chunk_size):
-        """Submit multiple smaller batches sequentially to avoid token queue limits"""
-        total_requests = len(requests)
-        num_chunks = (total_requests + chunk_size - 1) // chunk_size  # Ceiling division
-
-        print(
-            f"🔄 Large batch detected! Splitting {total_requests} requests into {num_chunks} chunks of ~{chunk_size} each..."
+    def _is_sharded(self, batch_id):
+        """Whether a job spans several batches (chunked, or with resubmissions)"""
+        return (
+            batch_id.startswith("chunked_")
+            or len(self._get_job_store().batch_ids(batch_id)) > 1
         )
-        print(f"⚠️  Sequential submission mode enabled to avoid token queue limits")
-
-        batch_ids = []
-        chunk_mappings = []
-
-        # Submit chunks one at a time with monitoring
-        for chunk_idx in range(num_chunks):
-            start_idx = chunk_idx * chunk_size
-            end_idx = min(start_idx + chunk_size, total_requests)
-            chunk_requests = requests[start_idx:end_idx]
-
-            # Create file mapping for this chunk
-            chunk_file_mapping = {}
-            for request in chunk_requests:
-                custom_id = request["custom_id"]
-                if custom_id in file_mapping:
-                    chunk_file_mapping[custom_id] = file_mapping[custom_id]
-
-            print(
-                f"📤 Submitting chunk {chunk_idx + 1}/{num_chunks} ({len(chunk_requests)} requests)..."
-            )
-
-            # Submit this chunk
-            try:
-                chunk_batch_id = self._submit_single_batch(
-                    chunk_requests, chunk_file_mapping
-                )
-                batch_ids.append(chunk_batch_id)
-                chunk_mappings.append(chunk_file_mapping)
-
-                # If not the last chunk, wait for this chunk to start processing
-                # to avoid overwhelming the token queue
-                if chunk_idx < num_chunks - 1:
-                    print(
-                        f"⏳ Waiting for chunk {chunk_idx + 1} to start processing..."
-                    )
-                    self._wait_for_chunk_start(chunk_batch_id)
-
-            except Exception as e:
-                print(f"❌ Failed to submit chunk {chunk_idx + 1}: {e}")
-                # Continue with remaining chunks
-                continue
-
-        if not batch_ids:
-            raise RuntimeError("Failed to submit any batch chunks!")
-
-        # Create master batch info for tracking all chunks
-        master_batch_id = f"chunked_{int(time.time())}"
-        master_batch_info = {
-            "master_batch_id": master_batch_id,
-            "chunk_batch_ids": batch_ids,
-            "total_requests": total_requests,
-            "num_chunks": len(batch_ids),
-            "submitted_at": time.time(),
-            "is_chunked": True,
-            "file_mapping": file_mapping,  # Keep full mapping for result reconstruction
-        }
-
-        # Save master batch info
-        temp_batch_dir = config.DEFAULT_TEMP_FOLDER / "temp_batch"
-        temp_batch_dir.mkdir(parents=True, exist_ok=True)
-        master_batch_file = temp_batch_dir / f"batch_info_{master_batch_id}.json"
-
-        with open(master_batch_file, "w") as f:
-            json.dump(master_batch_info, f, indent=2)
-
-        print(f"✅ All chunks submitted successfully!")
-        print(f"📋 Master Batch ID: {master_batch_id}")
-        print(f"🔢 Total Chunks: {len(batch_ids)}")
-        print(f"📊 Individual Batch IDs: {batch_ids}")
-
-        return master_batch_id
-
-    def _wait_for_chunk_start(self, batch_id, max_wait_time=120):
-        """Wait for a batch to start processing (move from 'validating' to 'in_progress')"""
-        start_time = time.time()
-
-        while time.time() - start_time < max_wait_time:
-            try:
-                batch = self.client.batches.retrieve(batch_id)
-                status = batch.status
-
-                if status in ["in_progress", "completed", "failed"]:
-                    print(f"   ✅ Chunk {batch_id[-8:]} is now {status}")
-                    return True
-                elif status == "validating":
-                    print(f"   ⏳ Chunk {batch_id[-8:]} still validating...")
-                    time.sleep(10)
-                else:
-                    print(f"   ⚠️  Unexpected status: {status}")
-                    time.sleep(5)
-
-            except Exception as e:
-                print(f"   ❌ Error checking chunk status: {e}")
-                time.sleep(10)
 
-        print(f"   ⚠️  Timeout waiting for chunk to start, continuing anyway...")
-        return False
+    def check_batch_status(self, batch_id, due_only=False):
+        """Check batch processing status (handles both single and chunked batches)
 
-    def check_batch_status(self, batch_id):
-        """Check batch processing status (handles both single and chunked batches)"""
+        Args:
+            batch_id: Batch or master batch ID
+            due_only: Only ask the API about batches whose adaptive polling
+                interval has elapsed; the rest report their last known state
+        """
         # Check if this is a chunked batch
-        if batch_id.startswith("chunked_"):
-            return self._check_chunked_batch_status(batch_id)
+        if self._is_sharded(batch_id):
+            return self._check_chunked_batch_status(batch_id, due_only)
         else:
-            return self._check_single_batch_status(batch_id)
+            return self._check_single_batch_status(batch_id, due_only)
 
-    def _check_single_batch_status(self, batch_id):
+    def _check_single_batch_status(self, batch_id, due_only=False):
         """Check status of a single batch with error handling"""
-
-        def get_batch_status():
-            return self.client.batches.retrieve(batch_id)
-
         try:
-            batch = self._retry_with_exponential_backoff(get_batch_status)
+            batch = self._get_status_monitor().sweep([batch_id], due_only)[batch_id]
+            if isinstance(batch, Exception):
+                raise batch
             if batch is None:
                 print(f"❌ Failed to retrieve batch status for {batch_id}")
                 return None
-                
+
+            store = self._get_job_store()
+            if store.record_batch(batch) == batch_id:
+                store.update_job(batch_id, status=batch.status)
+
             print(f"📋 Batch ID: {batch_id}")
             print(f"📊 Status: {batch.status}")
             print(f"🔢 Request counts: {batch.request_counts}")
@@ -696,34 +1188,69 @@ Focus on creating clean, professional documentation that preserves all informati
                 print(f"   Cannot check batch status due to account issues.")
             return None
 
-    def _check_chunked_batch_status(self, master_batch_id):
-        """Check status of all chunks in a chunked batch"""
-        # Load master batch info
-        temp_batch_dir = config.DEFAULT_TEMP_FOLDER / "temp_batch"
-        master_batch_file = temp_batch_dir / f"batch_info_{master_batch_id}.json"
+    def _check_chunked_batch_status(self, master_batch_id, due_only=False):
+        """Check status of all chunks in a chunked batch
 
-        if not master_batch_file.exists():
+        Running chunks are checked concurrently, once per call.
+        """
+        store = self._get_job_store()
+        master_info = store.get_job(master_batch_id)
+        if master_info is None:
             print(f"❌ Master batch info not found: {master_batch_id}")
             return None
 
-        try:
-            with open(master_batch_file) as f:
-                master_info = json.load(f)
-        except (json.JSONDecodeError, OSError) as e:
-            print(f"❌ Error loading master batch info: {e}")
-            return None
+        monitor = self._get_status_monitor()
+        shards = store.shards(master_batch_id)
+        polled = monitor.sweep(
+            [
+                shard["batch_id"]
+                for shard in shards
+                if shard["status"] == "submitted" and shard["batch_id"]
+            ],
+            due_only,
+        )
 
-        chunk_batch_ids = master_info.get("chunk_batch_ids", [])
-        master_total_requests = master_info.get(
-            "total_requests", 0
-        )  # Get total from master info
+        def polled_batch(chunk_id):
+            batch = polled.get(chunk_id)
+            if isinstance(batch, Exception):
+                raise batch
+            return batch or self.client.batches.retrieve(chunk_id)
 
-        if not chunk_batch_ids:
+        # Submit shards waiting for token budget as earlier ones finish
+        pending_chunks = 0
+        if any(shard["status"] in ("pending", "submitted") for shard in shards):
+            scheduler = self._open_scheduler(master_batch_id, polled_batch)
+            try:
+                scheduler.pump()
+            finally:
+                scheduler.close()
+            pending_chunks = scheduler.pending_count()
+
+        chunk_batch_ids = store.batch_ids(master_batch_id)
+        master_total_requests = master_info["total_requests"]
+        if store.page_counts(master_batch_id).get(PAGE_DONE):
+            # Results were retrieved before: follow the shards of the pages
+            # that were resubmitted
+            outstanding = store.unresolved_shards(master_batch_id)
+            retries = [
+                shard
+                for shard in store.shards(master_batch_id)
+                if shard["seq"] in outstanding and shard["batch_id"]
+            ]
+            if retries or pending_chunks:
+                chunk_batch_ids = [shard["batch_id"] for shard in retries]
+                master_total_requests = len(
+                    store.file_mapping(master_batch_id, status=PAGE_QUEUED)
+                )
+
+        if not chunk_batch_ids and not pending_chunks:
             print(f"❌ No chunk batch IDs found in master batch")
             return None
 
         print(f"📋 Master Batch ID: {master_batch_id}")
-        print(f"🔢 Total Chunks: {len(chunk_batch_ids)}")
+        print(f"🔢 Total Chunks: {len(chunk_batch_ids) + pending_chunks}")
+        if pending_chunks:
+            print(f"⏳ Waiting for token budget: {pending_chunks} chunks")
         print(f"📊 Total Requests: {master_total_requests}")
         print(f"📊 Checking status of all chunks...")
 
@@ -733,10 +1260,14 @@ Focus on creating clean, professional documentation that preserves all informati
         total_completed_requests = 0
 
         chunk_statuses = []
+        polled.update(
+            monitor.sweep([b for b in chunk_batch_ids if b not in polled], due_only)
+        )
 
         for i, chunk_id in enumerate(chunk_batch_ids, 1):
             try:
-                batch = self.client.batches.retrieve(chunk_id)
+                batch = polled_batch(chunk_id)
+                store.record_batch(batch)
                 status = batch.status
                 request_counts = batch.request_counts
 
@@ -797,49 +1328,56 @@ Focus on creating clean, professional documentation that preserves all informati
             progress_pct = (total_completed_requests / master_total_requests) * 100
             print(f"   📈 Overall progress: {progress_pct:.1f}%")
 
+        all_completed = completed_chunks == len(chunk_batch_ids) and not pending_chunks
+        if all_completed:
+            job_status = "completed"
+        elif in_progress_chunks or pending_chunks:
+            job_status = "in_progress"
+        else:
+            job_status = "failed"
+        store.update_job(master_batch_id, status=job_status)
+
         # Return a summary object
         return {
             "master_batch_id": master_batch_id,
             "chunk_statuses": chunk_statuses,
             "completed_chunks": completed_chunks,
-            "total_chunks": len(chunk_batch_ids),
+            "total_chunks": len(chunk_batch_ids) + pending_chunks,
+            "pending_chunks": pending_chunks,
             "completed_requests": total_completed_requests,
             "total_requests": master_total_requests,
-            "all_completed": completed_chunks == len(chunk_batch_ids),
+            "all_completed": all_completed,
             "any_failed": failed_chunks > 0,
         }
 
     def retrieve_results(self, batch_id):
         """Retrieve and process batch results (handles both single and chunked batches)"""
         # Check if this is a chunked batch
-        if batch_id.startswith("chunked_"):
+        if self._is_sharded(batch_id):
             return self._retrieve_chunked_results(batch_id)
         else:
             return self._retrieve_single_results(batch_id)
 
     def _retrieve_single_results(self, batch_id):
         """Retrieve results from a single batch (original logic)"""
-        # Load batch info from temp directory
-        temp_batch_dir = config.DEFAULT_TEMP_FOLDER / "temp_batch"
-        batch_info_file = temp_batch_dir / f"batch_info_{batch_id}.json"
-        file_mapping = {}
-
-        if batch_info_file.exists():
-            try:
-                with open(batch_info_file) as f:
-                    batch_info = json.load(f)
-                file_mapping = batch_info.get("file_mapping", {})
-            except (json.JSONDecodeError, OSError) as e:
-                print(
-                    f"⚠️  Corrupted batch info file, will reconstruct from results: {e}"
-                )
-                file_mapping = {}
+        # Pages still without a result; without any the mapping is
+        # reconstructed from the custom_ids in the results
+        store = self._get_job_store()
+        file_mapping = store.file_mapping(
+            batch_id, status=PAGE_QUEUED
+        ) or store.file_mapping(batch_id)
 
         # Get batch results
         try:
             batch = self.client.batches.retrieve(batch_id)
+            store.record_batch(batch)
 
-            if batch.status not in ["completed"]:
+            if batch.status in FINAL_STATUSES and batch.status != "completed":
+                print(
+                    f"⚠️  Batch ended as {batch.status}; its missing pages can be "
+                    f"resubmitted"
+                )
+            elif batch.status != "completed":
                 print(f"❌ Batch not completed yet. Status: {batch.status}")
                 if hasattr(batch, "request_counts") and batch.request_counts:
                     completed = getattr(batch.request_counts, "completed", 0)
@@ -860,193 +1398,16 @@ Focus on creating clean, professional documentation that preserves all informati
                 print(f"❌ No output file available for batch {batch_id}")
                 return False
 
-            result = self.client.files.content(result_file_id)
-
-            # Parse results and reconstruct file mapping if needed
-            results = {}
-            usage_stats = {}  # Track usage per page
-            for line in result.text.split("\n"):
-                if line.strip():
-                    try:
-                        result_item = json.loads(line)
-                        custom_id = result_item.get("custom_id")
-                        if custom_id and result_item.get("response"):
-                            content = result_item["response"]["body"]["choices"][0][
-                                "message"
-                            ]["content"]
-                            results[custom_id] = content
-
-                            # Extract usage statistics
-                            if "usage" in result_item["response"]["body"]:
-                                usage = result_item["response"]["body"]["usage"]
-                                usage_stats[custom_id] = {
-                                    "prompt_tokens": usage.get("prompt_tokens", 0),
-                                    "completion_tokens": usage.get(
-                                        "completion_tokens", 0
-                                    ),
-                                    "total_tokens": usage.get("total_tokens", 0),
-                                    "input_cost": (
-                                        usage.get("prompt_tokens", 0) / 1_000_000
-                                    )
-                                    * 0.150,
-                                    "output_cost": (
-                                        usage.get("completion_tokens", 0) / 1_000_000
-                                    )
-                                    * 0.600,
-                                    "total_cost": (
-                                        (usage.get("prompt_tokens", 0) / 1_000_000)
-                                        * 0.150
-                                    )
-                                    + (
-                                        (usage.get("completion_tokens", 0) / 1_000_000)
-                                        * 0.600
-                                    ),
-                                }
-
-                            # Reconstruct file mapping if missing
-                            if custom_id not in file_mapping:
-                                # Parse custom_id format: PDF-NAME_page_0001
-                                parts = custom_id.split("_page_")
-                                if len(parts) == 2:
-                                    pdf_name = parts[0]
-                                    page_num = int(parts[1])
-                                    file_mapping[custom_id] = (
-                                        pdf_name,
-                                        page_num,
-                                        f"temp_batch/{pdf_name}",
-                                    )
-
-                    except (
-                        json.JSONDecodeError,
-                        KeyError,
-                        ValueError,
-                        IndexError,
-                    ) as e:
-                        print(f"⚠️  Error parsing result line: {e}")
-
-            # Group results by PDF and create final markdown files
-            pdf_contents = {}
-            pdf_usage_stats = {}  # Track usage per PDF
-
-            for custom_id, content in results.items():
-                if custom_id in file_mapping:
-                    pdf_name, page_num, _ = file_mapping[custom_id]
-
-                    if pdf_name not in pdf_contents:
-                        pdf_contents[pdf_name] = {}
-                        pdf_usage_stats[pdf_name] = {
-                            "total_tokens": 0,
-                            "total_cost": 0.0,
-                            "prompt_tokens": 0,
-                            "completion_tokens": 0,
-                            "page_count": 0,
-                        }
-
-                    pdf_contents[pdf_name][page_num] = content
-
-                    # Accumulate usage stats for this PDF
-                    if custom_id in usage_stats:
-                        stats = usage_stats[custom_id]
-                        pdf_usage_stats[pdf_name]["total_tokens"] += stats[
-                            "total_tokens"
-                        ]
-                        pdf_usage_stats[pdf_name]["total_cost"] += stats["total_cost"]
-                        pdf_usage_stats[pdf_name]["prompt_tokens"] += stats[
-                            "prompt_tokens"
-                        ]
-                        pdf_usage_stats[pdf_name]["completion_tokens"] += stats[
-                            "completion_tokens"
-                        ]
-                        pdf_usage_stats[pdf_name]["page_count"] += 1
-
-            # Create final markdown files
-            os.makedirs(str(config.DEFAULT_CONVERTED_FOLDER), exist_ok=True)
-
-            for pdf_name, pages in pdf_contents.items():
-                output_file = (
-                    Path(str(config.DEFAULT_CONVERTED_FOLDER)) / f"{pdf_name}_batch.md"
-                )
-                usage_data = pdf_usage_stats.get(pdf_name, {})
-
-                with open(output_file, "w", encoding="utf-8") as f:
-                    for page_num in sorted(pages.keys()):
-                        f.write(f"---\n# Page {page_num}\n---\n\n")
-                        f.write(pages[page_num])
-                        f.write("\n\n")
-
-                    # Add comprehensive metadata including usage statistics
-                    f.write("---\n\n## Processing Metadata\n\n")
-                    f.write(f"- **Document:** {pdf_name}\n")
-                    f.write(f"- **Total Pages:** {len(pages)}\n")
-                    f.write("- **Processing Method:** OpenAI Batch API\n")
-                    f.write(f"- **Model:** {self.model}\n")
-                    f.write(f"- **Batch ID:** {batch_id}\n")
-                    f.write(
-                        f"- **Processed:** {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-                    )
-
-                    # Add usage and cost information
-                    if usage_data and usage_data.get("page_count", 0) > 0:
-                        f.write("### 📊 Processing Statistics\n\n")
-                        f.write(
-                            f"- **Total Tokens Used:** {usage_data['total_tokens']:,}\n"
-                        )
-                        f.write(
-                            f"- **Prompt Tokens:** {usage_data['prompt_tokens']:,}\n"
-                        )
-                        f.write(
-                            f"- **Completion Tokens:** {usage_data['completion_tokens']:,}\n"
-                        )
-                        f.write(
-                            f"- **Total Processing Cost:** ${usage_data['total_cost']:.4f}\n"
-                        )
-                        f.write(
-                            f"- **Average Tokens per Page:** {usage_data['total_tokens'] / usage_data['page_count']:.0f}\n"
-                        )
-                        f.write(
-                            f"- **Average Cost per Page:** ${usage_data['total_cost'] / usage_data['page_count']:.4f}\n\n"
-                        )
-
-                        # Cost breakdown
-                        input_cost = (usage_data["prompt_tokens"] / 1_000_000) * 0.150
-                        output_cost = (
-                            usage_data["completion_tokens"] / 1_000_000
-                        ) * 0.600
-                        f.write("### 💰 Cost Breakdown\n\n")
-                        f.write(
-                            f"- **Input Processing:** ${input_cost:.4f} (vision + text)\n"
-                        )
-                        f.write(
-                            f"- **Output Generation:** ${output_cost:.4f} (markdown text)\n"
-                        )
-                        f.write("- **Batch API Discount:** 50% off regular pricing\n")
-                        f.write(
-                            f"- **Estimated Regular Cost:** ${usage_data['total_cost'] * 2:.4f}\n\n"
-                        )
-
-                        # Efficiency metrics
-                        tokens_per_dollar = (
-                            usage_data["total_tokens"] / usage_data["total_cost"]
-                            if usage_data["total_cost"] > 0
-                            else 0
-                        )
-                        pages_per_dollar = (
-                            usage_data["page_count"] / usage_data["total_cost"]
-                            if usage_data["total_cost"] > 0
-                            else 0
-                        )
-                        f.write("### ⚡ Efficiency Metrics\n\n")
-                        f.write(f"- **Tokens per Dollar:** {tokens_per_dollar:.0f}\n")
-                        f.write(f"- **Pages per Dollar:** {pages_per_dollar:.1f}\n")
-                        f.write("- **Processing Method:** Batch API (cost-optimized)\n")
-
-                print(f"✅ Created: {output_file} ({len(pages)} pages)")
-
-                # Print individual document stats
-                if usage_data and usage_data.get("page_count", 0) > 0:
-                    print(
-                        f"   💰 Cost: ${usage_data['total_cost']:.4f} | 🔢 Tokens: {usage_data['total_tokens']:,} | 📄 Avg: ${usage_data['total_cost'] / usage_data['page_count']:.4f}/page"
-                    )
+            # Stream results; each markdown file is written as soon as all
+            # of its document's pages have arrived (or failed)
+            created = self._stream_batch_results(
+                batch_id,
+                [result_file_id, batch.error_file_id]
+                if batch.error_file_id
+                else [result_file_id],
+                file_mapping,
+                [f"- **Batch ID:** {batch_id}\n"],
+            )
 
             # Cleanup temp directories (skip if reconstructed mapping)
             if file_mapping:
@@ -1067,7 +1428,7 @@ Focus on creating clean, professional documentation that preserves all informati
                 temp_batch_dir.rmdir()
 
             print(
-                f"🎉 Batch processing completed! Generated {len(pdf_contents)} markdown files."
+                f"🎉 Batch processing completed! Generated {len(created)} markdown files."
             )
             return True
 
@@ -1076,40 +1437,60 @@ Focus on creating clean, professional documentation that preserves all informati
             return False
 
     def _retrieve_chunked_results(self, master_batch_id):
-        """Retrieve and combine results from all chunks in a chunked batch"""
-        # Load master batch info
-        temp_batch_dir = config.DEFAULT_TEMP_FOLDER / "temp_batch"
-        master_batch_file = temp_batch_dir / f"batch_info_{master_batch_id}.json"
+        """Retrieve and combine results from all chunks in a chunked batch
 
-        if not master_batch_file.exists():
+        Only shards that still owe results are read, so after a resubmission
+        just the new shards are downloaded and merged into the existing files.
+        """
+        store = self._get_job_store()
+        if store.get_job(master_batch_id) is None:
             print(f"❌ Master batch info not found: {master_batch_id}")
             return False
 
-        try:
-            with open(master_batch_file) as f:
-                master_info = json.load(f)
-        except (json.JSONDecodeError, OSError) as e:
-            print(f"❌ Error loading master batch info: {e}")
+        outstanding = store.unresolved_shards(master_batch_id)
+        shards = [
+            shard
+            for shard in store.shards(master_batch_id)
+            if not outstanding or shard["seq"] in outstanding
+        ]
+        waiting = [shard for shard in shards if not shard["batch_id"]]
+        if waiting and any(shard["status"] == "pending" for shard in waiting):
+            print(f"❌ {len(waiting)} shards are still waiting for token budget")
             return False
 
-        chunk_batch_ids = master_info.get("chunk_batch_ids", [])
-        file_mapping = master_info.get("file_mapping", {})
-
+        chunk_batch_ids = [shard["batch_id"] for shard in shards if shard["batch_id"]]
         if not chunk_batch_ids:
             print(f"❌ No chunk batch IDs found in master batch")
             return False
 
         print(f"📥 Retrieving results from {len(chunk_batch_ids)} batch chunks...")
 
-        # Check if all chunks are completed
+        # Check that every chunk has finished; results are then streamed
+        # chunk by chunk, failed requests from the error files included
         incomplete_chunks = []
+        result_file_ids = []
         for i, chunk_id in enumerate(chunk_batch_ids, 1):
             try:
                 batch = self.client.batches.retrieve(chunk_id)
-                if batch.status != "completed":
-                    incomplete_chunks.append(f"Chunk {i} ({chunk_id}): {batch.status}")
+                store.record_batch(batch)
             except Exception as e:
                 incomplete_chunks.append(f"Chunk {i} ({chunk_id}): Error - {e}")
+                continue
+            if batch.status not in FINAL_STATUSES:
+                incomplete_chunks.append(f"Chunk {i} ({chunk_id}): {batch.status}")
+                continue
+            if batch.status != "completed":
+                print(
+                    f"⚠️  Chunk {i} ended as {batch.status}; its missing pages "
+                    f"can be resubmitted"
+                )
+            if not batch.output_file_id:
+                print(f"⚠️  No output file for chunk {i}, skipping...")
+            result_file_ids.extend(
+                file_id
+                for file_id in (batch.output_file_id, batch.error_file_id)
+                if file_id
+            )
 
         if incomplete_chunks:
             print(f"❌ Some chunks are not completed yet:")
@@ -1117,200 +1498,260 @@ Focus on creating clean, professional documentation that preserves all informati
                 print(f"   {incomplete}")
             return False
 
-        # Collect results from all chunks
-        all_results = {}
-        all_usage_stats = {}
+        created = self._stream_batch_results(
+            master_batch_id,
+            result_file_ids,
+            store.file_mapping(master_batch_id, status=PAGE_QUEUED)
+            or store.file_mapping(master_batch_id),
+            [
+                f"- **Master Batch ID:** {master_batch_id}\n",
+                f"- **Chunks:** {len(store.batch_ids(master_batch_id))}\n",
+            ],
+            chunked=True,
+        )
 
-        for i, chunk_id in enumerate(chunk_batch_ids, 1):
-            print(f"📥 Retrieving chunk {i}/{len(chunk_batch_ids)}...")
+        print(
+            f"🎉 Chunked batch processing completed! Generated {len(created)} markdown files."
+        )
+        return True
 
-            try:
-                batch = self.client.batches.retrieve(chunk_id)
-                result_file_id = batch.output_file_id
+    def _iter_output_lines(self, file_id):
+        """Yield the lines of a batch output file as they are downloaded"""
+        files = self.client.files
+        if hasattr(files, "with_streaming_response"):
+            with files.with_streaming_response.content(file_id) as response:
+                yield from response.iter_lines()
+        else:
+            yield from files.content(file_id).text.splitlines()
+
+    def _stream_batch_results(
+        self, batch_id, output_file_ids, file_mapping, id_lines, chunked=False
+    ):
+        """Stream batch output files into per-document markdown files
+
+        Output lines are read straight from the HTTP response and parsed
+        once: each page is spooled to disk and its usage folded into a
+        UsageAggregator, so memory stays bounded however large the output is.
+        A document's markdown file is written the moment its last page
+        arrives; documents with failed pages are written at the end. The
+        usage aggregates are saved to DEFAULT_METADATA_FOLDER for cost
+        reports (see usage_stats.load_usage_stats), and each page's outcome
+        is recorded in the job store so missing pages can be listed later.
+
+        When the job already has retrieved pages, the results are late ones
+        (resubmitted pages): each document is merged with the pages already
+        in its markdown file and usage is added to the saved totals.
+
+        Args:
+            batch_id: Batch (or master batch) ID; names the spool directory
+                and the job whose pages are updated
+            output_file_ids: Output files to read, in order
+            file_mapping: custom_id -> (pdf_name, page_num, temp_dir)
+            id_lines: Metadata lines identifying the batch
+            chunked: Whether the results come from a chunked master batch
+
+        Returns:
+            list: Names of the documents written
+        """
+        os.makedirs(str(config.DEFAULT_CONVERTED_FOLDER), exist_ok=True)
+        store = self._get_job_store()
+        tracked = store.get_job(batch_id) is not None
+        merge = tracked and bool(store.page_counts(batch_id).get(PAGE_DONE))
+        usage = UsageAggregator(
+            batch_id, config.DEFAULT_METADATA_FOLDER, resume=merge
+        )
 
-                if not result_file_id:
-                    print(f"⚠️  No output file for chunk {i}, skipping...")
-                    continue
+        def write_document(pdf_name, pages):
+            if merge:
+                pages = self._merge_existing_pages(pdf_name, pages)
+            self._write_batch_markdown(
+                pdf_name, pages, usage.document_stats(pdf_name), id_lines, chunked
+            )
 
-                result = self.client.files.content(result_file_id)
+        spool = ResultSpool(
+            config.DEFAULT_TEMP_FOLDER / "temp_batch" / f"spool_{batch_id}",
+            file_mapping,
+            write_document,
+        )
 
-                # Parse chunk results
-                for line in result.text.split("\n"):
-                    if line.strip():
-                        try:
-                            result_item = json.loads(line)
-                            custom_id = result_item.get("custom_id")
-                            if custom_id and result_item.get("response"):
-                                content = result_item["response"]["body"]["choices"][0][
-                                    "message"
-                                ]["content"]
-                                all_results[custom_id] = content
-
-                                # Extract usage statistics
-                                if "usage" in result_item["response"]["body"]:
-                                    usage = result_item["response"]["body"]["usage"]
-                                    all_usage_stats[custom_id] = {
-                                        "prompt_tokens": usage.get("prompt_tokens", 0),
-                                        "completion_tokens": usage.get(
-                                            "completion_tokens", 0
-                                        ),
-                                        "total_tokens": usage.get("total_tokens", 0),
-                                        "input_cost": (
-                                            usage.get("prompt_tokens", 0) / 1_000_000
-                                        )
-                                        * 0.150,
-                                        "output_cost": (
-                                            usage.get("completion_tokens", 0)
-                                            / 1_000_000
-                                        )
-                                        * 0.600,
-                                        "total_cost": (
-                                            (usage.get("prompt_tokens", 0) / 1_000_000)
-                                            * 0.150
-                                        )
-                                        + (
-                                            (
-                                                usage.get("completion_tokens", 0)
-                                                / 1_000_000
-                                            )
-                                            * 0.600
-                                        ),
-                                    }
-                        except (
-                            json.JSONDecodeError,
-                            KeyError,
-                            ValueError,
-                            IndexError,
-                        ) as e:
-                            print(f"⚠️  Error parsing result line in chunk {i}: {e}")
+        page_status = {PAGE_FAILED: [], PAGE_DONE: []}
 
+        def flush_page_status():
+            for status, custom_ids in page_status.items():
+                if tracked and custom_ids:
+                    store.mark_pages(batch_id, custom_ids, status)
+                custom_ids.clear()
+
+        result_count = 0
+        for i, file_id in enumerate(output_file_ids, 1):
+            if len(output_file_ids) > 1:
+                print(f"📥 Retrieving chunk {i}/{len(output_file_ids)}...")
+            try:
+                for line in self._iter_output_lines(file_id):
+                    if not line.strip():
+                        continue
+                    try:
+                        custom_id, content, line_usage = parse_result_line(line)
+                        if not custom_id:
+                            continue
+                        if file_mapping and custom_id not in file_mapping:
+                            continue  # retrieved before, or superseded
+                        pdf_name, page_num = spool.locate(custom_id)
+                        # Fold usage in first: the page may complete its document
+                        usage.add(
+                            custom_id,
+                            pdf_name,
+                            page_num,
+                            line_usage if content is not None else None,
+                        )
+                        spool.add(custom_id, content)
+                        result_count += 1
+                        page_status[
+                            PAGE_DONE if content is not None else PAGE_FAILED
+                        ].append(custom_id)
+                        if result_count % 1000 == 0:
+                            flush_page_status()
+                    except (
+                        json.JSONDecodeError,
+                        KeyError,
+                        ValueError,
+                        IndexError,
+                    ) as e:
+                        print(f"⚠️  Error parsing result line: {e}")
             except Exception as e:
-                print(f"❌ Error retrieving chunk {i}: {e}")
+                print(f"❌ Error retrieving output file {file_id}: {e}")
                 continue
 
-        print(f"✅ Retrieved {len(all_results)} results from all chunks")
-
-        # Group results by PDF and create final markdown files (same logic as single batch)
-        pdf_contents = {}
-        pdf_usage_stats = {}
-
-        for custom_id, content in all_results.items():
-            if custom_id in file_mapping:
-                pdf_name, page_num, _ = file_mapping[custom_id]
-
-                if pdf_name not in pdf_contents:
-                    pdf_contents[pdf_name] = {}
-                    pdf_usage_stats[pdf_name] = {
-                        "total_tokens": 0,
-                        "total_cost": 0.0,
-                        "prompt_tokens": 0,
-                        "completion_tokens": 0,
-                        "page_count": 0,
-                    }
-
-                pdf_contents[pdf_name][page_num] = content
-
-                # Accumulate usage stats for this PDF
-                if custom_id in all_usage_stats:
-                    stats = all_usage_stats[custom_id]
-                    pdf_usage_stats[pdf_name]["total_tokens"] += stats["total_tokens"]
-                    pdf_usage_stats[pdf_name]["total_cost"] += stats["total_cost"]
-                    pdf_usage_stats[pdf_name]["prompt_tokens"] += stats["prompt_tokens"]
-                    pdf_usage_stats[pdf_name]["completion_tokens"] += stats[
-                        "completion_tokens"
-                    ]
-                    pdf_usage_stats[pdf_name]["page_count"] += 1
-
-        # Create final markdown files (same as single batch)
-        os.makedirs(str(config.DEFAULT_CONVERTED_FOLDER), exist_ok=True)
-
-        for pdf_name, pages in pdf_contents.items():
-            output_file = (
-                Path(str(config.DEFAULT_CONVERTED_FOLDER)) / f"{pdf_name}_batch.md"
+        print(f"✅ Retrieved {result_count} results")
+        if spool.failed:
+            print(f"⚠️  {spool.failed} pages failed and are missing from the output")
+        created = spool.finish()
+        usage.save()
+        flush_page_status()
+        if tracked:
+            store.update_job(batch_id, retrieved_at=time.time())
+        return created
+
+    def _merge_existing_pages(self, pdf_name, pages):
+        """Add the pages of a document's existing markdown file to late results
+
+        Pages from the existing file are spooled next to the new ones, which
+        take precedence.
+
+        Args:
+            pdf_name: Document name
+            pages: (page_num, page_file) pairs of the new results
+
+        Returns:
+            list: (page_num, page_file) pairs of all pages in page order
+        """
+        output_file = Path(str(config.DEFAULT_CONVERTED_FOLDER)) / f"{pdf_name}_batch.md"
+        if not pages or not output_file.exists():
+            return pages
+
+        doc_dir = os.path.dirname(pages[0][1])
+        merged = dict(pages)
+        existing = split_batch_markdown(output_file.read_text(encoding="utf-8"))
+        for page_num, content in existing.items():
+            if page_num in merged:
+                continue
+            page_file = os.path.join(doc_dir, f"{page_num:05d}.md")
+            with open(page_file, "w", encoding="utf-8") as f:
+                f.write(content)
+            merged[page_num] = page_file
+        print(
+            f"🔀 Merging {len(pages)} late pages into {output_file.name} "
+            f"({len(existing)} pages already written)"
+        )
+        return sorted(merged.items())
+
+    def _write_batch_markdown(self, pdf_name, pages, usage_data, id_lines, chunked):
+        """Write one document's pages and processing metadata to *_batch.md
+
+        Args:
+            pdf_name: Document name
+            pages: (page_num, page_file) pairs in page order
+            usage_data: UsageAggregator.document_stats for the document
+            id_lines: Metadata lines identifying the batch
+            chunked: Whether the results come from a chunked master batch
+        """
+        method = "Chunked Batch API" if chunked else "Batch API"
+        output_file = Path(str(config.DEFAULT_CONVERTED_FOLDER)) / f"{pdf_name}_batch.md"
+        input_cost = token_cost(usage_data["prompt_tokens"], 0)
+        output_cost = token_cost(0, usage_data["completion_tokens"])
+
+        with open(output_file, "w", encoding="utf-8") as f:
+            for page_num, page_file in pages:
+                f.write(f"---\n# Page {page_num}\n---\n\n")
+                with open(page_file, encoding="utf-8") as page:
+                    shutil.copyfileobj(page, f)
+                f.write("\n\n")
+
+            # Add comprehensive metadata including usage statistics
+            f.write("---\n\n## Processing Metadata\n\n")
+            f.write(f"- **Document:** {pdf_name}\n")
+            f.write(f"- **Total Pages:** {len(pages)}\n")
+            f.write(
+                "- **Processing Method:** OpenAI Batch API"
+                + (" (Chunked)\n" if chunked else "\n")
             )
-            usage_data = pdf_usage_stats.get(pdf_name, {})
-
-            with open(output_file, "w", encoding="utf-8") as f:
-                for page_num in sorted(pages.keys()):
-                    f.write(f"---\n# Page {page_num}\n---\n\n")
-                    f.write(pages[page_num])
-                    f.write("\n\n")
-
-                # Add comprehensive metadata including usage statistics
-                f.write("---\n\n## Processing Metadata\n\n")
-                f.write(f"- **Document:** {pdf_name}\n")
-                f.write(f"- **Total Pages:** {len(pages)}\n")
-                f.write("- **Processing Method:** OpenAI Batch API (Chunked)\n")
-                f.write(f"- **Model:** {self.model}\n")
-                f.write(f"- **Master Batch ID:** {master_batch_id}\n")
-                f.write(f"- **Chunks:** {len(chunk_batch_ids)}\n")
-                f.write(f"- **Processed:** {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-
-                # Add usage and cost information (same as single batch)
-                if usage_data and usage_data.get("page_count", 0) > 0:
-                    f.write("### 📊 Processing Statistics\n\n")
-                    f.write(
-                        f"- **Total Tokens Used:** {usage_data['total_tokens']:,}\n"
-                    )
-                    f.write(f"- **Prompt Tokens:** {usage_data['prompt_tokens']:,}\n")
-                    f.write(
-                        f"- **Completion Tokens:** {usage_data['completion_tokens']:,}\n"
-                    )
-                    f.write(
-                        f"- **Total Processing Cost:** ${usage_data['total_cost']:.4f}\n"
-                    )
-                    f.write(
-                        f"- **Average Tokens per Page:** {usage_data['total_tokens'] / usage_data['page_count']:.0f}\n"
-                    )
-                    f.write(
-                        f"- **Average Cost per Page:** ${usage_data['total_cost'] / usage_data['page_count']:.4f}\n\n"
-                    )
-
-                    # Cost breakdown
-                    input_cost = (usage_data["prompt_tokens"] / 1_000_000) * 0.150
-                    output_cost = (usage_data["completion_tokens"] / 1_000_000) * 0.600
-                    f.write("### 💰 Cost Breakdown\n\n")
-                    f.write(
-                        f"- **Input Processing:** ${input_cost:.4f} (vision + text)\n"
-                    )
-                    f.write(
-                        f"- **Output Generation:** ${output_cost:.4f} (markdown text)\n"
-                    )
-                    f.write("- **Batch API Discount:** 50% off regular pricing\n")
-                    f.write(
-                        f"- **Estimated Regular Cost:** ${usage_data['total_cost'] * 2:.4f}\n\n"
-                    )
-
-                    # Efficiency metrics
-                    tokens_per_dollar = (
-                        usage_data["total_tokens"] / usage_data["total_cost"]
-                        if usage_data["total_cost"] > 0
-                        else 0
-                    )
-                    pages_per_dollar = (
-                        usage_data["page_count"] / usage_data["total_cost"]
-                        if usage_data["total_cost"] > 0
-                        else 0
-                    )
-                    f.write("### ⚡ Efficiency Metrics\n\n")
-                    f.write(f"- **Tokens per Dollar:** {tokens_per_dollar:.0f}\n")
-                    f.write(f"- **Pages per Dollar:** {pages_per_dollar:.1f}\n")
-                    f.write(
-                        "- **Processing Method:** Chunked Batch API (cost-optimized)\n"
-                    )
+            f.write(f"- **Model:** {self.model}\n")
+            for line in id_lines:
+                f.write(line)
+            f.write(f"- **Processed:** {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+
+            # Add usage and cost information
+            if usage_data["pages"] > 0:
+                f.write("### 📊 Processing Statistics\n\n")
+                f.write(f"- **Total Tokens Used:** {usage_data['total_tokens']:,}\n")
+                f.write(f"- **Prompt Tokens:** {usage_data['prompt_tokens']:,}\n")
+                f.write(
+                    f"- **Completion Tokens:** {usage_data['completion_tokens']:,}\n"
+                )
+                f.write(
+                    f"- **Total Processing Cost:** ${usage_data['cost']:.4f}\n"
+                )
+                f.write(
+                    f"- **Average Tokens per Page:** {usage_data['total_tokens'] / usage_data['pages']:.0f}\n"
+                )
+                f.write(
+                    f"- **Average Cost per Page:** ${usage_data['cost'] / usage_data['pages']:.4f}\n\n"
+                )
 
-            print(f"✅ Created: {output_file} ({len(pages)} pages)")
+                # Cost breakdown
+                f.write("### 💰 Cost Breakdown\n\n")
+                f.write(f"- **Input Processing:** ${input_cost:.4f} (vision + text)\n")
+                f.write(
+                    f"- **Output Generation:** ${output_cost:.4f} (markdown text)\n"
+                )
+                f.write("- **Batch API Discount:** 50% off regular pricing\n")
+                f.write(
+                    f"- **Estimated Regular Cost:** ${usage_data['cost'] * 2:.4f}\n\n"
+                )
 
-            # Print individual document stats
-            if usage_data and usage_data.get("page_count", 0) > 0:
-                print(
-                    f"   💰 Cost: ${usage_data['total_cost']:.4f} | 🔢 Tokens: {usage_data['total_tokens']:,} | 📄 Avg: ${usage_data['total_cost'] / usage_data['page_count']:.4f}/page"
+                # Efficiency metrics
+                tokens_per_dollar = (
+                    usage_data["total_tokens"] / usage_data["cost"]
+                    if usage_data["cost"] > 0
+                    else 0
                 )
+                pages_per_dollar = (
+                    usage_data["pages"] / usage_data["cost"]
+                    if usage_data["cost"] > 0
+                    else 0
+                )
+                f.write("### ⚡ Efficiency Metrics\n\n")
+                f.write(f"- **Tokens per Dollar:** {tokens_per_dollar:.0f}\n")
+                f.write(f"- **Pages per Dollar:** {pages_per_dollar:.1f}\n")
+                f.write(f"- **Processing Method:** {method} (cost-optimized)\n")
 
-        print(
-            f"🎉 Chunked batch processing completed! Generated {len(pdf_contents)} markdown files."
-        )
-        return True
+        print(f"✅ Created: {output_file} ({len(pages)} pages)")
+
+        # Print individual document stats
+        if usage_data["pages"] > 0:
+            print(
+                f"   💰 Cost: ${usage_data['cost']:.4f} | 🔢 Tokens: {usage_data['total_tokens']:,} | 📄 Avg: ${usage_data['cost'] / usage_data['pages']:.4f}/page"
+            )
 
 
 def main():
@@ -1324,6 +1765,8 @@ def main():
         print("  python batch_api.py status <id>    # Check batch status")
         print("  python batch_api.py retrieve <id>  # Retrieve batch results")
         print("  python batch_api.py list           # List pending batches")
+        print("  python batch_api.py schedule <id>  # Submit waiting batch shards")
+        print("  python batch_api.py resubmit <id>  # Resubmit failed or missing pages")
         print("  python batch_api.py cleanup        # Clean up orphaned batch files")
         return
 
@@ -1344,15 +1787,10 @@ def main():
         print(f"🚀 Starting batch processing for {len(pdf_files)} PDFs...")
         print("📋 Files to process:", pdf_files)
 
-        # Create batch requests
-        requests, file_mapping = converter.create_batch_requests(pdf_files)
-
-        if not requests:
-            print("❌ No valid requests created!")
+        # Render, write and submit; requests stream straight to the JSONL file
+        batch_id, request_count = converter.submit_pdf_files(pdf_files)
+        if not request_count:
             return
-
-        # Submit batch
-        batch_id = converter.submit_batch(requests, file_mapping)
         if batch_id:
             print("\n✅ Batch submitted! Use this ID to check status:")
             print(f"   python batch_api.py status {batch_id}")
@@ -1374,6 +1812,18 @@ def main():
         batch_id = sys.argv[2]
         converter.retrieve_results(batch_id)
 
+    elif command == "schedule":
+        if len(sys.argv) < 3:
+            print("❌ Please provide master batch ID")
+            return
+        converter.run_schedule(sys.argv[2])
+
+    elif command == "resubmit":
+        if len(sys.argv) < 3:
+            print("❌ Please provide batch ID")
+            return
+        converter.resubmit_missing(sys.argv[2])
+
     elif command == "cleanup":
         # Use centralized cleanup manager
         try:
@@ -1408,19 +1858,33 @@ def main():
             print(f"✅ Basic cleanup completed! Removed {cleaned} files.")
 
     elif command == "list":
-        # List all batch info files from temp directory
-        temp_batch_dir = config.DEFAULT_TEMP_FOLDER / "temp_batch"
-        if temp_batch_dir.exists():
-            batch_files = temp_batch_dir.glob("batch_info_*.json")
-            for batch_file in batch_files:
-                batch_id = batch_file.name.replace("batch_info_", "").replace(
-                    ".json", ""
-                )
-                print(f"📋 Found batch: {batch_id}")
-                converter.check_batch_status(batch_id)
-                print()
-        else:
-            print("📋 No batch files found")
+        # Check every job that has not reached a final status
+        jobs = converter._get_job_store().jobs(active_only=True)
+        for job in jobs:
+            print(f"📋 Found batch: {job['job_id']}")
+            converter.check_batch_status(job["job_id"])
+            print()
+        if not jobs:
+            print("📋 No pending batches found")
+
+    _wait_for_local_batches(converter)
+
+
+def _wait_for_local_batches(converter):
+    """Keep the process alive until the batches it runs locally finish
+
+    With BATCH_BACKEND=local a batch runs in the process that submitted (or
+    resumed) it, so one-shot commands block until it ends instead of taking
+    it down on exit.
+    """
+    if not isinstance(converter.client, LocalBatchClient):
+        return
+    batches = converter.client.batches
+    if not batches.running():
+        return
+    print(f"⏳ Running {len(batches.running())} local batches until they finish...")
+    batches.join()
+    print("✅ Local batches finished")
 
 
 if __name__ == "__main__":
@@ -1,10 +1,10 @@
 # Batch PDF to Markdown Converter - OPTIMIZED VERSION
-# Uses convert_fast.py with OpenAI GPT-4o-mini for high-quality conversion
+# Converts in-process with main_fast.convert_file and OpenAI GPT-4o-mini
 
 import importlib.util
-import os
-import subprocess
+import shutil
 import sys
+import tempfile
 import time
 from pathlib import Path
 
@@ -24,6 +24,9 @@ if config_path.exists():
 else:
     raise ImportError("Config file not found")
 
+sys.path.append(str(root_dir))
+from src.core.main_fast import convert_file  # noqa: E402
+
 
 def get_converted_files():
     """Get list of already converted files to avoid re-processing."""
@@ -42,38 +45,51 @@ def get_converted_files():
     return converted_pdfs
 
 
-def convert_pdf_to_markdown(pdf_file):
-    """Convert a single PDF to Markdown using convert_fast.py"""
+def convert_pdf_to_markdown(pdf_file, end_page=0, suffix="_fast"):
+    """Convert a single PDF to Markdown in-process with main_fast.convert_file
+
+    Args:
+        pdf_file: PDF file name in DEFAULT_PDF_FOLDER
+        end_page: Last page to convert (0 = last page)
+        suffix: Output file name suffix (<stem><suffix>.md)
+    """
 
     print(f"🚀 Converting: {pdf_file}")
     print("=" * 60)
 
+    pdf_path = Path(str(config.DEFAULT_PDF_FOLDER)) / pdf_file
+    output_file = (
+        Path(str(config.DEFAULT_CONVERTED_FOLDER)) / f"{pdf_path.stem}{suffix}.md"
+    )
+    temp_root = Path(str(config.DEFAULT_TEMP_FOLDER))
+    temp_root.mkdir(parents=True, exist_ok=True)
+    page_dir = tempfile.mkdtemp(prefix="batch_convert_", dir=temp_root)
+    partial_file = output_file.with_suffix(".md.partial")
+
     try:
         start_time = time.time()
 
-        # Use the optimized convert_fast.py script
-        result = subprocess.run(
-            [sys.executable, "convert_fast.py", pdf_file],
-            capture_output=True,
-            text=True,
-            cwd=os.getcwd(),
-        )
+        with open(partial_file, "w", encoding="utf-8") as f:
+            stats = convert_file(
+                str(pdf_path), page_dir, write=f.write, end_page=end_page
+            )
+        partial_file.replace(output_file)
 
         end_time = time.time()
         duration = end_time - start_time
 
-        if result.returncode == 0:
-            print(f"✅ Success! Completed in {duration:.1f} seconds")
-            return True
-        else:
-            print(f"❌ Failed with return code {result.returncode}")
-            if result.stderr:
-                print(f"Error: {result.stderr}")
-            return False
+        print(
+            f"✅ Success! {stats['total_pages']} pages completed in "
+            f"{duration:.1f} seconds"
+        )
+        return True
 
     except Exception as e:
         print(f"❌ Exception occurred: {e}")
+        partial_file.unlink(missing_ok=True)
         return False
+    finally:
+        shutil.rmtree(page_dir, ignore_errors=True)
 
 
 def main():
@@ -0,0 +1,392 @@
+"""
+Batch Scheduler - Sliding-window submission of batch shards under a token ceiling
+
+Enterprise Enhancement for PDFtoMD
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+
+The Batch API limits how many input tokens an organization may have enqueued
+at once; batches over the limit fail validation with token_limit_exceeded.
+The scheduler keeps the estimated input tokens of this job's unfinished
+batches under a ceiling, starts the next shard as soon as an earlier one
+finishes, and keeps its whole state in the job store so an interrupted job
+picks up where it left off.
+"""
+
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    from .job_store import FINAL_STATUSES
+except ImportError:
+    from batch.job_store import FINAL_STATUSES
+
+# Chunk states
+PENDING = "pending"  # written, waiting for token budget
+UPLOADING = "uploading"  # upload or batch creation in progress
+SUBMITTED = "submitted"  # batch created, counts against the token ceiling
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Batch statuses after which the input file is no longer needed for a retry
+STARTED_STATUSES = {"in_progress", "finalizing", "completed", "cancelling"}
+
+
+class RetryLater(Exception):
+    """Raised by submit_chunk when a chunk should stay queued for another attempt"""
+
+
+def estimate_text_tokens(text):
+    """Rough token count of prompt text (about four characters per token)"""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+class BatchScheduler:
+    """Submit the shards of one master batch within an enqueued-token ceiling
+
+    Chunks are submitted in the order they were added. A chunk starts when
+    its estimated tokens fit under token_limit next to the chunks already in
+    flight; when nothing is in flight it starts regardless, so an oversized
+    chunk cannot stall the job. A batch that fails with token_limit_exceeded
+    goes back to the queue and the ceiling is lowered to what was in flight
+    at the time; one rejected while running alone is split in two.
+    """
+
+    def __init__(
+        self,
+        store,
+        job_id,
+        submit_chunk,
+        retrieve_batch,
+        remove_file,
+        token_limit=0,
+        upload_workers=1,
+    ):
+        """
+        Args:
+            store: JobStore holding the schedule
+            job_id: Master batch ID of the job
+            submit_chunk: Called with (batch_file, request_count); uploads and
+                creates one batch and returns its ID or None, or raises
+                RetryLater to leave the chunk queued
+            retrieve_batch: Called with a batch ID; returns the batch object
+            remove_file: Called with a batch file once it is no longer needed
+            token_limit: Enqueued-token ceiling for a new job (0 = submit
+                everything at once); a resumed job keeps its stored ceiling
+            upload_workers: Chunks uploaded concurrently
+        """
+        self.store = store
+        self.job_id = job_id
+        self.submit_chunk = submit_chunk
+        self.retrieve_batch = retrieve_batch
+        self.remove_file = remove_file
+        self.upload_workers = max(1, upload_workers)
+        self._lock = threading.RLock()
+        self._executor = None
+        self._futures = []
+
+        job = store.get_job(job_id)
+        if job is None:
+            store.create_job(job_id, "chunked", token_limit=token_limit)
+            job = store.get_job(job_id)
+        self.token_limit = job["token_limit"]
+
+        self.chunks = [
+            {
+                key: shard[key]
+                for key in (
+                    "seq",
+                    "batch_file",
+                    "request_count",
+                    "estimated_tokens",
+                    "status",
+                    "batch_id",
+                )
+            }
+            for shard in store.shards(job_id)
+        ]
+        # An upload cut short by a restart is retried from its file
+        for chunk in self.chunks:
+            if chunk["status"] == UPLOADING:
+                chunk["status"] = PENDING
+                self._save_chunk(chunk)
+
+    @property
+    def batch_ids(self):
+        """Batch IDs of the submitted chunks, in order"""
+        with self._lock:
+            return [chunk["batch_id"] for chunk in self.chunks if chunk["batch_id"]]
+
+    def in_flight_tokens(self):
+        """Estimated input tokens of chunks that are uploading or running"""
+        with self._lock:
+            return sum(
+                chunk["estimated_tokens"]
+                for chunk in self.chunks
+                if chunk["status"] in (UPLOADING, SUBMITTED)
+            )
+
+    def pending_count(self):
+        """Chunks still waiting to be submitted"""
+        with self._lock:
+            return sum(1 for chunk in self.chunks if chunk["status"] == PENDING)
+
+    def add_chunk(self, batch_file, request_count, file_mapping, estimated_tokens):
+        """
+        Queue a written batch file
+
+        Args:
+            batch_file: JSONL file to submit
+            request_count: Number of requests in the file
+            file_mapping: custom_id -> (pdf_name, page_num, temp_dir) for the file
+            estimated_tokens: Estimated input tokens of all its requests
+        """
+        with self._lock:
+            seq = self.store.add_shard(
+                self.job_id,
+                request_count,
+                file_mapping,
+                batch_file=batch_file,
+                estimated_tokens=estimated_tokens,
+            )
+            self.chunks.append(
+                {
+                    "seq": seq,
+                    "batch_file": str(batch_file),
+                    "request_count": request_count,
+                    "estimated_tokens": estimated_tokens,
+                    "status": PENDING,
+                    "batch_id": None,
+                }
+            )
+
+    def refresh(self):
+        """Poll running batches and release the tokens of finished ones
+
+        Returns:
+            int: Number of chunks that finished since the last refresh
+        """
+        with self._lock:
+            running = [c for c in self.chunks if c["status"] == SUBMITTED]
+
+        finished = 0
+        for chunk in running:
+            try:
+                batch = self.retrieve_batch(chunk["batch_id"])
+            except Exception as e:  # pylint: disable=broad-except
+                print(f"   ⚠️  Could not check chunk {chunk['batch_id']}: {e}")
+                continue
+
+            with self._lock:
+                if batch.status in STARTED_STATUSES and chunk.get("batch_file"):
+                    # Validated: the input file will not be resubmitted
+                    self.remove_file(chunk["batch_file"])
+                    chunk["batch_file"] = None
+                    self._save_chunk(chunk)
+
+                if batch.status not in FINAL_STATUSES:
+                    continue
+                finished += 1
+
+                if batch.status == "failed" and _token_limit_exceeded(batch):
+                    others = self.in_flight_tokens() - chunk["estimated_tokens"]
+                    if others > 0 and chunk.get("batch_file"):
+                        # Requeue behind the chunks that were already running
+                        self.token_limit = others
+                        self.store.update_job(self.job_id, token_limit=others)
+                        chunk["status"] = PENDING
+                        chunk["batch_id"] = None
+                        self._save_chunk(chunk)
+                        print(
+                            f"   ⏳ Token limit reached; chunk requeued, "
+                            f"ceiling lowered to {others:,} tokens"
+                        )
+                        continue
+                    if chunk.get("batch_file") and self._split(chunk):
+                        continue
+
+                chunk["status"] = COMPLETED if batch.status == "completed" else FAILED
+                if chunk.get("batch_file"):
+                    self.remove_file(chunk["batch_file"])
+                    chunk["batch_file"] = None
+                self._save_chunk(chunk)
+
+        return finished
+
+    def pump(self, refresh=True):
+        """Start every pending chunk that fits under the token ceiling
+
+        Uploads run in the background; call wait() to block until they finish.
+
+        Args:
+            refresh: Poll running batches first to release finished ones
+
+        Returns:
+            int: Number of chunks started
+        """
+        if refresh:
+            self.refresh()
+
+        started = 0
+        with self._lock:
+            in_flight = self.in_flight_tokens()
+            for chunk in self.chunks:
+                if chunk["status"] != PENDING:
+                    continue
+                fits = in_flight + chunk["estimated_tokens"] <= self.token_limit
+                if self.token_limit and in_flight and not fits:
+                    break  # keep submission order
+                chunk["status"] = UPLOADING
+                self._save_chunk(chunk)
+                in_flight += chunk["estimated_tokens"]
+                started += 1
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.upload_workers,
+                        thread_name_prefix="batch-upload",
+                    )
+                self._futures.append(self._executor.submit(self._upload, chunk))
+        return started
+
+    def wait(self):
+        """Block until every started upload has finished"""
+        while True:
+            with self._lock:
+                futures, self._futures = self._futures, []
+            if not futures:
+                return
+            for future in futures:
+                future.result()
+
+    def run(self, poll_interval):
+        """Submit all chunks, polling until the last one has been accepted
+
+        Args:
+            poll_interval: Seconds between status checks while waiting for budget
+        """
+        while True:
+            self.pump()
+            self.wait()
+            if not self.pending_count():
+                return
+            print(
+                f"⏳ {self.pending_count()} chunks waiting for token budget "
+                f"({self.in_flight_tokens():,}/{self.token_limit:,} in flight)"
+            )
+            time.sleep(poll_interval)
+
+    def close(self):
+        """Wait for uploads and release the upload threads"""
+        self.wait()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _split(self, chunk):
+        """Halve a chunk that was over the token limit on its own
+
+        The first half takes the chunk's place in the queue, the second is
+        queued as a new chunk, and the ceiling is lowered so the halves run
+        one at a time.
+
+        Returns:
+            bool: Whether the chunk was split (False for a single request)
+        """
+        batch_file = Path(chunk["batch_file"])
+        try:
+            with open(batch_file, "rb") as f:
+                lines = f.readlines()
+        except OSError as e:
+            print(f"   ⚠️  Could not split chunk {batch_file.name}: {e}")
+            return False
+        if len(lines) < 2:
+            return False
+
+        mapping = self.store.file_mapping(self.job_id, shard_seq=chunk["seq"])
+        middle = len(lines) // 2
+        halves = []
+        for suffix, part in (("a", lines[:middle]), ("b", lines[middle:])):
+            path = batch_file.with_name(batch_file.stem + suffix + batch_file.suffix)
+            with open(path, "wb") as f:
+                f.writelines(part)
+            custom_ids = [json.loads(line)["custom_id"] for line in part]
+            halves.append(
+                (
+                    str(path),
+                    len(part),
+                    {cid: mapping[cid] for cid in custom_ids if cid in mapping},
+                    math.ceil(chunk["estimated_tokens"] * len(part) / len(lines)),
+                )
+            )
+        self.remove_file(chunk["batch_file"])
+
+        first, second = halves
+        chunk["batch_file"] = first[0]
+        chunk["request_count"] = first[1]
+        chunk["estimated_tokens"] = first[3]
+        chunk["status"] = PENDING
+        chunk["batch_id"] = None
+        self._save_chunk(
+            chunk,
+            request_count=first[1],
+            estimated_tokens=first[3],
+            batch_status=None,
+        )
+        self.add_chunk(*second)
+
+        limit = max(first[3], second[3])
+        if self.token_limit:
+            limit = min(limit, self.token_limit)
+        self.token_limit = limit
+        self.store.update_job(self.job_id, token_limit=limit)
+        print(
+            f"   ✂️  Chunk over the token limit on its own; split into "
+            f"{first[1]} + {second[1]} requests, ceiling {limit:,} tokens"
+        )
+        return True
+
+    def _save_chunk(self, chunk, **fields):
+        self.store.update_shard(
+            self.job_id,
+            chunk["seq"],
+            status=chunk["status"],
+            batch_id=chunk["batch_id"],
+            batch_file=chunk["batch_file"],
+            **fields,
+        )
+
+    def _upload(self, chunk):
+        try:
+            batch_id = self.submit_chunk(chunk["batch_file"], chunk["request_count"])
+        except RetryLater as e:
+            print(f"   ⏸️  Chunk {chunk['seq']} stays queued: {e}")
+            with self._lock:
+                chunk["status"] = PENDING
+                self._save_chunk(chunk)
+            return
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"❌ Chunk upload failed: {e}")
+            batch_id = None
+
+        with self._lock:
+            if batch_id:
+                chunk["status"] = SUBMITTED
+                chunk["batch_id"] = batch_id
+                self._save_chunk(chunk, submitted_at=time.time())
+            else:
+                chunk["status"] = FAILED
+                chunk["batch_file"] = None
+                self._save_chunk(chunk)
+
+
+def _token_limit_exceeded(batch):
+    """Whether a failed batch was rejected for the enqueued-token limit"""
+    errors = getattr(batch, "errors", None)
+    for error in getattr(errors, "data", None) or []:
+        if getattr(error, "code", "") == "token_limit_exceeded":
+            return True
+    return False
@@ -0,0 +1,236 @@
+"""
+Batch Service - In-process API for submitting, tracking and retrieving batches
+
+Enterprise Enhancement for PDFtoMD
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+
+Orchestrators such as master.py and monitor_batch.py call this API
+rather than running batch_api.py as a command and parsing its output.
+One BatchPDFConverter serves every call, so the OpenAI client, its
+connection pool, the config and the job store are set up once per process,
+and every operation returns a structured result.
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+# Handle imports whether running as module or script
+try:
+    from .batch_api import BatchPDFConverter, config
+    from .job_store import FINAL_STATUSES
+    from .usage_stats import load_usage_stats
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from batch.batch_api import BatchPDFConverter, config
+    from batch.job_store import FINAL_STATUSES
+    from batch.usage_stats import load_usage_stats
+
+
+class BatchService:
+    """Submit, check and retrieve batch jobs in-process"""
+
+    def __init__(
+        self, converter=None, prompt_type="batch", client=None, on_transition=None
+    ):
+        """
+        Args:
+            converter: BatchPDFConverter to use (default: a new one)
+            prompt_type: Prompt set for a new converter
+            client: OpenAI client for a new converter (default: from config)
+            on_transition: Called with (batch_id, previous_status, batch)
+                whenever a polled batch changes status
+        """
+        self.converter = converter or BatchPDFConverter(prompt_type, client=client)
+        if on_transition:
+            self.converter._get_status_monitor().on_transition = on_transition
+
+    @property
+    def client(self):
+        """The OpenAI client shared by every operation"""
+        return self.converter.client
+
+    def submit(self, pdf_files=None, pages=None):
+        """
+        Render, write and submit PDFs as a batch job
+
+        Args:
+            pdf_files: PDF file names in DEFAULT_PDF_FOLDER (default: all)
+            pages: PDF file name -> page numbers to submit, for PDFs that are
+                only partly submitted (optional)
+
+        Returns:
+            dict: batch_id (None if nothing was submitted), request_count
+            and files
+        """
+        if pdf_files is None:
+            pdf_dir = Path(str(config.DEFAULT_PDF_FOLDER))
+            pdf_files = sorted(f.name for f in pdf_dir.glob("*.pdf"))
+
+        batch_id = None
+        request_count = 0
+        if pdf_files:
+            batch_id, request_count = self.converter.submit_pdf_files(pdf_files, pages)
+        return {
+            "batch_id": batch_id,
+            "request_count": request_count,
+            "files": len(pdf_files),
+        }
+
+    def status(self, batch_id, due_only=False):
+        """
+        Check a single or chunked batch job
+
+        Args:
+            batch_id: Job to check
+            due_only: Only ask the API about batches whose adaptive polling
+                interval has elapsed
+
+        Returns:
+            dict: id, status, completed, failed and total requests, timestamps
+            and chunked (with chunk_details for chunked jobs), or None if the
+            job could not be checked
+        """
+        result = self.converter.check_batch_status(batch_id, due_only)
+        if result is None:
+            return None
+
+        if isinstance(result, dict):
+            return {
+                "id": batch_id,
+                "status": _chunked_status(result),
+                "completed": result.get("completed_requests", 0),
+                "failed": 0,  # Individual chunk failures don't map directly
+                "total": result.get("total_requests", 0),
+                "created_at": None,
+                "completed_at": None,
+                "failed_at": None,
+                "usage": {},
+                "chunked": True,
+                "chunk_details": result,
+            }
+
+        request_counts = result.request_counts
+        return {
+            "id": batch_id,
+            "status": result.status,
+            "completed": (request_counts.completed or 0) if request_counts else 0,
+            "failed": (request_counts.failed or 0) if request_counts else 0,
+            "total": (request_counts.total or 0) if request_counts else 0,
+            "created_at": result.created_at,
+            "completed_at": result.completed_at,
+            "failed_at": result.failed_at,
+            "usage": getattr(result, "metadata", None) or {},
+            "chunked": False,
+        }
+
+    def statuses(self, batch_ids, due_only=False):
+        """
+        Check many jobs, polling all of their batches concurrently
+
+        Returns:
+            dict: batch_id -> status dict (see status()), None where the job
+            could not be checked
+        """
+        store = self.converter._get_job_store()
+        polled = []
+        for batch_id in batch_ids:
+            polled.extend(store.batch_ids(batch_id) or [batch_id])
+        self.converter._get_status_monitor().sweep(polled, due_only)
+
+        # Every batch was just checked, so the per-job checks reuse the results
+        return {
+            batch_id: self.status(batch_id, due_only=True) for batch_id in batch_ids
+        }
+
+    def next_poll_delay(self, batch_ids):
+        """Seconds until the next status check of any of these jobs is due"""
+        return min(
+            (self.converter.next_poll_delay(batch_id) for batch_id in batch_ids),
+            default=config.CHECK_INTERVAL,
+        )
+
+    def wait(self, batch_id, poll_interval=None, timeout=None, on_status=None):
+        """
+        Poll a job until it reaches a final status
+
+        Args:
+            batch_id: Job to wait for
+            poll_interval: Seconds between checks (default: adapted to the
+                job's status and progress)
+            timeout: Give up after this many seconds (default: MAX_WAIT_TIME)
+            on_status: Called with each status dict
+
+        Returns:
+            dict: Last status, or None if the job could not be checked
+        """
+        timeout = timeout or config.MAX_WAIT_TIME
+        deadline = time.time() + timeout
+
+        while True:
+            status = self.status(batch_id, due_only=poll_interval is None)
+            if status is not None and on_status:
+                on_status(status)
+            if status is None or status["status"] in FINAL_STATUSES:
+                return status
+            delay = poll_interval or self.converter.next_poll_delay(batch_id)
+            if time.time() + delay > deadline:
+                return status
+            time.sleep(delay)
+
+    def retrieve(self, batch_id):
+        """
+        Download a job's results into per-document markdown files
+
+        Returns:
+            dict: retrieved (bool), documents written so far and the usage
+            stats saved during retrieval (None if unavailable)
+        """
+        retrieved = bool(self.converter.retrieve_results(batch_id))
+        usage = self.usage(batch_id) if retrieved else None
+        return {
+            "batch_id": batch_id,
+            "retrieved": retrieved,
+            "documents": sorted(usage["documents"]) if usage else [],
+            "usage": usage,
+        }
+
+    def resubmit_missing(self, batch_id):
+        """
+        Resubmit the pages of a job that have no successful result
+
+        Returns:
+            int: Pages resubmitted (0 if none were missing), or None on failure
+        """
+        return self.converter.resubmit_missing(batch_id)
+
+    def missing_pages(self, batch_id, document=None):
+        """Pages of a job without a successful result (see JobStore.missing_pages)"""
+        return self.converter._get_job_store().missing_pages(batch_id, document)
+
+    def usage(self, batch_id):
+        """Usage stats saved when the job was retrieved, or None"""
+        return load_usage_stats(config.DEFAULT_METADATA_FOLDER, batch_id)
+
+    def jobs(self, active_only=False):
+        """Jobs in the job store, newest first"""
+        return self.converter._get_job_store().jobs(active_only)
+
+
+def _chunked_status(result):
+    """Overall status of a chunked job from check_batch_status's summary
+
+    A job stays in progress while any chunk is running or waiting for token
+    budget, even if others have failed, so waiting goes on until every
+    chunk's results can be retrieved.
+    """
+    if result.get("all_completed", False):
+        return "completed"
+    if result.get("pending_chunks") or any(
+        chunk["status"] not in FINAL_STATUSES
+        for chunk in result.get("chunk_statuses", [])
+    ):
+        return "in_progress"
+    return "failed"
@@ -0,0 +1,411 @@
+"""
+Hybrid Scheduler - Deadline- and budget-aware routing between sync and batch
+
+Enterprise Enhancement for PDFtoMD
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+
+Synchronous conversion (main_fast) finishes in minutes but costs twice as
+much per token as the Batch API, whose results can take up to a day. Rather
+than an operator picking the path for every run, the scheduler routes each
+document of a job from the job's deadline and budget:
+
+- batch: the expected batch turnaround meets the deadline, or there is none
+- sync: only synchronous conversion meets the deadline and the budget covers it
+- split: the first pages are converted synchronously (a preview, or as many
+  as the budget allows) and the rest go through the Batch API
+
+Synchronous throughput is estimated from the rate limits the API reported
+with the latest completion, kept in the job store so a new process plans
+with them too, and the measured time per page. The batch
+turnaround is a percentile of recently completed batches in the job store.
+Jobs are planned earliest deadline first, so urgent jobs get synchronous
+capacity ahead of later ones.
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from pathlib import Path
+
+import pypdf
+
+# Handle imports whether running as module or script
+try:
+    from .batch_service import BatchService, config
+    from .job_store import get_job_store
+    from .usage_stats import token_cost
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from batch.batch_service import BatchService, config
+    from batch.job_store import get_job_store
+    from batch.usage_stats import token_cost
+
+# Routes
+ROUTE_SYNC = "sync"
+ROUTE_BATCH = "batch"
+ROUTE_SPLIT = "split"
+
+# Prompt text tokens sent with each page image
+PROMPT_TEXT_TOKENS = 200
+
+# Expected completion tokens per converted page
+PAGE_COMPLETION_TOKENS = 800
+
+# Completed batches the turnaround estimate is based on
+TURNAROUND_HISTORY = 20
+
+# Weight of the latest measurement in the seconds-per-page estimate
+PAGE_SECONDS_WEIGHT = 0.5
+
+
+class HybridScheduler:
+    """Route the documents of deadline- and budget-bound jobs to sync or batch"""
+
+    def __init__(
+        self,
+        service=None,
+        convert=None,
+        page_count=None,
+        rate_limits=None,
+        turnarounds=None,
+        page_tokens=None,
+    ):
+        """
+        Args:
+            service: BatchService for batched pages (default: created on
+                first use)
+            convert: Called with (pdf_file, end_page, suffix) to convert the
+                first pages of a PDF synchronously; returns True on success
+                (default: batch_convert.convert_pdf_to_markdown)
+            page_count: Called with a PDF file name; returns its page count
+                (default: read from the PDF in DEFAULT_PDF_FOLDER)
+            rate_limits: Called without arguments; returns the current
+                synchronous rate limits (see LLMClient.parse_rate_limits)
+                (default: the limits reported to the shared client, else
+                the last ones recorded in the job store)
+            turnarounds: Recent batch turnarounds in seconds (default: read
+                from the job store)
+            page_tokens: (prompt, completion) tokens expected per page
+                (default: predicted from the render DPI and model)
+        """
+        self._service = service
+        self.convert = convert or _convert_pdf
+        self.page_count = page_count or _pdf_page_count
+        self.rate_limits = rate_limits or _shared_rate_limits
+        self._turnarounds = turnarounds
+        self.page_tokens = page_tokens or _predicted_page_tokens()
+        self.page_seconds = config.HYBRID_PAGE_SECONDS
+
+    @property
+    def service(self):
+        """BatchService the batched pages are submitted through"""
+        if self._service is None:
+            self._service = BatchService()
+        return self._service
+
+    def page_cost(self, batch=True):
+        """Expected cost of converting one page in USD"""
+        return token_cost(*self.page_tokens, batch=batch)
+
+    def batch_turnaround(self):
+        """
+        Expected seconds from batch submission to results
+
+        Returns:
+            float: HYBRID_TURNAROUND_PERCENTILE of recent turnarounds, or
+            HYBRID_BATCH_TURNAROUND before any batch has completed
+        """
+        turnarounds = self._turnarounds
+        if turnarounds is None:
+            store = get_job_store(config.BATCH_JOB_STORE_PATH)
+            turnarounds = store.batch_turnarounds(TURNAROUND_HISTORY)
+        if not turnarounds:
+            return config.HYBRID_BATCH_TURNAROUND
+
+        # Nearest-rank percentile
+        ordered = sorted(turnarounds)
+        rank = math.ceil(config.HYBRID_TURNAROUND_PERCENTILE / 100 * len(ordered))
+        return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+    def sync_rate(self, rate_limits=None):
+        """
+        Pages per second the synchronous path sustains
+
+        The slowest of page concurrency over seconds per page, the request
+        rate limit and the token rate limit.
+        """
+        if rate_limits is None:
+            rate_limits = self.rate_limits() or {}
+        requests_per_minute = (
+            rate_limits.get("limit_requests") or config.HYBRID_SYNC_RPM
+        )
+        tokens_per_minute = rate_limits.get("limit_tokens") or config.HYBRID_SYNC_TPM
+        return min(
+            max(config.PAGE_CONCURRENCY, 1) / self.page_seconds,
+            requests_per_minute / 60,
+            tokens_per_minute / 60 / sum(self.page_tokens),
+        )
+
+    def sync_seconds(self, pages, rate_limits=None):
+        """
+        Expected seconds to convert pages synchronously
+
+        Waits for the current rate limit window to reset first when the
+        last response reported it exhausted.
+        """
+        if rate_limits is None:
+            rate_limits = self.rate_limits() or {}
+        delay = 0
+        elapsed = time.time() - rate_limits.get("checked_at", 0)
+        if rate_limits.get("remaining_requests", 1) < 1:
+            delay = rate_limits.get("reset_requests", 0) - elapsed
+        if rate_limits.get("remaining_tokens", math.inf) < self.page_tokens[0]:
+            delay = max(delay, rate_limits.get("reset_tokens", 0) - elapsed)
+        return max(delay, 0) + pages / self.sync_rate(rate_limits)
+
+    def plan(self, jobs):
+        """
+        Route every document of the jobs, earliest deadline first
+
+        Args:
+            jobs: List of dicts with documents (PDF file names in
+                DEFAULT_PDF_FOLDER), and optionally deadline (seconds from
+                now), budget (USD for the whole job) and preview_pages
+                (default: HYBRID_PREVIEW_PAGES)
+
+        Returns:
+            list: One dict per document in the order it is processed: job
+            (index in jobs), document, pages, route, sync_pages (first pages
+            converted synchronously), eta (seconds), cost (USD),
+            meets_deadline and within_budget
+        """
+        rate_limits = self.rate_limits() or {}
+        turnaround = self.batch_turnaround()
+        sync_page = self.page_cost(batch=False)
+        batch_page = self.page_cost()
+
+        order = sorted(
+            range(len(jobs)),
+            key=lambda i: (
+                math.inf if jobs[i].get("deadline") is None else jobs[i]["deadline"]
+            ),
+        )
+        routes = []
+        sync_queued = 0
+        for index in order:
+            job = jobs[index]
+            deadline = job.get("deadline")
+            budget = job.get("budget")
+            preview = job.get("preview_pages", config.HYBRID_PREVIEW_PAGES)
+
+            for document in job["documents"]:
+                pages = self.page_count(document)
+                if budget is None:
+                    affordable = pages
+                else:
+                    # Pages that can go synchronously with the rest batched
+                    spare = budget - pages * batch_page
+                    affordable = min(
+                        max(math.floor(spare / (sync_page - batch_page)), 0), pages
+                    )
+
+                if deadline is None or turnaround <= deadline:
+                    sync_pages = min(preview, affordable)
+                elif self.sync_seconds(sync_queued + pages, rate_limits) < turnaround:
+                    # Batch is too slow; sync as much as the budget allows
+                    sync_pages = affordable
+                else:
+                    # Nothing meets the deadline and batch is no slower
+                    sync_pages = min(preview, affordable)
+
+                eta = 0
+                if sync_pages:
+                    sync_queued += sync_pages
+                    eta = self.sync_seconds(sync_queued, rate_limits)
+                if sync_pages < pages:
+                    eta = max(eta, turnaround)
+                cost = sync_pages * sync_page + (pages - sync_pages) * batch_page
+
+                routes.append(
+                    {
+                        "job": index,
+                        "document": document,
+                        "pages": pages,
+                        "route": ROUTE_BATCH
+                        if not sync_pages
+                        else ROUTE_SYNC
+                        if sync_pages == pages
+                        else ROUTE_SPLIT,
+                        "sync_pages": sync_pages,
+                        "eta": eta,
+                        "cost": cost,
+                        "meets_deadline": deadline is None or eta <= deadline,
+                        "within_budget": budget is None or cost <= budget,
+                    }
+                )
+                if budget is not None:
+                    budget = max(budget - cost, 0)
+        return routes
+
+    def run(self, jobs):
+        """
+        Plan the jobs, submit the batched pages, then convert the sync pages
+
+        Batched pages are submitted first so the batch turnaround runs while
+        the synchronous conversions do. Split documents produce
+        <stem>_preview.md synchronously and <stem>_batch.md with the remaining
+        pages once the batch is retrieved.
+
+        Returns:
+            dict: plan (see plan()), batch (BatchService.submit result, or None
+            if nothing was batched), sync (document -> conversion succeeded)
+            and ok (the batch was submitted and every conversion succeeded)
+        """
+        routes = self.plan(jobs)
+        print_plan(routes)
+
+        result = {"plan": routes, "batch": None, "sync": {}, "ok": True}
+        batched = [r for r in routes if r["route"] != ROUTE_SYNC]
+        if batched:
+            pages = {
+                r["document"]: list(range(r["sync_pages"] + 1, r["pages"] + 1))
+                for r in batched
+                if r["sync_pages"]
+            }
+            result["batch"] = self.service.submit(
+                [r["document"] for r in batched], pages=pages or None
+            )
+            if result["batch"]["batch_id"]:
+                print(f"📤 Batch: {result['batch']['batch_id']}")
+            else:
+                print("❌ Batched pages could not be submitted")
+                result["ok"] = False
+
+        for route in routes:
+            if not route["sync_pages"]:
+                continue
+            whole = route["route"] == ROUTE_SYNC
+            start_time = time.time()
+            converted = self.convert(
+                route["document"],
+                0 if whole else route["sync_pages"],
+                "_fast" if whole else "_preview",
+            )
+            if converted:
+                self._measure(route["sync_pages"], time.time() - start_time)
+                # Record the limits the conversion reported for later plans
+                self.rate_limits()
+            else:
+                result["ok"] = False
+            result["sync"][route["document"]] = bool(converted)
+        return result
+
+    def _measure(self, pages, seconds):
+        """Fold a synchronous conversion into the seconds-per-page estimate"""
+        concurrency = max(config.PAGE_CONCURRENCY, 1)
+        sample = seconds * concurrency / pages
+        self.page_seconds += PAGE_SECONDS_WEIGHT * (sample - self.page_seconds)
+
+
+def print_plan(routes):
+    """Print one line per routed document (see HybridScheduler.plan)"""
+    for route in routes:
+        print(
+            f"🧭 {route['document']}: {route['route']} "
+            f"({route['sync_pages']}/{route['pages']} pages sync, "
+            f"~{route['eta'] / 60:.0f} min, ${route['cost']:.4f})"
+        )
+        if not route["meets_deadline"]:
+            print("   ⚠️  Expected to miss its deadline")
+        if not route["within_budget"]:
+            print("   ⚠️  Expected to exceed its budget")
+
+
+def _pdf_page_count(pdf_file):
+    return len(pypdf.PdfReader(Path(str(config.DEFAULT_PDF_FOLDER)) / pdf_file).pages)
+
+
+def _convert_pdf(pdf_file, end_page, suffix):
+    try:
+        from .batch_convert import convert_pdf_to_markdown
+    except ImportError:
+        from batch.batch_convert import convert_pdf_to_markdown
+    return convert_pdf_to_markdown(pdf_file, end_page=end_page, suffix=suffix)
+
+
+def _shared_rate_limits():
+    # main_fast completes through src.core.LLMClient
+    root_dir = str(Path(__file__).parent.parent.parent)
+    if root_dir not in sys.path:
+        sys.path.append(root_dir)
+    from src.core.LLMClient import shared_rate_limits
+
+    model = config.OPENAI_DEFAULT_MODEL
+    store = get_job_store(config.BATCH_JOB_STORE_PATH)
+    rate_limits = shared_rate_limits(model)
+    if not rate_limits:
+        # Nothing completed in this process yet
+        return store.rate_limits(model)
+    store.record_rate_limits(model, rate_limits)
+    return rate_limits
+
+
+def _predicted_page_tokens():
+    from core.VisionTiling import image_tokens
+
+    # A US Letter page rendered at the configured DPI
+    width, height = round(8.5 * config.DPI), round(11 * config.DPI)
+    prompt = image_tokens(width, height, config.OPENAI_DEFAULT_MODEL)
+    return prompt + PROMPT_TEXT_TOKENS, PAGE_COMPLETION_TOKENS
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Route PDFs to synchronous or batch conversion by deadline and budget"
+    )
+    parser.add_argument(
+        "pdfs", nargs="*", help="PDF file names in DEFAULT_PDF_FOLDER (default: all)"
+    )
+    parser.add_argument(
+        "--deadline-hours", type=float, help="Results needed within this many hours"
+    )
+    parser.add_argument("--budget", type=float, help="Maximum spend in USD")
+    parser.add_argument(
+        "--preview-pages",
+        type=int,
+        default=config.HYBRID_PREVIEW_PAGES,
+        help="First pages of batched PDFs converted synchronously "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Print the routing plan only"
+    )
+    args = parser.parse_args()
+
+    pdfs = args.pdfs or sorted(
+        f.name for f in Path(str(config.DEFAULT_PDF_FOLDER)).glob("*.pdf")
+    )
+    if not pdfs:
+        print("❌ No PDF files found")
+        return 1
+
+    job = {
+        "documents": pdfs,
+        "deadline": None if args.deadline_hours is None else args.deadline_hours * 3600,
+        "budget": args.budget,
+        "preview_pages": args.preview_pages,
+    }
+    scheduler = HybridScheduler()
+    if args.dry_run:
+        print_plan(scheduler.plan([job]))
+        return 0
+
+    result = scheduler.run([job])
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,597 @@
+"""
+Job Store - Embedded SQLite state for batch jobs, shards and pages
+
+Enterprise Enhancement for PDFtoMD
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+
+A job is what the user submits and tracks: a single batch (job ID = batch
+ID) or a chunked master batch (job ID = chunked_<timestamp>) made of several
+shards, each of which becomes one Batch API batch. Every page request is a
+row keyed by (job, custom_id), so status, resume and "what is missing"
+questions are indexed local queries instead of JSON parsing and one remote
+call per file.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# Job and batch statuses after which no further remote checks are needed
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Page statuses
+PAGE_QUEUED = "queued"
+PAGE_DONE = "done"
+PAGE_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total_requests INTEGER NOT NULL DEFAULT 0,
+    token_limit INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    retrieved_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+
+CREATE TABLE IF NOT EXISTS shards (
+    job_id TEXT NOT NULL REFERENCES jobs (job_id)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+    seq INTEGER NOT NULL,
+    batch_id TEXT,
+    batch_file TEXT,
+    request_count INTEGER NOT NULL,
+    estimated_tokens INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    batch_status TEXT,
+    output_file_id TEXT,
+    error_file_id TEXT,
+    submitted_at REAL,
+    completed_at REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_shards_batch ON shards (batch_id);
+CREATE INDEX IF NOT EXISTS idx_shards_status ON shards (status);
+
+CREATE TABLE IF NOT EXISTS pages (
+    job_id TEXT NOT NULL REFERENCES jobs (job_id)
+        ON DELETE CASCADE ON UPDATE CASCADE,
+    custom_id TEXT NOT NULL,
+    shard_seq INTEGER,
+    document TEXT NOT NULL,
+    page_num INTEGER NOT NULL,
+    temp_dir TEXT,
+    status TEXT NOT NULL,
+    PRIMARY KEY (job_id, custom_id)
+);
+CREATE INDEX IF NOT EXISTS idx_pages_document ON pages (job_id, document, page_num);
+CREATE INDEX IF NOT EXISTS idx_pages_status ON pages (job_id, status);
+
+CREATE TABLE IF NOT EXISTS rate_limits (
+    model TEXT PRIMARY KEY,
+    limits TEXT NOT NULL,
+    checked_at REAL NOT NULL
+);
+"""
+
+_SHARD_COLUMNS = (
+    "batch_id",
+    "batch_file",
+    "request_count",
+    "estimated_tokens",
+    "status",
+    "batch_status",
+    "output_file_id",
+    "error_file_id",
+    "submitted_at",
+)
+
+_shared_stores = {}
+_shared_lock = threading.Lock()
+
+
+class JobStore:
+    """SQLite-backed store of batch jobs, their shards and their pages"""
+
+    def __init__(self, path):
+        """
+        Open (or create) a job database
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = str(path)
+        self._lock = threading.RLock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._conn.commit()
+
+    def _migrate(self):
+        """Add columns introduced after a database was created"""
+        shard_columns = {
+            row["name"] for row in self._conn.execute("PRAGMA table_info(shards)")
+        }
+        if "completed_at" not in shard_columns:
+            self._conn.execute("ALTER TABLE shards ADD COLUMN completed_at REAL")
+
+    # -- jobs -----------------------------------------------------------------
+
+    def create_job(self, job_id, kind, status="pending", token_limit=0):
+        """
+        Register a job
+
+        Args:
+            job_id: Batch ID (single) or master batch ID (chunked)
+            kind: "single" or "chunked"
+            status: Initial status
+            token_limit: Enqueued-token ceiling used to schedule its shards
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, kind, status, token_limit, created_at,"
+                " updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, status, token_limit, now, now),
+            )
+            self._conn.commit()
+
+    def get_job(self, job_id):
+        """
+        Look up a job
+
+        Returns:
+            dict: Job row, or None if unknown
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def update_job(self, job_id, **fields):
+        """Set job columns (status, token_limit, retrieved_at, ...)"""
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                (*fields.values(), job_id),
+            )
+            self._conn.commit()
+
+    def rename_job(self, job_id, new_job_id, kind):
+        """Re-key a job and everything under it (a one-shard job becomes single)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET job_id = ?, kind = ?, updated_at = ? WHERE job_id = ?",
+                (new_job_id, kind, time.time(), job_id),
+            )
+            self._conn.commit()
+
+    def delete_job(self, job_id):
+        """Forget a job, its shards and its pages"""
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+
+    def jobs(self, active_only=False):
+        """
+        List jobs, newest first
+
+        Args:
+            active_only: Only jobs whose last known status is not final
+
+        Returns:
+            list: Job rows as dicts
+        """
+        query = "SELECT * FROM jobs"
+        if active_only:
+            query += f" WHERE status NOT IN ({', '.join('?' * len(FINAL_STATUSES))})"
+        query += " ORDER BY created_at DESC"
+        with self._lock:
+            rows = self._conn.execute(
+                query, FINAL_STATUSES if active_only else ()
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    # -- shards ---------------------------------------------------------------
+
+    def add_shard(
+        self,
+        job_id,
+        request_count,
+        file_mapping,
+        batch_file=None,
+        estimated_tokens=0,
+        status="pending",
+        batch_id=None,
+    ):
+        """
+        Add a shard and its pages to a job
+
+        Args:
+            job_id: Owning job
+            request_count: Requests in the shard
+            file_mapping: custom_id -> (pdf_name, page_num, temp_dir)
+            batch_file: Local JSONL input file, while it is kept
+            estimated_tokens: Estimated input tokens
+            status: Initial shard status
+            batch_id: Batch ID if the shard is already submitted
+
+        Returns:
+            int: Shard sequence number within the job (starts from 1)
+        """
+        now = time.time()
+        with self._lock:
+            seq = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM shards WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO shards (job_id, seq, batch_id, batch_file,"
+                " request_count, estimated_tokens, status, submitted_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    seq,
+                    batch_id,
+                    str(batch_file) if batch_file else None,
+                    request_count,
+                    estimated_tokens,
+                    status,
+                    now if batch_id else None,
+                    now,
+                ),
+            )
+            # Pages already in the job (resubmitted ones) move to the new
+            # shard and are not counted again
+            before = self._page_count(job_id)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (job_id, custom_id, shard_seq,"
+                " document, page_num, temp_dir, status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (job_id, custom_id, seq, page[0], page[1], page[2], PAGE_QUEUED)
+                    for custom_id, page in file_mapping.items()
+                ),
+            )
+            self._conn.execute(
+                "UPDATE jobs SET total_requests = total_requests + ?, updated_at = ?"
+                " WHERE job_id = ?",
+                (
+                    request_count
+                    - len(file_mapping)
+                    + self._page_count(job_id)
+                    - before,
+                    now,
+                    job_id,
+                ),
+            )
+            self._conn.commit()
+        return seq
+
+    def _page_count(self, job_id):
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM pages WHERE job_id = ?", (job_id,)
+        ).fetchone()[0]
+
+    def shards(self, job_id):
+        """
+        Shards of a job in submission order
+
+        Returns:
+            list: Shard rows as dicts
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM shards WHERE job_id = ? ORDER BY seq", (job_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def update_shard(self, job_id, seq, **fields):
+        """Set shard columns (status, batch_id, batch_file, ...)"""
+        unknown = set(fields) - set(_SHARD_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown shard fields: {sorted(unknown)}")
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE shards SET {assignments} WHERE job_id = ? AND seq = ?",
+                (*fields.values(), job_id, seq),
+            )
+            self._conn.commit()
+
+    def batch_ids(self, job_id):
+        """Batch IDs of a job's submitted shards, in order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT batch_id FROM shards WHERE job_id = ? AND batch_id IS NOT NULL"
+                " ORDER BY seq",
+                (job_id,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def record_batch(self, batch):
+        """
+        Store the last seen status and file IDs of a Batch API batch
+
+        The completion time of a completed batch is kept as turnaround
+        history (see batch_turnarounds).
+
+        Args:
+            batch: Batch object from batches.retrieve
+
+        Returns:
+            str: Job ID owning the batch, or None if it is not tracked
+        """
+        now = time.time()
+        completed_at = None
+        if batch.status == "completed":
+            completed_at = getattr(batch, "completed_at", None) or now
+        with self._lock:
+            self._conn.execute(
+                "UPDATE shards SET batch_status = ?, output_file_id = ?, error_file_id = ?,"
+                " completed_at = COALESCE(completed_at, ?), updated_at = ?"
+                " WHERE batch_id = ?",
+                (
+                    batch.status,
+                    getattr(batch, "output_file_id", None),
+                    getattr(batch, "error_file_id", None),
+                    completed_at,
+                    now,
+                    batch.id,
+                ),
+            )
+            self._conn.commit()
+        return self.job_for_batch(batch.id)
+
+    def batch_turnarounds(self, limit=20):
+        """
+        Submission-to-completion times of the most recently completed batches
+
+        Args:
+            limit: Batches to include
+
+        Returns:
+            list: Turnaround of each batch in seconds, most recent first
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT completed_at - submitted_at FROM shards"
+                " WHERE completed_at IS NOT NULL AND submitted_at IS NOT NULL"
+                " ORDER BY completed_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [max(row[0], 0) for row in rows]
+
+    def record_rate_limits(self, model, rate_limits):
+        """
+        Keep the synchronous rate limits last reported for a model
+
+        Args:
+            model: Model the limits apply to
+            rate_limits: See LLMClient.parse_rate_limits; older readings than
+                the stored one are ignored
+        """
+        if not rate_limits:
+            return
+        checked_at = rate_limits.get("checked_at") or time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO rate_limits (model, limits, checked_at) VALUES (?, ?, ?)"
+                " ON CONFLICT (model) DO UPDATE SET limits = excluded.limits,"
+                " checked_at = excluded.checked_at"
+                " WHERE excluded.checked_at >= rate_limits.checked_at",
+                (model, json.dumps(rate_limits), checked_at),
+            )
+            self._conn.commit()
+
+    def rate_limits(self, model):
+        """
+        Synchronous rate limits last recorded for a model
+
+        Returns:
+            dict: See LLMClient.parse_rate_limits; empty if none were recorded
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT limits FROM rate_limits WHERE model = ?", (model,)
+            ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def job_for_batch(self, batch_id):
+        """Job ID owning a Batch API batch, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id FROM shards WHERE batch_id = ?", (batch_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    # -- pages ----------------------------------------------------------------
+
+    def file_mapping(self, job_id, shard_seq=None, status=None):
+        """
+        Pages of a job (or one of its shards), optionally only those in a status
+
+        Returns:
+            dict: custom_id -> (pdf_name, page_num, temp_dir)
+        """
+        query = (
+            "SELECT custom_id, document, page_num, temp_dir FROM pages WHERE job_id = ?"
+        )
+        params = [job_id]
+        if shard_seq is not None:
+            query += " AND shard_seq = ?"
+            params.append(shard_seq)
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return {row[0]: (row[1], row[2], row[3]) for row in rows}
+
+    def mark_pages(self, job_id, custom_ids, status):
+        """Set the status of pages by custom_id (a done page stays done)"""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE pages SET status = ? WHERE job_id = ? AND custom_id = ?"
+                f" AND status != '{PAGE_DONE}'",
+                ((status, job_id, custom_id) for custom_id in custom_ids),
+            )
+            self._conn.commit()
+
+    def missing_pages(self, job_id, document=None):
+        """
+        Pages without a successful result
+
+        Args:
+            job_id: Job to query
+            document: Restrict to one document
+
+        Returns:
+            list: (custom_id, document, page_num, status) in document/page order
+        """
+        query = (
+            "SELECT custom_id, document, page_num, status FROM pages"
+            " WHERE job_id = ? AND status != ?"
+        )
+        params = [job_id, PAGE_DONE]
+        if document is not None:
+            query += " AND document = ?"
+            params.append(document)
+        query += " ORDER BY document, page_num"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [tuple(row) for row in rows]
+
+    def unresolved_shards(self, job_id):
+        """
+        Shards owning pages that have no result yet
+
+        Returns:
+            set: Shard sequence numbers
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT shard_seq FROM pages WHERE job_id = ? AND status = ?",
+                (job_id, PAGE_QUEUED),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def page_counts(self, job_id):
+        """
+        Page counts of a job by status
+
+        Returns:
+            dict: status -> count
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM pages WHERE job_id = ? GROUP BY status",
+                (job_id,),
+            ).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    # -- legacy ---------------------------------------------------------------
+
+    def import_legacy(self, temp_batch_dir):
+        """
+        Import batch_info_<id>.json files written by earlier versions
+
+        Imported files are renamed to *.json.imported so they are read once.
+
+        Returns:
+            int: Number of jobs imported
+        """
+        imported = 0
+        for info_file in sorted(Path(temp_batch_dir).glob("batch_info_*.json")):
+            try:
+                with open(info_file, encoding="utf-8") as f:
+                    info = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+
+            job_id = info_file.name[len("batch_info_") : -len(".json")]
+            if self.get_job(job_id) is None:
+                self._import_info(job_id, info)
+                imported += 1
+            os.replace(info_file, str(info_file) + ".imported")
+        return imported
+
+    def _import_info(self, job_id, info):
+        file_mapping = info.get("file_mapping", {})
+        if not info.get("is_chunked"):
+            self.create_job(job_id, "single", status="submitted")
+            self.add_shard(
+                job_id,
+                len(file_mapping),
+                file_mapping,
+                status="submitted",
+                batch_id=info.get("batch_id", job_id),
+            )
+            return
+
+        self.create_job(
+            job_id,
+            "chunked",
+            status="submitted",
+            token_limit=info.get("token_limit", 0),
+        )
+        chunks = info.get("chunks") or [
+            {"batch_id": batch_id, "status": "submitted"}
+            for batch_id in info.get("chunk_batch_ids", [])
+        ]
+        # Older master files keep one mapping for all chunks
+        for index, chunk in enumerate(chunks):
+            self.add_shard(
+                job_id,
+                chunk.get("request_count", 0),
+                file_mapping if index == 0 else {},
+                batch_file=chunk.get("batch_file"),
+                estimated_tokens=chunk.get("estimated_tokens", 0),
+                status=chunk.get("status", "submitted"),
+                batch_id=chunk.get("batch_id"),
+            )
+        self.update_job(job_id, total_requests=info.get("total_requests", 0))
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+def get_job_store(path, legacy_dir=None):
+    """
+    Get the process-wide JobStore for a database path
+
+    Args:
+        path: SQLite database file
+        legacy_dir: Directory whose batch_info_*.json files are imported on
+            first use
+
+    Returns:
+        JobStore: Shared, thread-safe store
+    """
+    path = os.path.abspath(str(path))
+    with _shared_lock:
+        store = _shared_stores.get(path)
+        if store is None:
+            store = JobStore(path)
+            if legacy_dir and os.path.isdir(str(legacy_dir)):
+                store.import_legacy(legacy_dir)
+            _shared_stores[path] = store
+        return store
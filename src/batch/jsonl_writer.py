@@ -0,0 +1,276 @@
+"""
+Batch JSONL Writer - Streaming serializer for Batch API request files
+
+Enterprise Enhancement for PDFtoMD
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+
+Every request in a batch file shares the same envelope (model, prompts,
+sampling parameters) and differs only in its custom_id and page image. The
+envelope is serialized once into a template, and each page's image bytes are
+base64-encoded in fixed-size chunks straight into the output file, so no
+per-page base64 string or request dict is ever built.
+"""
+
+import base64
+import json
+import os
+
+# Placeholders substituted into the pre-serialized envelope
+_CUSTOM_ID = "__BATCH_CUSTOM_ID__"
+_IMAGE_DATA = "__BATCH_IMAGE_DATA__"
+
+# Raw bytes encoded per write; a multiple of 3 so chunks concatenate into
+# valid base64 without padding in the middle
+CHUNK_SIZE = 3 * 64 * 1024
+
+
+def build_request(
+    custom_id,
+    image_url,
+    model,
+    system_prompt,
+    user_prompt,
+    temperature,
+    max_tokens,
+):
+    """Build one chat completion batch request dict"""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": user_prompt},
+                        {"type": "image_url", "image_url": {"url": image_url}},
+                    ],
+                },
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        },
+    }
+
+
+class RequestTemplate:
+    """Pre-serialized request envelope split around custom_id and image data"""
+
+    def __init__(
+        self,
+        model,
+        system_prompt,
+        user_prompt,
+        temperature,
+        max_tokens,
+        mime_type="image/jpeg",
+    ):
+        envelope = json.dumps(
+            build_request(
+                _CUSTOM_ID,
+                f"data:{mime_type};base64,{_IMAGE_DATA}",
+                model,
+                system_prompt,
+                user_prompt,
+                temperature,
+                max_tokens,
+            )
+        )
+        quoted_id = json.dumps(_CUSTOM_ID)
+        if envelope.count(quoted_id) != 1 or envelope.count(_IMAGE_DATA) != 1:
+            raise ValueError("Prompts must not contain batch template placeholders")
+
+        head, rest = envelope.split(quoted_id)
+        middle, tail = rest.split(_IMAGE_DATA)
+        self.head = head.encode("utf-8")
+        self.middle = middle.encode("utf-8")
+        self.tail = (tail + "\n").encode("utf-8")
+
+    def request_size(self, custom_id, image_length):
+        """Bytes one request line takes, without serializing it
+
+        Args:
+            custom_id: Request ID
+            image_length: Length of the raw (not yet base64-encoded) image
+
+        Returns:
+            int: Size of the JSONL line including its newline
+        """
+        return (
+            len(self.head)
+            + len(json.dumps(custom_id).encode("utf-8"))
+            + len(self.middle)
+            + 4 * ((image_length + 2) // 3)
+            + len(self.tail)
+        )
+
+
+class JsonlRequestWriter:
+    """Write batch requests to a binary file handle, one JSON line each"""
+
+    def __init__(self, handle, template, chunk_size=CHUNK_SIZE):
+        """
+        Args:
+            handle: File object opened in binary write mode
+            template: RequestTemplate shared by every request
+            chunk_size: Raw image bytes encoded per write (multiple of 3)
+        """
+        if chunk_size <= 0 or chunk_size % 3:
+            raise ValueError("chunk_size must be a positive multiple of 3")
+        self.handle = handle
+        self.template = template
+        self.chunk_size = chunk_size
+        self.bytes_written = 0
+        self.requests_written = 0
+
+    def write(self, custom_id, image):
+        """Write one request line, base64-encoding the image in chunks
+
+        Args:
+            custom_id: Request ID echoed back in the batch results
+            image: Encoded image bytes
+
+        Returns:
+            int: Bytes written for this request
+        """
+        parts = (
+            self.template.head,
+            json.dumps(custom_id).encode("utf-8"),
+            self.template.middle,
+        )
+        written = 0
+        for part in parts:
+            self.handle.write(part)
+            written += len(part)
+
+        view = memoryview(image)
+        for offset in range(0, len(view), self.chunk_size):
+            encoded = base64.b64encode(view[offset : offset + self.chunk_size])
+            self.handle.write(encoded)
+            written += len(encoded)
+
+        self.handle.write(self.template.tail)
+        written += len(self.template.tail)
+        self.bytes_written += written
+        self.requests_written += 1
+        return written
+
+
+class ShardedRequestWriter:
+    """Spread batch requests over numbered JSONL files within per-file limits
+
+    A new shard is started whenever the next request would push the current
+    one past max_bytes, max_requests or max_tokens. Each finished shard is
+    handed to on_shard(path, index, request_count) as soon as it is closed, so
+    it can be uploaded while later shards are still being written.
+    """
+
+    def __init__(
+        self,
+        base_path,
+        template,
+        max_bytes=0,
+        max_requests=0,
+        on_shard=None,
+        chunk_size=CHUNK_SIZE,
+        max_tokens=0,
+    ):
+        """
+        Args:
+            base_path: Path of the batch file; shards are written next to it
+                as <stem>_part001.jsonl, <stem>_part002.jsonl, ...
+            template: RequestTemplate shared by every request
+            max_bytes: Maximum shard file size (0 = no limit)
+            max_requests: Maximum requests per shard (0 = no limit)
+            on_shard: Called with (path, index, request_count) per closed shard
+            chunk_size: Raw image bytes encoded per write (multiple of 3)
+            max_tokens: Maximum estimated input tokens per shard (0 = no limit)
+        """
+        self.base_path = str(base_path)
+        self.template = template
+        self.max_bytes = max_bytes
+        self.max_requests = max_requests
+        self.on_shard = on_shard
+        self.chunk_size = chunk_size
+        self.max_tokens = max_tokens
+        self.shards = []  # (path, request_count, bytes) per closed shard
+        self.requests_written = 0
+        self.path = None
+        self._handle = None
+        self._writer = None
+        self._shard_tokens = 0
+
+    def shard_path(self, index):
+        """Path of the shard with the given index (starts from 1)"""
+        stem, ext = os.path.splitext(self.base_path)
+        return f"{stem}_part{index:03d}{ext or '.jsonl'}"
+
+    def write(self, custom_id, image, tokens=0):
+        """Write one request, starting a new shard first if it would not fit
+
+        Args:
+            custom_id: Request ID
+            image: Encoded page image
+            tokens: Estimated input tokens of the request (for max_tokens)
+
+        Returns:
+            int: Index of the shard the request was written to (starts from 1)
+        """
+        size = self.template.request_size(custom_id, len(image))
+        if self.max_bytes and size > self.max_bytes:
+            raise ValueError(
+                f"Request {custom_id} is {size} bytes, "
+                f"larger than the {self.max_bytes} byte shard limit"
+            )
+
+        writer = self._writer
+        if writer is not None and (
+            (self.max_bytes and writer.bytes_written + size > self.max_bytes)
+            or (self.max_requests and writer.requests_written >= self.max_requests)
+            or (self.max_tokens and self._shard_tokens + tokens > self.max_tokens)
+        ):
+            self._close_shard()
+        if self._writer is None:
+            self._open_shard()
+
+        self._writer.write(custom_id, image)
+        self._shard_tokens += tokens
+        self.requests_written += 1
+        return len(self.shards) + 1
+
+    def close(self):
+        """Close the last shard (if any requests were written to it)"""
+        if self._writer is not None:
+            self._close_shard()
+
+    def _open_shard(self):
+        self.path = self.shard_path(len(self.shards) + 1)
+        self._handle = open(self.path, "wb")
+        self._writer = JsonlRequestWriter(self._handle, self.template, self.chunk_size)
+        self._shard_tokens = 0
+
+    def _close_shard(self):
+        self._handle.close()
+        writer = self._writer
+        self._handle = None
+        self._writer = None
+        self.shards.append((self.path, writer.requests_written, writer.bytes_written))
+        if self.on_shard:
+            self.on_shard(self.path, len(self.shards), writer.requests_written)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._handle is not None:
+            # Leave a failed run's partial shard closed but unsubmitted
+            self._handle.close()
+            self._handle = None
+            self._writer = None
+        return False
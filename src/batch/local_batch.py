@@ -0,0 +1,506 @@
+"""
+Local Batch - Batch API emulation for servers without files and batches
+
+Enterprise Enhancement for PDFtoMD
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+
+LM Studio and other local OpenAI-compatible servers implement
+/v1/chat/completions but not /v1/files or /v1/batches, so the batch workflow
+could not run against them, nor be tested or benchmarked offline.
+LocalBatchClient stands in for the OpenAI client in BatchPDFConverter
+(BATCH_BACKEND=local): uploaded files are kept on disk, and a submitted batch
+runs its requests against the server's chat completions endpoint with bounded
+concurrency. Results are written as output and error JSONL files shaped like
+OpenAI's, and batches report the same statuses, request counts and file IDs,
+so submission, polling and retrieval work unchanged.
+
+Files and batch records live in a storage directory, so another process can
+check and retrieve a batch. A batch runs in the process that submitted it,
+which should join() its batches before exiting (the batch_api.py commands
+do); if that process stops first, the next process to check the batch
+resumes it with the requests that have no result yet. Missing files and
+batches raise openai.NotFoundError like the API does.
+"""
+
+import json
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import openai
+from openai.types import Batch, FileObject
+
+try:
+    from .job_store import FINAL_STATUSES
+except ImportError:
+    from batch.job_store import FINAL_STATUSES
+
+# Seconds between liveness updates of a running batch
+HEARTBEAT_INTERVAL = 10
+
+# A batch whose runner has not updated it for this long is resumed (seconds)
+HEARTBEAT_TIMEOUT = 60
+
+
+class LocalNotFoundError(openai.NotFoundError):
+    """openai.NotFoundError for a file or batch missing from local storage"""
+
+    def __init__(self, message):
+        # No HTTP exchange took place, so there is no request or response
+        openai.APIError.__init__(self, message, None, body=None)
+        self.response = None
+        self.status_code = 404
+        self.request_id = None
+
+
+class LocalBatchClient:
+    """OpenAI client stand-in that runs batches locally via chat completions"""
+
+    def __init__(self, client, storage_dir, concurrency=4):
+        """
+        Args:
+            client: OpenAI client for the server's chat completions endpoint
+            storage_dir: Directory for uploaded files, results and batch records
+            concurrency: Requests of one batch in flight at once
+        """
+        self.client = client
+        self.chat = client.chat
+        self.models = client.models
+        self.files = LocalFiles(Path(storage_dir) / "files")
+        self.batches = LocalBatches(
+            client, self.files, Path(storage_dir) / "batches", concurrency
+        )
+
+
+class FileContent:
+    """Content of a stored file, like the response of files.content"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    @property
+    def content(self):
+        return self.path.read_bytes()
+
+    @property
+    def text(self):
+        return self.path.read_text(encoding="utf-8")
+
+    def read(self):
+        return self.content
+
+    def iter_lines(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                yield line.rstrip("\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class LocalFiles:
+    """Local counterpart of client.files"""
+
+    def __init__(self, files_dir):
+        self.files_dir = Path(files_dir)
+        self.files_dir.mkdir(parents=True, exist_ok=True)
+        # files.with_streaming_response.content(...) as used for large outputs
+        self.with_streaming_response = self
+
+    def path(self, file_id):
+        """Path of a file's data"""
+        return self.files_dir / f"{file_id}.jsonl"
+
+    def create(self, file, purpose):
+        """Store an uploaded file (file object, path, bytes or (name, bytes))"""
+        if isinstance(file, tuple):
+            filename, data = file[0] or "upload.jsonl", file[1]
+        elif isinstance(file, (bytes, bytearray)):
+            data, filename = bytes(file), "upload.jsonl"
+        elif isinstance(file, (str, Path)):
+            data, filename = Path(file).read_bytes(), Path(file).name
+        else:
+            data, filename = file.read(), Path(getattr(file, "name", "upload")).name
+
+        file_id = new_id("file-local-")
+        self.path(file_id).write_bytes(data)
+        return self.register(file_id, filename, purpose)
+
+    def register(self, file_id, filename, purpose):
+        """Record the metadata of data already stored under a file ID"""
+        file_object = FileObject(
+            id=file_id,
+            bytes=self.path(file_id).stat().st_size,
+            created_at=int(time.time()),
+            filename=filename,
+            object="file",
+            purpose=purpose,
+            status="processed",
+        )
+        _write_json(self.files_dir / f"{file_id}.json", file_object.model_dump())
+        return file_object
+
+    def retrieve(self, file_id):
+        """Metadata of a stored file"""
+        return FileObject.model_validate(
+            _read_json(self.files_dir / f"{file_id}.json", f"No such file: {file_id}")
+        )
+
+    def content(self, file_id):
+        """Data of a stored file"""
+        self.retrieve(file_id)
+        return FileContent(self.path(file_id))
+
+    def delete(self, file_id):
+        """Remove a stored file"""
+        self.retrieve(file_id)
+        self.path(file_id).unlink(missing_ok=True)
+        (self.files_dir / f"{file_id}.json").unlink(missing_ok=True)
+        return {"id": file_id, "object": "file", "deleted": True}
+
+
+class LocalBatches:
+    """Local counterpart of client.batches"""
+
+    def __init__(self, client, files, batches_dir, concurrency=4):
+        self.client = client
+        self.files = files
+        self.batches_dir = Path(batches_dir)
+        self.batches_dir.mkdir(parents=True, exist_ok=True)
+        self.concurrency = max(1, concurrency)
+        self._lock = threading.RLock()
+        self._runners = {}
+
+    def create(self, input_file_id, endpoint, completion_window, metadata=None):
+        """Submit a batch; its requests start running in the background"""
+        self.files.retrieve(input_file_id)
+        now = int(time.time())
+        record = {
+            "batch": {
+                "id": new_id("batch_local_"),
+                "object": "batch",
+                "endpoint": endpoint,
+                "input_file_id": input_file_id,
+                "completion_window": completion_window,
+                "status": "validating",
+                "created_at": now,
+                "expires_at": now + 24 * 3600,
+                "metadata": metadata,
+                "request_counts": {"completed": 0, "failed": 0, "total": 0},
+            },
+            # Results are appended here and published when the batch ends
+            "output_file_id": new_id("file-local-"),
+            "error_file_id": new_id("file-local-"),
+            "heartbeat": time.time(),
+        }
+        batch_id = record["batch"]["id"]
+        with self._lock:
+            self._save(record)
+            self._start(batch_id)
+        return Batch.model_validate(record["batch"])
+
+    def retrieve(self, batch_id):
+        """Current state of a batch, resuming it if its runner is gone"""
+        with self._lock:
+            record = self._load(batch_id)
+            if record["batch"]["status"] not in FINAL_STATUSES and self._orphaned(
+                record
+            ):
+                self._start(batch_id)
+        return Batch.model_validate(record["batch"])
+
+    def cancel(self, batch_id):
+        """Stop starting new requests; the batch ends as cancelled"""
+        with self._lock:
+            record = self._load(batch_id)
+            if record["batch"]["status"] not in FINAL_STATUSES:
+                record["batch"]["status"] = "cancelling"
+                record["batch"]["cancelling_at"] = int(time.time())
+                self._save(record)
+                if self._orphaned(record):
+                    self._finish(batch_id)
+        return self.retrieve(batch_id)
+
+    def wait(self, batch_id, timeout=None):
+        """Block until this process's runner of a batch is done"""
+        runner = self._runners.get(batch_id)
+        if runner is not None:
+            runner.join(timeout)
+        return self.retrieve(batch_id)
+
+    def running(self):
+        """IDs of the batches running in this process"""
+        with self._lock:
+            return list(self._runners)
+
+    def join(self):
+        """Block until every batch running in this process has finished
+
+        Runners are daemon threads, so a process that exits without joining
+        leaves its batches to be resumed by a later status check.
+        """
+        while True:
+            with self._lock:
+                runners = list(self._runners.values())
+            if not runners:
+                return
+            for runner in runners:
+                runner.join()
+
+    # -- execution ------------------------------------------------------------
+
+    def _orphaned(self, record):
+        """True if no process is running a batch"""
+        return (
+            record["batch"]["id"] not in self._runners
+            and time.time() - record.get("heartbeat", 0) > HEARTBEAT_TIMEOUT
+        )
+
+    def _start(self, batch_id):
+        runner = threading.Thread(
+            target=self._run,
+            args=(batch_id,),
+            name=f"local-batch-{batch_id}",
+            daemon=True,
+        )
+        self._runners[batch_id] = runner
+        runner.start()
+
+    def _run(self, batch_id):
+        try:
+            with self._lock:
+                record = self._load(batch_id)
+                try:
+                    requests, errors = self._read_requests(record["batch"])
+                except (OSError, UnicodeDecodeError) as e:
+                    requests, errors = [], [_line_error("invalid_file", str(e), None)]
+                if errors:
+                    self._finish(batch_id, errors=errors)
+                    return
+
+                # Results already written by an earlier runner are kept
+                done = {}
+                for key in ("output_file_id", "error_file_id"):
+                    done[key] = _result_ids(self.files.path(record[key]))
+                batch = record["batch"]
+                if batch["status"] == "validating":
+                    batch["status"] = "in_progress"
+                    batch["in_progress_at"] = int(time.time())
+                batch["request_counts"] = {
+                    "completed": len(done["output_file_id"]),
+                    "failed": len(done["error_file_id"]),
+                    "total": len(requests),
+                }
+                record["heartbeat"] = time.time()
+                self._save(record)
+
+            finished = done["output_file_id"] | done["error_file_id"]
+            pending = iter([r for r in requests if r["custom_id"] not in finished])
+            pending_lock = threading.Lock()
+
+            def work():
+                while not self._cancelling(batch_id):
+                    with pending_lock:
+                        request = next(pending, None)
+                    if request is None:
+                        return
+                    self._record_result(batch_id, *self._execute(request))
+
+            workers = [
+                threading.Thread(target=work, daemon=True)
+                for _ in range(min(self.concurrency, max(len(requests), 1)))
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                while worker.is_alive():
+                    worker.join(HEARTBEAT_INTERVAL)
+                    self._touch(batch_id)
+
+            with self._lock:
+                self._finish(batch_id)
+        finally:
+            with self._lock:
+                self._runners.pop(batch_id, None)
+
+    def _read_requests(self, batch):
+        """Parse and validate the input file like the Batch API does"""
+        requests = []
+        errors = []
+        seen = set()
+        for line_number, line in enumerate(
+            self.files.content(batch["input_file_id"]).iter_lines(), 1
+        ):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                errors.append(_line_error("invalid_json_line", str(e), line_number))
+                continue
+            custom_id = request.get("custom_id")
+            if not isinstance(custom_id, str):
+                errors.append(
+                    _line_error("missing_required_parameter", "custom_id", line_number)
+                )
+            elif custom_id in seen:
+                errors.append(
+                    _line_error(
+                        "duplicate_custom_id",
+                        f"Duplicate custom_id: {custom_id}",
+                        line_number,
+                    )
+                )
+            elif request.get("url") != batch["endpoint"]:
+                errors.append(
+                    _line_error(
+                        "invalid_url",
+                        f"Request URL must be {batch['endpoint']}",
+                        line_number,
+                    )
+                )
+            elif not isinstance(request.get("body"), dict):
+                errors.append(
+                    _line_error("missing_required_parameter", "body", line_number)
+                )
+            else:
+                seen.add(custom_id)
+                requests.append(request)
+        if not requests and not errors:
+            errors.append(_line_error("empty_file", "The input file is empty", None))
+        return requests, errors
+
+    def _execute(self, request):
+        """Run one request; returns (output line, succeeded)"""
+        line = {
+            "id": new_id("batch_req_"),
+            "custom_id": request["custom_id"],
+            "response": None,
+            "error": None,
+        }
+        try:
+            response = self.client.chat.completions.with_raw_response.create(
+                **request["body"]
+            )
+            line["response"] = {
+                "status_code": response.status_code,
+                "request_id": response.headers.get("x-request-id") or line["id"],
+                "body": json.loads(response.text),
+            }
+            return line, response.status_code < 400
+        except openai.APIStatusError as e:
+            line["response"] = {
+                "status_code": e.status_code,
+                "request_id": e.request_id or line["id"],
+                "body": {"error": e.body if isinstance(e.body, dict) else str(e)},
+            }
+        except (openai.APIError, ValueError) as e:
+            line["error"] = {"code": type(e).__name__, "message": str(e)}
+        return line, False
+
+    def _record_result(self, batch_id, line, succeeded):
+        with self._lock:
+            record = self._load(batch_id)
+            key = "output_file_id" if succeeded else "error_file_id"
+            with open(self.files.path(record[key]), "a", encoding="utf-8") as f:
+                f.write(json.dumps(line) + "\n")
+            counts = record["batch"]["request_counts"]
+            counts["completed" if succeeded else "failed"] += 1
+            record["heartbeat"] = time.time()
+            self._save(record)
+
+    def _cancelling(self, batch_id):
+        with self._lock:
+            return self._load(batch_id)["batch"]["status"] == "cancelling"
+
+    def _touch(self, batch_id):
+        with self._lock:
+            record = self._load(batch_id)
+            record["heartbeat"] = time.time()
+            self._save(record)
+
+    def _finish(self, batch_id, errors=None):
+        """Publish a batch's result files and give it its final status"""
+        record = self._load(batch_id)
+        batch = record["batch"]
+        now = int(time.time())
+        if errors:
+            batch["status"] = "failed"
+            batch["failed_at"] = now
+            batch["errors"] = {"object": "list", "data": errors}
+            self._save(record)
+            return
+
+        cancelled = batch["status"] == "cancelling"
+        batch["status"] = "finalizing"
+        batch["finalizing_at"] = now
+        self._save(record)
+
+        for key in ("output_file_id", "error_file_id"):
+            path = self.files.path(record[key])
+            if path.exists() and path.stat().st_size:
+                self.files.register(record[key], path.name, "batch_output")
+                batch[key] = record[key]
+        if cancelled:
+            batch["status"] = "cancelled"
+            batch["cancelled_at"] = now
+        else:
+            batch["status"] = "completed"
+            batch["completed_at"] = now
+        self._save(record)
+
+    # -- records --------------------------------------------------------------
+
+    def _load(self, batch_id):
+        return _read_json(
+            self.batches_dir / f"{batch_id}.json", f"No such batch: {batch_id}"
+        )
+
+    def _save(self, record):
+        _write_json(self.batches_dir / f"{record['batch']['id']}.json", record)
+
+
+def new_id(prefix):
+    """A unique ID with an OpenAI-style prefix"""
+    return prefix + uuid.uuid4().hex[:24]
+
+
+def _line_error(code, message, line):
+    return {"code": code, "message": message, "line": line, "param": None}
+
+
+def _result_ids(path):
+    """custom_ids already in a results file, dropping a torn last line"""
+    try:
+        data = Path(path).read_bytes()
+    except FileNotFoundError:
+        return set()
+    complete = data.rfind(b"\n") + 1
+    if complete < len(data):
+        with open(path, "r+b") as f:
+            f.truncate(complete)
+    return {
+        json.loads(line)["custom_id"]
+        for line in data[:complete].splitlines()
+        if line.strip()
+    }
+
+
+def _read_json(path, missing_message):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise LocalNotFoundError(missing_message) from None
+
+
+def _write_json(path, data):
+    tmp_file = path.with_name(path.name + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    tmp_file.replace(path)
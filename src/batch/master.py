@@ -20,12 +20,22 @@ import importlib.util
 import json
 import os
 import shutil
-import subprocess
 import sys
 import time
 from pathlib import Path
 
-from openai import OpenAI
+# Handle imports whether running as module or script
+try:
+    from .batch_service import BatchService
+    from .job_store import FINAL_STATUSES, PAGE_DONE, PAGE_FAILED, get_job_store
+    from .result_spool import page_from_custom_id, parse_result_line
+    from .usage_stats import UsageAggregator, load_usage_stats, usage_stats_file
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from batch.batch_service import BatchService
+    from batch.job_store import FINAL_STATUSES, PAGE_DONE, PAGE_FAILED, get_job_store
+    from batch.result_spool import page_from_custom_id, parse_result_line
+    from batch.usage_stats import UsageAggregator, load_usage_stats, usage_stats_file
 
 # Import config using relative path
 current_dir = Path(__file__).parent
@@ -46,9 +56,8 @@ else:
 
 class PDFBatchMaster:
     def __init__(self):
-        self.client = OpenAI(
-            api_key=config.OPENAI_API_KEY, base_url=config.OPENAI_API_BASE
-        )
+        self.service = BatchService(on_transition=self._report_transition)
+        self.client = self.service.client
         self.model = config.OPENAI_DEFAULT_MODEL
 
     def print_status(self, message, level="INFO"):
@@ -64,43 +73,30 @@ class PDFBatchMaster:
         symbol = symbols.get(level, "📋")
         print(f"{symbol} [{timestamp}] {message}")
 
+    def _report_transition(self, batch_id, previous_status, batch):
+        """Announce batch status changes seen while polling"""
+        if previous_status:
+            self.print_status(
+                f"Batch {batch_id}: {previous_status} → {batch.status}", "PROGRESS"
+            )
+
     def submit_new_batch(self):
         """Submit a new batch for processing"""
         self.print_status("Starting new batch submission", "PROGRESS")
 
         try:
-            result = subprocess.run(
-                [sys.executable, "batch_api.py", "submit"],
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                errors="replace",
-                check=False,
-            )
-
-            if result.returncode == 0:
-                # Extract batch ID from output
-                lines = result.stdout.split("\n")
-                batch_id = None
-                for line in lines:
-                    if "Batch ID:" in line:
-                        batch_id = line.split("Batch ID:")[-1].strip()
-                        break
+            result = self.service.submit()
+            batch_id = result["batch_id"]
 
-                if batch_id:
-                    self.print_status(
-                        f"Batch submitted successfully: {batch_id}", "SUCCESS"
-                    )
-                    return batch_id
-                else:
-                    self.print_status(
-                        "Could not extract batch ID from output", "WARNING"
-                    )
-                    print(result.stdout)
-                    return None
+            if batch_id:
+                self.print_status(
+                    f"Batch submitted successfully: {batch_id} "
+                    f"({result['request_count']} requests)",
+                    "SUCCESS",
+                )
+                return batch_id
             else:
                 self.print_status("Failed to submit batch", "ERROR")
-                print(result.stderr)
                 return None
 
         except Exception as e:  # pylint: disable=broad-except
@@ -109,79 +105,27 @@ class PDFBatchMaster:
 
     def check_batch_status(self, batch_id):
         """Check batch status and return parsed info (handles both single and chunked batches)"""
-        # Check if this is a chunked batch
-        if batch_id.startswith("chunked_"):
-            # Delegate to batch_api for chunked batch handling
-            try:
-                from src.batch.batch_api import BatchPDFConverter
-
-                converter = BatchPDFConverter()
-                result = converter.check_batch_status(batch_id)
-
-                if isinstance(result, dict) and "master_batch_id" in result:
-                    # Convert chunked result to master.py format
-                    return {
-                        "id": batch_id,
-                        "status": "completed"
-                        if result.get("all_completed", False)
-                        else "failed"
-                        if result.get("any_failed", False)
-                        else "in_progress",
-                        "completed": result.get("completed_requests", 0),
-                        "failed": 0,  # Individual chunk failures don't map directly
-                        "total": result.get("total_requests", 0),
-                        "created_at": None,
-                        "completed_at": None,
-                        "failed_at": None,
-                        "usage": {},
-                        "chunked": True,
-                        "chunk_details": result,
-                    }
-                else:
-                    return None
-            except Exception as e:
-                self.print_status(
-                    f"Error checking chunked batch {batch_id}: {e}", "ERROR"
-                )
-                return None
-
-        # Handle regular batch IDs
         try:
-            batch = self.client.batches.retrieve(batch_id)
-
-            # Extract usage statistics if available
-            usage_info = {}
-            if hasattr(batch, "request_counts") and batch.request_counts:
-                if (
-                    hasattr(batch.request_counts, "completed")
-                    and batch.request_counts.completed > 0
-                ):
-                    # Try to get usage data from metadata or other fields
-                    if hasattr(batch, "metadata") and batch.metadata:
-                        usage_info = batch.metadata
-
-            return {
-                "id": batch_id,
-                "status": batch.status,
-                "completed": batch.request_counts.completed
-                if batch.request_counts
-                else 0,
-                "failed": batch.request_counts.failed if batch.request_counts else 0,
-                "total": batch.request_counts.total if batch.request_counts else 0,
-                "created_at": batch.created_at,
-                "completed_at": batch.completed_at,
-                "failed_at": batch.failed_at,
-                "usage": usage_info,
-                "chunked": False,
-            }
+            return self.service.status(batch_id)
         except Exception as e:  # pylint: disable=broad-except
             self.print_status(f"Error checking batch {batch_id}: {e}", "ERROR")
             return None
 
     def analyze_batch_usage(self, batch_id):
-        """Analyze batch usage and costs from completed results"""
+        """Analyze batch usage and costs from completed results
+
+        Usage is aggregated while results are retrieved, so this normally
+        just reads the saved totals. Batches retrieved before that was
+        recorded fall back to downloading their output once, and the
+        totals are saved for next time.
+        """
         self.print_status(f"Analyzing usage for batch {batch_id}", "PROGRESS")
 
+        usage_stats = load_usage_stats(config.DEFAULT_METADATA_FOLDER, batch_id)
+        if usage_stats:
+            self.print_status("Using usage recorded at retrieval", "SUCCESS")
+            return usage_stats
+
         try:
             # Get the batch info
             batch = self.client.batches.retrieve(batch_id)
@@ -199,80 +143,33 @@ class PDFBatchMaster:
                 )
                 return None
 
-            # Download and analyze the output file
-            output_response = self.client.files.content(batch.output_file_id)
-            output_content = output_response.content.decode("utf-8")
-
-            total_tokens = 0
-            total_cost = 0.0
-            request_count = 0
-            token_breakdown = {
-                "prompt_tokens": 0,
-                "completion_tokens": 0,
-                "total_tokens": 0,
-            }
-
-            # Parse each line (JSONL format)
-            for line in output_content.strip().split("\n"):
-                if line.strip():
+            # Stream and analyze the output file
+            usage = UsageAggregator(batch_id, config.DEFAULT_METADATA_FOLDER)
+            with self.client.files.with_streaming_response.content(
+                batch.output_file_id
+            ) as response:
+                for line in response.iter_lines():
+                    if not line.strip():
+                        continue
                     try:
-                        result = json.loads(line)
-
-                        # Extract usage from response
-                        if "response" in result and "body" in result["response"]:
-                            response_body = result["response"]["body"]
-                            if "usage" in response_body:
-                                usage = response_body["usage"]
-                                prompt_tokens = usage.get("prompt_tokens", 0)
-                                completion_tokens = usage.get("completion_tokens", 0)
-                                total_request_tokens = usage.get(
-                                    "total_tokens", prompt_tokens + completion_tokens
-                                )
-
-                                token_breakdown["prompt_tokens"] += prompt_tokens
-                                token_breakdown["completion_tokens"] += (
-                                    completion_tokens
-                                )
-                                token_breakdown["total_tokens"] += total_request_tokens
-                                total_tokens += total_request_tokens
-                                request_count += 1
-
-                                # Calculate cost (GPT-4o-mini pricing as of 2024)
-                                # Input: $0.150 per 1M tokens, Output: $0.600 per 1M tokens
-                                input_cost = (prompt_tokens / 1_000_000) * 0.150
-                                output_cost = (completion_tokens / 1_000_000) * 0.600
-                                total_cost += input_cost + output_cost
-
+                        custom_id, content, line_usage = parse_result_line(line)
                     except json.JSONDecodeError:
                         continue
+                    if not custom_id:
+                        continue
+                    try:
+                        pdf_name, page_num = page_from_custom_id(custom_id)
+                    except ValueError:
+                        pdf_name, page_num = custom_id, 0
+                    usage.add(
+                        custom_id,
+                        pdf_name,
+                        page_num,
+                        line_usage if content is not None else None,
+                    )
 
-            # Calculate per-page averages
-            avg_tokens_per_page = (
-                total_tokens / request_count if request_count > 0 else 0
-            )
-            avg_cost_per_page = total_cost / request_count if request_count > 0 else 0
-
-            usage_stats = {
-                "batch_id": batch_id,
-                "total_requests": request_count,
-                "total_tokens": total_tokens,
-                "total_cost": total_cost,
-                "avg_tokens_per_page": avg_tokens_per_page,
-                "avg_cost_per_page": avg_cost_per_page,
-                "token_breakdown": token_breakdown,
-                "cost_breakdown": {
-                    "input_cost": (token_breakdown["prompt_tokens"] / 1_000_000)
-                    * 0.150,
-                    "output_cost": (token_breakdown["completion_tokens"] / 1_000_000)
-                    * 0.600,
-                },
-            }
-
-            # Save usage stats to file
-            usage_file = f"usage_stats_{batch_id}.json"
-            with open(usage_file, "w", encoding="utf-8") as f:
-                json.dump(usage_stats, f, indent=2)
-
+            usage_stats = usage.save()
+            usage_file = usage_stats_file(config.DEFAULT_METADATA_FOLDER, batch_id)
             self.print_status(f"Usage analysis saved to {usage_file}", "SUCCESS")
             return usage_stats
 
@@ -312,60 +209,95 @@ class PDFBatchMaster:
         self.print_status(f"Retrieving results for batch {batch_id}", "PROGRESS")
 
         try:
-            result = subprocess.run(
-                [sys.executable, "batch_api.py", "retrieve", batch_id],
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                errors="replace",
-                check=False,
-            )
+            result = self.service.retrieve(batch_id)
 
-            if result.returncode == 0:
+            if result["retrieved"]:
                 self.print_status("Results retrieved successfully", "SUCCESS")
 
                 # Analyze usage and costs
-                usage_stats = self.analyze_batch_usage(batch_id)
+                usage_stats = result["usage"] or self.analyze_batch_usage(batch_id)
                 if usage_stats:
                     self.print_usage_summary(usage_stats)
 
                 return True
             else:
-                self.print_status(
-                    f"Failed to retrieve results: {result.stderr}", "ERROR"
-                )
+                self.print_status("Failed to retrieve results", "ERROR")
                 return False
 
         except Exception as e:  # pylint: disable=broad-except
             self.print_status(f"Error retrieving results: {e}", "ERROR")
             return False
 
-    def find_active_batches(self):
-        """Find all active batch files"""
-        # Look in the correct temp_batch directory
-        temp_batch_dir = Path(str(config.DEFAULT_TEMP_FOLDER)) / "temp_batch"
-        batch_files = (
-            list(temp_batch_dir.glob("batch_info_*.json"))
-            if temp_batch_dir.exists()
-            else []
+    def get_job_store(self):
+        """Get the shared batch job store"""
+        return get_job_store(
+            config.BATCH_JOB_STORE_PATH,
+            legacy_dir=Path(str(config.DEFAULT_TEMP_FOLDER)) / "temp_batch",
         )
+
+    def find_active_batches(self, due_only=False):
+        """Find all tracked batches with their status
+
+        Batches that finished and were retrieved are reported from the job
+        store; the others are checked with the API concurrently.
+
+        Args:
+            due_only: Only re-check batches whose adaptive polling interval
+                has elapsed
+        """
+        store = self.get_job_store()
         active_batches = []
 
-        for batch_file in batch_files:
-            try:
-                batch_id = batch_file.name.replace("batch_info_", "").replace(
-                    ".json", ""
+        jobs = store.jobs()
+        try:
+            statuses = self.service.statuses(
+                [
+                    job["job_id"]
+                    for job in jobs
+                    if not (job["status"] in FINAL_STATUSES and job["retrieved_at"])
+                ],
+                due_only,
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            self.print_status(f"Error checking batches: {e}", "WARNING")
+            statuses = {}
+
+        for job in jobs:
+            batch_id = job["job_id"]
+            if job["status"] in FINAL_STATUSES and job["retrieved_at"]:
+                pages = store.page_counts(batch_id)
+                active_batches.append(
+                    {
+                        "id": batch_id,
+                        "status": job["status"],
+                        "completed": pages.get(PAGE_DONE, 0),
+                        "failed": pages.get(PAGE_FAILED, 0),
+                        "total": job["total_requests"],
+                        "created_at": job["created_at"],
+                        "completed_at": None,
+                        "failed_at": None,
+                        "usage": {},
+                        "chunked": job["kind"] == "chunked",
+                        "retrieved": True,
+                    }
                 )
-                status_info = self.check_batch_status(batch_id)
-                if status_info:
-                    active_batches.append(status_info)
-            except Exception as e:  # pylint: disable=broad-except
-                self.print_status(f"Error processing {batch_file}: {e}", "WARNING")
+                continue
+
+            status_info = statuses.get(batch_id)
+            if status_info:
+                status_info["retrieved"] = bool(job["retrieved_at"])
+                active_batches.append(status_info)
 
         return active_batches
 
-    def monitor_batches(self, check_interval=30, max_iterations=None):
-        """Monitor all active batches"""
+    def monitor_batches(self, check_interval=None, max_iterations=None):
+        """Monitor all active batches
+
+        Args:
+            check_interval: Seconds between checks (default: adapted per
+                batch to its status and progress)
+            max_iterations: Stop after this many checks (default: no limit)
+        """
         self.print_status("Starting batch monitoring", "INFO")
         iterations = 0
 
@@ -379,7 +311,7 @@ class PDFBatchMaster:
                 f"Check #{iterations} - Monitoring active batches...", "PROGRESS"
             )
 
-            active_batches = self.find_active_batches()
+            active_batches = self.find_active_batches(due_only=check_interval is None)
 
             if not active_batches:
                 self.print_status("No active batches found", "INFO")
@@ -398,7 +330,8 @@ class PDFBatchMaster:
                 )
 
                 if status == "completed":
-                    completed_batches.append(batch_id)
+                    if not batch_info.get("retrieved"):
+                        completed_batches.append(batch_id)
                 elif status == "failed":
                     self.print_status(f"Batch {batch_id} failed!", "ERROR")
                 elif status in ["in_progress", "validating", "finalizing"]:
@@ -423,10 +356,13 @@ class PDFBatchMaster:
                 break
 
             if not max_iterations:  # Only sleep if running continuously
+                delay = check_interval or self.service.next_poll_delay(
+                    [b["id"] for b in remaining_batches]
+                )
                 self.print_status(
-                    f"Waiting {check_interval} seconds before next check...", "INFO"
+                    f"Waiting {delay:.0f} seconds before next check...", "INFO"
                 )
-                time.sleep(check_interval)
+                time.sleep(delay)
 
     def create_master_document(self):
         """Create a master document combining all batch results"""
@@ -567,7 +503,7 @@ class PDFBatchMaster:
                 return False
 
         # Step 3: Monitor until completion
-        self.monitor_batches(check_interval=30)
+        self.monitor_batches()
 
         # Step 4: Create master document
         self.create_master_document()
@@ -590,6 +526,7 @@ def main():
         print("  python master.py workflow          # Run complete workflow")
         print("  python master.py submit            # Submit new batch")
         print("  python master.py monitor [seconds] # Monitor active batches")
+        print("                                     # (adaptive interval by default)")
         print("  python master.py master            # Create master document")
         print("  python master.py status            # Show all batch statuses")
         print("  python master.py usage [batch_id]  # Analyze usage and costs")
@@ -608,7 +545,7 @@ def main():
             print("Monitor with: python master.py monitor")
 
     elif command == "monitor":
-        interval = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+        interval = int(sys.argv[2]) if len(sys.argv) > 2 else None
         master.monitor_batches(check_interval=interval)
 
     elif command == "master":
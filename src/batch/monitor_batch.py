@@ -3,15 +3,30 @@
 Batch Monitor - Automatically check and retrieve batch results when ready
 """
 
-import subprocess
+import os
 import sys
 import time
 
+# Handle imports whether running as module or script
+try:
+    from .batch_service import BatchService
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from batch.batch_service import BatchService
 
-def monitor_batch(batch_id, check_interval=30):
-    """Monitor batch and retrieve when completed"""
+
+def monitor_batch(batch_id, check_interval=None, service=None):
+    """Monitor batch and retrieve when completed
+
+    Without a check_interval, each check is scheduled from the batch's
+    status and progress.
+    """
+    service = service or BatchService()
     print(f"🔍 Monitoring batch {batch_id}...")
-    print(f"⏰ Checking every {check_interval} seconds")
+    if check_interval:
+        print(f"⏰ Checking every {check_interval} seconds")
+    else:
+        print("⏰ Checking on an adaptive interval")
     print("🛑 Press Ctrl+C to stop monitoring")
 
     try:
@@ -19,46 +34,35 @@ def monitor_batch(batch_id, check_interval=30):
             print(f"\n⏰ {time.strftime('%H:%M:%S')} - Checking batch status...")
 
             # Check status
-            result = subprocess.run(
-                [sys.executable, "batch_api.py", "status", batch_id],
-                capture_output=True,
-                text=True,
-            )
-
-            if result.returncode == 0:
-                output = result.stdout
-                print(output.strip())
+            status = service.status(batch_id, due_only=not check_interval)
 
+            if status is not None:
                 # Check if completed
-                if "Status: completed" in output:
+                if status["status"] == "completed":
                     print("\n🎉 Batch completed! Retrieving results...")
 
                     # Retrieve results
-                    retrieve_result = subprocess.run(
-                        [sys.executable, "batch_api.py", "retrieve", batch_id],
-                        capture_output=True,
-                        text=True,
-                    )
+                    result = service.retrieve(batch_id)
 
-                    if retrieve_result.returncode == 0:
+                    if result["retrieved"]:
                         print("✅ Results retrieved successfully!")
-                        print(retrieve_result.stdout)
+                        for document in result["documents"]:
+                            print(f"   📄 {document}")
                         break
                     else:
-                        print("❌ Error retrieving results:")
-                        print(retrieve_result.stderr)
+                        print("❌ Error retrieving results")
 
-                elif "Status: failed" in output:
+                elif status["status"] == "failed":
                     print("❌ Batch failed!")
                     break
 
             else:
                 print("❌ Error checking batch status")
-                print(result.stderr)
 
             # Wait before next check
-            print(f"⏳ Waiting {check_interval} seconds before next check...")
-            time.sleep(check_interval)
+            delay = check_interval or service.next_poll_delay([batch_id])
+            print(f"⏳ Waiting {delay:.0f} seconds before next check...")
+            time.sleep(delay)
 
     except KeyboardInterrupt:
         print("\n🛑 Monitoring stopped by user")
@@ -0,0 +1,171 @@
+"""
+Multipart Upload - Resumable, parallel upload of batch input files
+
+Enterprise Enhancement for PDFtoMD
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+
+A batch input file can be up to 200 MB. Sent with a single files.create
+request, it goes over one connection, and any stall or reset means sending
+all of it again. Larger files go through the Uploads API instead: the file is
+cut into parts that are sent concurrently and retried one at a time. Part IDs
+are recorded in a .upload.json file next to the batch file as each part
+lands, so a failed or interrupted upload resumes with the missing parts only,
+until the upload expires.
+"""
+
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import openai
+
+# Uploads API limit per part
+MAX_PART_BYTES = 64 * 1024 * 1024
+
+# Errors worth sending the same part again for
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,  # includes timeouts
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+# Start over rather than resume uploads this close to expiring (seconds)
+EXPIRY_MARGIN = 300
+
+
+def upload_state_file(batch_file):
+    """Path of the resume state kept alongside a batch file during an upload"""
+    batch_file = Path(batch_file)
+    return batch_file.with_name(batch_file.stem + ".upload.json")
+
+
+def upload_batch_file(client, batch_file, part_bytes, workers=4, retries=3):
+    """
+    Upload a batch input file, in concurrent parts if it is larger than one
+
+    Args:
+        client: OpenAI client
+        batch_file: JSONL file to upload
+        part_bytes: Part size; files up to this size (or any file when 0,
+            or when the client has no Uploads API) are sent with a single
+            files.create request
+        workers: Parts in flight at once
+        retries: Attempts per part for connection, rate limit and server errors
+
+    Returns:
+        FileObject: The uploaded file, usable as a batch input_file_id
+    """
+    batch_file = Path(batch_file)
+    size = batch_file.stat().st_size
+    # Clients without the Uploads API (LocalBatchClient) take any file whole
+    uploads = getattr(client, "uploads", None)
+    if not part_bytes or size <= part_bytes or uploads is None:
+        with open(batch_file, "rb") as f:
+            return client.files.create(file=f, purpose="batch")
+
+    part_bytes = min(part_bytes, MAX_PART_BYTES)
+    state_file = upload_state_file(batch_file)
+    state = _load_state(state_file, batch_file, part_bytes)
+    if state is None:
+        upload = client.uploads.create(
+            bytes=size,
+            filename=batch_file.name,
+            mime_type="application/jsonl",
+            purpose="batch",
+        )
+        state = {
+            "upload_id": upload.id,
+            "bytes": size,
+            "mtime": batch_file.stat().st_mtime,
+            "part_bytes": part_bytes,
+            "expires_at": upload.expires_at,
+            "parts": {},
+        }
+        _save_state(state_file, state)
+    else:
+        print(f"   ↩️  Resuming upload {state['upload_id']}")
+
+    part_count = math.ceil(size / part_bytes)
+    missing = [i for i in range(part_count) if str(i) not in state["parts"]]
+    lock = threading.Lock()
+
+    def send(index):
+        with open(batch_file, "rb") as f:
+            f.seek(index * part_bytes)
+            data = f.read(part_bytes)
+        part = _retry(
+            lambda: client.uploads.parts.create(state["upload_id"], data=data),
+            retries,
+        )
+        with lock:
+            state["parts"][str(index)] = part.id
+            _save_state(state_file, state)
+
+    try:
+        if missing:
+            print(
+                f"   📦 Sending {len(missing)} of {part_count} parts "
+                f"({part_bytes // (1024 * 1024)} MB each)"
+            )
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(workers, len(missing))),
+                thread_name_prefix="batch-part",
+            ) as executor:
+                # Parts that finish before a failure stay recorded for resuming
+                list(executor.map(send, missing))
+
+        upload = _retry(
+            lambda: client.uploads.complete(
+                state["upload_id"],
+                part_ids=[state["parts"][str(i)] for i in range(part_count)],
+            ),
+            retries,
+        )
+    except openai.NotFoundError:
+        # Upload expired or was cancelled: the next attempt starts over
+        state_file.unlink(missing_ok=True)
+        raise
+
+    state_file.unlink(missing_ok=True)
+    return upload.file
+
+
+def _retry(func, retries, base_delay=1):
+    for attempt in range(retries):
+        try:
+            return func()
+        except RETRYABLE_ERRORS:
+            if attempt == retries - 1:
+                raise
+            time.sleep(base_delay * 2**attempt)
+
+
+def _load_state(state_file, batch_file, part_bytes):
+    """Resume state for this exact file and part size, or None"""
+    try:
+        with open(state_file, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    stat = batch_file.stat()
+    if (
+        state.get("bytes") != stat.st_size
+        or state.get("mtime") != stat.st_mtime
+        or state.get("part_bytes") != part_bytes
+        or (state.get("expires_at") or 0) < time.time() + EXPIRY_MARGIN
+    ):
+        state_file.unlink(missing_ok=True)
+        return None
+    return state
+
+
+def _save_state(state_file, state):
+    tmp_file = state_file.with_name(state_file.name + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    tmp_file.replace(state_file)
@@ -0,0 +1,184 @@
+"""
+Page Renderer - Parallel rendering of many PDFs for batch preparation
+
+Enterprise Enhancement for PDFtoMD
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+
+Preparing a batch renders every page of every PDF to JPEG, which is CPU bound
+and dominated the time spent before submission when done one document at a
+time. Pages of many documents render in a process pool instead: each worker
+keeps a few documents open, pages are submitted in document and page order,
+and results are handed back in that same order so custom_ids and shard
+contents do not depend on the number of workers. At most max_pages rendered
+pages are in flight or waiting to be consumed, across all documents.
+"""
+
+import os
+import sys
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from pickle import PicklingError
+
+from pypdf.errors import PyPdfError
+
+# Make src/core importable in worker processes
+src_dir = Path(__file__).parent.parent
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+# Errors that skip the rest of one PDF rather than the whole batch
+RENDER_ERRORS = (OSError, ValueError, RuntimeError, ImportError, PyPdfError)
+
+# Documents each worker process keeps open
+OPEN_DOCUMENTS = 4
+
+# Per-process open documents, least recently used first
+_documents = OrderedDict()
+
+
+def plan_pdf(pdf_path, pages, render_config):
+    """
+    Choose the render resolution of each page of one PDF (runs in a worker)
+
+    Returns:
+        dict: Page index (starts from 0) -> DPI, in render order
+    """
+    from core.PDFWorker import PDFWorker
+
+    return PDFWorker(pdf_path, 1, 0).plan_page_dpis(pages=pages, **render_config)
+
+
+def render_page(pdf_path, page_index, dpi, fmt):
+    """Render one page to encoded image bytes (runs in a worker)"""
+    import fitz  # PyMuPDF
+
+    doc = _documents.pop(pdf_path, None)
+    if doc is None:
+        doc = fitz.open(pdf_path)
+        while len(_documents) >= OPEN_DOCUMENTS:
+            _documents.popitem(last=False)[1].close()
+    _documents[pdf_path] = doc
+
+    zoom = dpi / 72.0
+    pix = doc.load_page(page_index).get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+    return pix.tobytes(output=fmt)
+
+
+def iter_rendered_pdfs(
+    pdfs, workers=0, max_pages=16, cache=None, fmt="jpg", on_error=None, **render_config
+):
+    """
+    Render the pages of many PDFs in parallel, yielding them in order
+
+    Args:
+        pdfs: List of (pdf_path, page numbers or None for all pages)
+        workers: Render processes (0 = all cores)
+        max_pages: Rendered pages in flight or buffered at once, across PDFs
+        cache: PageCache to reuse and store renders (optional)
+        fmt: Image format
+        on_error: Called with (position, exception) when a PDF cannot be
+            rendered; its remaining pages are skipped
+        **render_config: Render options (see PDFWorker.iter_page_images)
+
+    Yields:
+        tuple: (position of the PDF in pdfs, page number from 1, image bytes)
+    """
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    max_pages = max(1, max_pages)
+    failed = set()
+
+    def report(position, error):
+        failed.add(position)
+        if on_error:
+            on_error(position, error)
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    plans = deque()
+    queued = iter(enumerate(pdfs))
+
+    def submit(func, *args):
+        try:
+            return executor.submit(func, *args)
+        except BrokenProcessPool:
+            # Workers died; finish in this process
+            future = Future()
+            try:
+                future.set_result(func(*args))
+            except RENDER_ERRORS as e:
+                future.set_exception(e)
+            return future
+
+    def plan_ahead():
+        # Plan a few documents ahead so their first pages are ready
+        while len(plans) < workers:
+            item = next(queued, None)
+            if item is None:
+                return
+            position, (pdf_path, pages) = item
+            future = submit(plan_pdf, pdf_path, pages, render_config)
+            plans.append((position, pdf_path, pages, future))
+
+    def tickets():
+        plan_ahead()
+        while plans:
+            position, pdf_path, pages, future = plans.popleft()
+            plan_ahead()
+            try:
+                page_dpi = _result(future, plan_pdf, pdf_path, pages, render_config)
+                digest = cache.file_digest(pdf_path) if cache is not None else ""
+            except RENDER_ERRORS as e:
+                report(position, e)
+                continue
+
+            for page_index, dpi in page_dpi.items():
+                if position in failed:
+                    break
+                data = None
+                if cache is not None:
+                    data = cache.get(digest, page_index, dpi, fmt)
+                if data is None:
+                    data = submit(render_page, pdf_path, page_index, dpi, fmt)
+                yield position, pdf_path, page_index, dpi, digest, data
+
+    def emit(ticket):
+        position, pdf_path, page_index, dpi, digest, data = ticket
+        if position in failed:
+            if not isinstance(data, bytes):
+                data.cancel()
+            return None
+        if not isinstance(data, bytes):
+            try:
+                data = _result(data, render_page, pdf_path, page_index, dpi, fmt)
+            except RENDER_ERRORS as e:
+                report(position, e)
+                return None
+            if cache is not None:
+                cache.put(digest, page_index, dpi, fmt, data)
+        return position, page_index + 1, data
+
+    pending = deque()
+    try:
+        for ticket in tickets():
+            pending.append(ticket)
+            while len(pending) >= max_pages:
+                page = emit(pending.popleft())
+                if page:
+                    yield page
+        while pending:
+            page = emit(pending.popleft())
+            if page:
+                yield page
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _result(future, func, *args):
+    """Result of a pool task, run in this process if the pool is unusable"""
+    try:
+        return future.result()
+    except (BrokenProcessPool, PicklingError):
+        return func(*args)
@@ -0,0 +1,143 @@
+"""
+Result Spool - Incremental assembly of batch output into per-document pages
+
+Enterprise Enhancement for PDFtoMD
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+
+Batch output files list results in completion order, not page order, and can
+be far larger than memory. Each page's markdown is spooled to its own file as
+its result line arrives; once every page of a document has a result (or an
+error), the document is handed on with its pages in order and its spool is
+removed. Only per-document page counters stay in memory.
+"""
+
+import json
+import os
+import shutil
+
+
+def parse_result_line(line):
+    """Split one batch output line into (custom_id, content, usage)
+
+    Returns:
+        tuple: content is None for failed requests; custom_id is None for
+        lines that are not batch results
+    """
+    item = json.loads(line)
+    custom_id = item.get("custom_id")
+    response = item.get("response") or {}
+    body = response.get("body") or {}
+    try:
+        content = body["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        content = None
+    return custom_id, content, body.get("usage") or {}
+
+
+def page_from_custom_id(custom_id):
+    """Recover (pdf_name, page_num) from a custom_id like NAME_page_0001"""
+    parts = custom_id.rsplit("_page_", 1)
+    if len(parts) != 2:
+        raise ValueError(f"Unrecognized custom_id: {custom_id}")
+    return parts[0], int(parts[1])
+
+
+class ResultSpool:
+    """Spool batch results to disk and emit each document once it is complete"""
+
+    def __init__(self, spool_dir, file_mapping, on_document):
+        """
+        Args:
+            spool_dir: Directory for the per-document page files
+            file_mapping: custom_id -> (pdf_name, page_num, temp_dir); decides
+                how many pages each document expects
+            on_document: Called with (pdf_name, pages) when a document is
+                complete; pages is a list of (page_num, page_file) in order
+        """
+        self.spool_dir = str(spool_dir)
+        self.file_mapping = file_mapping
+        self.on_document = on_document
+        self.emitted = []
+        self.failed = 0
+        self._emitted = set()
+
+        self._expected = {}
+        for pdf_name, _, _ in file_mapping.values():
+            self._expected[pdf_name] = self._expected.get(pdf_name, 0) + 1
+        self._resolved = {}  # pdf_name -> set of page numbers with a result
+
+    def add_line(self, line):
+        """Spool one line of a batch output or error file"""
+        if not line.strip():
+            return
+        custom_id, content, _ = parse_result_line(line)
+        if custom_id:
+            self.add(custom_id, content)
+
+    def locate(self, custom_id):
+        """
+        Document and page a request belongs to
+
+        Returns:
+            tuple: (pdf_name, page_num)
+        """
+        if custom_id in self.file_mapping:
+            pdf_name, page_num, _ = self.file_mapping[custom_id]
+            return pdf_name, page_num
+        # Mapping lost; the document is written once all output is read
+        return page_from_custom_id(custom_id)
+
+    def add(self, custom_id, content):
+        """
+        Record one page result
+
+        Args:
+            custom_id: Request ID
+            content: Markdown for the page, or None if the request failed
+        """
+        pdf_name, page_num = self.locate(custom_id)
+        if pdf_name in self._emitted:
+            return
+
+        resolved = self._resolved.setdefault(pdf_name, set())
+        if content is None:
+            self.failed += 1
+        else:
+            doc_dir = os.path.join(self.spool_dir, pdf_name)
+            os.makedirs(doc_dir, exist_ok=True)
+            with open(
+                os.path.join(doc_dir, f"{page_num:05d}.md"), "w", encoding="utf-8"
+            ) as f:
+                f.write(content)
+        resolved.add(page_num)
+
+        if len(resolved) >= self._expected.get(pdf_name, float("inf")):
+            self._emit(pdf_name)
+
+    def finish(self):
+        """Emit documents still missing pages with the pages that arrived
+
+        Returns:
+            list: Names of all emitted documents
+        """
+        for pdf_name in list(self._resolved):
+            self._emit(pdf_name)
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+        return self.emitted
+
+    def _emit(self, pdf_name):
+        doc_dir = os.path.join(self.spool_dir, pdf_name)
+        self._resolved.pop(pdf_name, None)
+        if not os.path.isdir(doc_dir):
+            return  # every page failed
+
+        pages = sorted(
+            (int(name[:-3]), os.path.join(doc_dir, name))
+            for name in os.listdir(doc_dir)
+            if name.endswith(".md")
+        )
+        self.on_document(pdf_name, pages)
+        self.emitted.append(pdf_name)
+        self._emitted.add(pdf_name)
+        shutil.rmtree(doc_dir, ignore_errors=True)
@@ -0,0 +1,266 @@
+"""
+Status Monitor - Concurrent batch status polling with adaptive intervals
+
+Enterprise Enhancement for PDFtoMD
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+
+A chunked job can have dozens of shard batches. Checking them one after
+another on a fixed interval makes each sweep slow and spends API calls on
+batches that cannot have changed. The monitor checks every batch that is due
+concurrently under a limit and schedules each batch's next check from its
+status and observed progress:
+
+- validating, or in progress without progress: back off from the base
+  interval
+- in progress: about half the time the observed completion rate says the
+  remaining requests need
+- finalizing or cancelling: the minimum interval
+- finished: never again (answered from memory)
+- check failed: exponential backoff
+
+Callbacks fire whenever a batch changes status.
+"""
+
+import asyncio
+import time
+
+try:
+    from .job_store import FINAL_STATUSES
+except ImportError:
+    from batch.job_store import FINAL_STATUSES
+
+# Batch statuses that end soon
+WRAPPING_UP_STATUSES = {"finalizing", "cancelling"}
+
+# Interval growth for batches that show no progress
+BACKOFF = 1.5
+
+
+class StatusMonitor:
+    """Poll many batches concurrently, each on its own adaptive schedule"""
+
+    def __init__(
+        self,
+        retrieve_batch,
+        concurrency=8,
+        base_interval=30,
+        min_interval=5,
+        max_interval=600,
+        on_transition=None,
+        clock=time.monotonic,
+    ):
+        """
+        Args:
+            retrieve_batch: Called with a batch ID; returns the batch object.
+                Runs in worker threads, so a blocking client can be used
+            concurrency: Status requests in flight at once
+            base_interval: First interval for a batch without progress
+            min_interval: Shortest interval between checks of one batch
+            max_interval: Longest interval between checks of one batch
+            on_transition: Called with (batch_id, previous_status, batch) when
+                a batch is first seen and whenever its status changes
+            clock: Monotonic time source in seconds
+        """
+        self.retrieve_batch = retrieve_batch
+        self.concurrency = max(1, concurrency)
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.on_transition = on_transition
+        self.clock = clock
+        self.states = {}
+
+    def is_final(self, batch_id):
+        """True once a batch has reached a finished status"""
+        state = self.states.get(batch_id)
+        return bool(state) and state["status"] in FINAL_STATUSES
+
+    def is_due(self, batch_id, now=None):
+        """True if a batch should be checked now"""
+        state = self.states.get(batch_id)
+        if state is None:
+            return True
+        if state["next_check"] is None:
+            return False
+        return state["next_check"] <= (self.clock() if now is None else now)
+
+    def delay(self, batch_ids):
+        """
+        Seconds until the next of these batches is due
+
+        Batches never checked or already finished are not waited for.
+
+        Returns:
+            float: 0 if one is due now or none is scheduled
+        """
+        due_at = [
+            self.states[batch_id]["next_check"]
+            for batch_id in batch_ids
+            if batch_id in self.states
+            and self.states[batch_id]["next_check"] is not None
+        ]
+        return max(0, min(due_at) - self.clock()) if due_at else 0
+
+    def next_interval(self, state):
+        """
+        Seconds until a batch should be checked again
+
+        Returns:
+            float: None for finished batches
+        """
+        if state["status"] in FINAL_STATUSES:
+            return None
+        if state["errors"]:
+            interval = self.base_interval * 2 ** min(state["errors"] - 1, 10)
+        elif state["status"] in WRAPPING_UP_STATUSES:
+            interval = self.min_interval
+        elif state["rate"] and state["total"] > state["done"]:
+            interval = (state["total"] - state["done"]) / state["rate"] / 2
+        elif state["interval"]:
+            interval = state["interval"] * BACKOFF
+        else:
+            interval = self.base_interval
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    async def poll(self, batch_ids, due_only=False):
+        """
+        Check batches concurrently
+
+        Args:
+            batch_ids: Batches to check
+            due_only: Only check batches whose next check is due; the others
+                are answered with their last known state
+
+        Returns:
+            dict: batch_id -> batch object, or the exception raised by the
+            last failed check
+        """
+        batch_ids = list(dict.fromkeys(batch_ids))
+        now = self.clock()
+        fetch = [
+            batch_id
+            for batch_id in batch_ids
+            if not self.is_final(batch_id)
+            and (not due_only or self.is_due(batch_id, now))
+        ]
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(
+            *(self._retrieve(batch_id, semaphore) for batch_id in fetch),
+            return_exceptions=True,
+        )
+
+        if len(results) != len(fetch):
+            raise RuntimeError(
+                f"Expected {len(fetch)} status check results, got {len(results)}"
+            )
+
+        now = self.clock()
+        # zip(strict=) needs Python 3.10; the lengths are checked above
+        for batch_id, result in zip(fetch, results):  # noqa: B905
+            if isinstance(result, Exception):
+                self._record_error(batch_id, result, now)
+            else:
+                self._record_batch(batch_id, result, now)
+
+        return {
+            batch_id: self.states[batch_id]["error"] or self.states[batch_id]["batch"]
+            for batch_id in batch_ids
+        }
+
+    async def watch(self, batch_ids, timeout=None):
+        """
+        Poll batches on their own schedules until all have finished
+
+        Args:
+            batch_ids: Batches to watch
+            timeout: Give up after this many seconds (default: no limit)
+
+        Returns:
+            dict: batch_id -> last batch object (None if never retrieved)
+        """
+        batch_ids = list(dict.fromkeys(batch_ids))
+        deadline = None if timeout is None else self.clock() + timeout
+
+        while True:
+            await self.poll(batch_ids, due_only=True)
+            pending = [b for b in batch_ids if not self.is_final(b)]
+            if not pending:
+                break
+            wait = self.delay(pending)
+            if deadline is not None and self.clock() + wait > deadline:
+                break
+            await asyncio.sleep(wait)
+
+        return {batch_id: self.states[batch_id]["batch"] for batch_id in batch_ids}
+
+    def sweep(self, batch_ids, due_only=False):
+        """Blocking poll(); must not be called from a running event loop"""
+        return asyncio.run(self.poll(batch_ids, due_only))
+
+    def run(self, batch_ids, timeout=None):
+        """Blocking watch(); must not be called from a running event loop"""
+        return asyncio.run(self.watch(batch_ids, timeout))
+
+    async def _retrieve(self, batch_id, semaphore):
+        async with semaphore:
+            return await asyncio.to_thread(self.retrieve_batch, batch_id)
+
+    def _state(self, batch_id):
+        return self.states.setdefault(
+            batch_id,
+            {
+                "status": None,
+                "batch": None,
+                "error": None,
+                "done": 0,
+                "total": 0,
+                "rate": None,  # requests finished per second
+                "checked_at": None,
+                "interval": None,
+                "next_check": None,
+                "errors": 0,
+            },
+        )
+
+    def _schedule(self, state, now):
+        state["interval"] = self.next_interval(state)
+        state["next_check"] = (
+            None if state["interval"] is None else now + state["interval"]
+        )
+
+    def _record_batch(self, batch_id, batch, now):
+        state = self._state(batch_id)
+        previous = state["status"]
+
+        counts = getattr(batch, "request_counts", None)
+        done = (getattr(counts, "completed", 0) or 0) + (
+            getattr(counts, "failed", 0) or 0
+        )
+        if state["checked_at"] is not None and now > state["checked_at"]:
+            sample = max(done - state["done"], 0) / (now - state["checked_at"])
+            # Smooth the rate; stalled checks pull it down
+            state["rate"] = (
+                sample if state["rate"] is None else (state["rate"] + sample) / 2
+            )
+
+        state.update(
+            status=batch.status,
+            batch=batch,
+            error=None,
+            done=done,
+            total=getattr(counts, "total", 0) or 0,
+            checked_at=now,
+            errors=0,
+        )
+        self._schedule(state, now)
+
+        if previous != batch.status and self.on_transition:
+            self.on_transition(batch_id, previous, batch)
+
+    def _record_error(self, batch_id, error, now):
+        state = self._state(batch_id)
+        state["error"] = error
+        state["errors"] += 1
+        self._schedule(state, now)
@@ -0,0 +1,237 @@
+"""
+Usage Stats - Token and cost aggregates built while batch results are ingested
+
+Enterprise Enhancement for PDFtoMD
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+
+Every result line already passes through retrieval once; folding its usage
+into per-page, per-document and per-batch totals there means cost reports
+never have to download and parse the output file a second time.
+"""
+
+import json
+import os
+import time
+
+# Batch API pricing for gpt-4o-mini (USD per 1M tokens, 50% off regular pricing)
+INPUT_PRICE_PER_M = 0.150
+OUTPUT_PRICE_PER_M = 0.600
+
+# Batch API price as a fraction of the synchronous price
+BATCH_DISCOUNT = 0.5
+
+
+def token_cost(prompt_tokens, completion_tokens, batch=True):
+    """Cost of a token count in USD at Batch API (or synchronous) prices"""
+    cost = (prompt_tokens / 1_000_000) * INPUT_PRICE_PER_M + (
+        completion_tokens / 1_000_000
+    ) * OUTPUT_PRICE_PER_M
+    return cost if batch else cost / BATCH_DISCOUNT
+
+
+def usage_stats_file(stats_dir, batch_id):
+    """Path of a batch's saved usage aggregates"""
+    return os.path.join(str(stats_dir), f"usage_stats_{batch_id}.json")
+
+
+def usage_pages_file(stats_dir, batch_id):
+    """Path of a batch's per-page usage lines"""
+    return os.path.join(str(stats_dir), f"usage_pages_{batch_id}.jsonl")
+
+
+def load_usage_stats(stats_dir, batch_id):
+    """
+    Read the usage aggregates saved when a batch was retrieved
+
+    Returns:
+        dict: Usage stats, or None if the batch has not been ingested
+    """
+    path = usage_stats_file(stats_dir, batch_id)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+class UsageAggregator:
+    """Fold result usage into per-page, per-document and per-batch totals
+
+    Per-page usage is appended to usage_pages_<batch_id>.jsonl as results
+    arrive; document and batch totals are kept in memory and written to
+    usage_stats_<batch_id>.json by save().
+    """
+
+    def __init__(self, batch_id, stats_dir, resume=False):
+        """
+        Args:
+            batch_id: Batch (or master batch) ID
+            stats_dir: Directory for the usage files
+            resume: Start from the per-page usage already saved for the batch
+                (results of resubmitted pages are added to it)
+        """
+        self.batch_id = batch_id
+        self.stats_dir = str(stats_dir)
+        self.documents = {}
+        self.failed_requests = 0
+        self._seen = set()
+        self._pages_f = None
+        self._pages_mode = "w"
+
+        pages_file = usage_pages_file(self.stats_dir, batch_id)
+        if resume and os.path.exists(pages_file):
+            with open(pages_file, encoding="utf-8") as f:
+                for line in f:
+                    page = json.loads(line)
+                    self._seen.add(page["custom_id"])
+                    self._count(
+                        page["document"],
+                        page["prompt_tokens"],
+                        page["completion_tokens"],
+                        page["total_tokens"],
+                    )
+            self._pages_mode = "a"
+
+    def add(self, custom_id, pdf_name, page_num, usage):
+        """
+        Record one result's usage
+
+        Args:
+            custom_id: Request ID (repeats are counted once)
+            pdf_name: Document the page belongs to
+            page_num: Page number
+            usage: Usage dict from the response body, or None for a failure
+        """
+        if usage is None:
+            self.failed_requests += 1
+            return
+        if custom_id in self._seen:
+            return
+        self._seen.add(custom_id)
+
+        prompt_tokens = usage.get("prompt_tokens", 0) or 0
+        completion_tokens = usage.get("completion_tokens", 0) or 0
+        total_tokens = usage.get("total_tokens") or prompt_tokens + completion_tokens
+
+        self._count(pdf_name, prompt_tokens, completion_tokens, total_tokens)
+
+        if self._pages_f is None:
+            os.makedirs(self.stats_dir, exist_ok=True)
+            self._pages_f = open(
+                usage_pages_file(self.stats_dir, self.batch_id),
+                self._pages_mode,
+                encoding="utf-8",
+            )
+        self._pages_f.write(
+            json.dumps(
+                {
+                    "custom_id": custom_id,
+                    "document": pdf_name,
+                    "page": page_num,
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": total_tokens,
+                    "cost": token_cost(prompt_tokens, completion_tokens),
+                }
+            )
+            + "\n"
+        )
+
+    def _count(self, pdf_name, prompt_tokens, completion_tokens, total_tokens):
+        document = self.document(pdf_name)
+        document["pages"] += 1
+        document["prompt_tokens"] += prompt_tokens
+        document["completion_tokens"] += completion_tokens
+        document["total_tokens"] += total_tokens
+
+    def document(self, pdf_name):
+        """Running totals of one document (created empty on first use)"""
+        return self.documents.setdefault(
+            pdf_name,
+            {
+                "pages": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_tokens": 0,
+            },
+        )
+
+    def document_stats(self, pdf_name):
+        """
+        Totals of one document with costs
+
+        Returns:
+            dict: pages, token counts, cost and cost_per_page
+        """
+        document = dict(self.document(pdf_name))
+        document["cost"] = token_cost(
+            document["prompt_tokens"], document["completion_tokens"]
+        )
+        document["cost_per_page"] = document["cost"] / max(document["pages"], 1)
+        return document
+
+    def summary(self):
+        """
+        Batch totals in the format of PDFBatchMaster.analyze_batch_usage
+
+        Returns:
+            dict: Batch totals, per-document stats and file_details for the
+            metadata embedder
+        """
+        documents = {name: self.document_stats(name) for name in self.documents}
+        prompt_tokens = sum(d["prompt_tokens"] for d in documents.values())
+        completion_tokens = sum(d["completion_tokens"] for d in documents.values())
+        total_tokens = sum(d["total_tokens"] for d in documents.values())
+        request_count = sum(d["pages"] for d in documents.values())
+        input_cost = (prompt_tokens / 1_000_000) * INPUT_PRICE_PER_M
+        output_cost = (completion_tokens / 1_000_000) * OUTPUT_PRICE_PER_M
+        total_cost = input_cost + output_cost
+
+        return {
+            "batch_id": self.batch_id,
+            "total_requests": request_count,
+            "total_pages": request_count,
+            "failed_requests": self.failed_requests,
+            "total_tokens": total_tokens,
+            "total_cost": total_cost,
+            "avg_tokens_per_page": total_tokens / request_count if request_count else 0,
+            "avg_cost_per_page": total_cost / request_count if request_count else 0,
+            "token_breakdown": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": total_tokens,
+            },
+            "cost_breakdown": {"input_cost": input_cost, "output_cost": output_cost},
+            "documents": documents,
+            "file_details": [
+                {
+                    "file": f"{name}.pdf",
+                    "source_pdf": f"{name}.pdf",
+                    "pages": document["pages"],
+                    "cost": document["cost"],
+                    "cost_per_page": document["cost_per_page"],
+                    "tokens": document["total_tokens"],
+                }
+                for name, document in sorted(documents.items())
+            ],
+            "analyzed_at": time.time(),
+        }
+
+    def save(self):
+        """
+        Close the per-page file and write the batch totals
+
+        Returns:
+            dict: The saved summary
+        """
+        if self._pages_f is not None:
+            self._pages_f.close()
+            self._pages_f = None
+        summary = self.summary()
+        os.makedirs(self.stats_dir, exist_ok=True)
+        with open(
+            usage_stats_file(self.stats_dir, self.batch_id), "w", encoding="utf-8"
+        ) as f:
+            json.dump(summary, f, indent=2)
+        return summary
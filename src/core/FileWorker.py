@@ -11,8 +11,11 @@ Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
 Licensed under the Apache License, Version 2.0
 """
 
+import base64
 import logging
 import os
+from collections.abc import Iterator
+from typing import Any, Union
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +47,58 @@ class FileWorker:
         """
         raise NotImplementedError("Subclasses must implement this method")
 
+    def iter_page_images(
+        self, dpi: int = 300, fmt: str = "jpg", as_base64: bool = False, **kwargs
+    ) -> Iterator[tuple[int, Union[bytes, str]]]:
+        """
+        Render input file pages to encoded images in memory, without touching disk
+
+        Args:
+            dpi (int): Output image resolution
+            fmt (str): Image format (jpg/png)
+            as_base64 (bool): Yield base64 strings instead of raw bytes
+            **kwargs: Other parameters
+
+        Returns:
+            Iterator[Tuple[int, bytes | str]]: (page number starting from 1, image)
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def classify_pages(self) -> list[dict[str, Any]]:
+        """
+        Classify pages as "text" (convertible locally) or "vision" (needs the LLM)
+
+        Returns:
+            List[dict]: One entry per page with at least "page" and "kind";
+                empty when the file type has no text layer
+        """
+        return []
+
+    def text_page_markdown(self, page_num: int) -> str:
+        """
+        Convert a page classified as "text" to Markdown without the LLM
+
+        Args:
+            page_num (int): Page number (starts from 1)
+
+        Returns:
+            str: Markdown for the page
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+
+def encode_base64(data: bytes) -> str:
+    """
+    Base64-encode image bytes for an API payload
+
+    Args:
+        data (bytes): Encoded image bytes
+
+    Returns:
+        str: Base64 string
+    """
+    return base64.b64encode(data).decode("utf-8")
+
 
 def create_worker(input_path: str, start_page: int = 1, end_page: int = 0):
     """
@@ -13,8 +13,11 @@ Licensed under the Apache License, Version 2.0
 
 import logging
 import os
+from collections.abc import Iterator
+from typing import Union
 
-from .FileWorker import FileWorker
+from .FileWorker import FileWorker, encode_base64
+from .VisionTiling import fit_image
 
 logger = logging.getLogger(__name__)
 
@@ -37,3 +40,26 @@ class ImageWorker(FileWorker):
             List[str]: List of generated image paths
         """
         return [self.input_path]
+
+    def iter_page_images(
+        self,
+        dpi: int = 300,
+        fmt: str = "jpg",
+        as_base64: bool = False,
+        vision_model: str = "",
+        **kwargs,
+    ) -> Iterator[tuple[int, Union[bytes, str]]]:
+        """
+        Yield the image file itself as the only page
+
+        Args:
+            vision_model (str): Downscale to the size this model keeps (optional)
+
+        Returns:
+            Iterator[Tuple[int, bytes | str]]: Single (1, image) pair
+        """
+        with open(self.input_path, "rb") as image_file:
+            data = image_file.read()
+        if vision_model:
+            data = fit_image(data, vision_model, fmt)
+        yield 1, encode_base64(data) if as_base64 else data
@@ -11,30 +11,63 @@ Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
 Licensed under the Apache License, Version 2.0
 """
 
+import base64
 import logging
-from typing import Any, Optional
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Optional, Union
 
 import openai
 
+from .VisionTiling import predict_image_tokens
+
+if TYPE_CHECKING:
+    from .ResponseCache import ResponseCache
+
 logger = logging.getLogger(__name__)
 
+# Process-wide pooled clients, keyed by (base_url, api_key) and by model
+_shared_openai_clients: dict[tuple[str, str], openai.OpenAI] = {}
+_shared_llm_clients: dict[tuple[str, str, str], "LLMClient"] = {}
+_shared_lock = threading.Lock()
+
+# Rate limit headers returned with every completion
+_RATE_LIMIT_HEADERS = {
+    "x-ratelimit-limit-requests": "limit_requests",
+    "x-ratelimit-remaining-requests": "remaining_requests",
+    "x-ratelimit-reset-requests": "reset_requests",
+    "x-ratelimit-limit-tokens": "limit_tokens",
+    "x-ratelimit-remaining-tokens": "remaining_tokens",
+    "x-ratelimit-reset-tokens": "reset_tokens",
+}
+
 
 class LLMClient:
     """
     OpenAI API compatible client class
     """
 
-    def __init__(self, base_url: str, api_key: str, model: str):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        model: str,
+        client: Optional[openai.OpenAI] = None,
+    ):
         """
         Initialize OpenAI API client
         :param base_url: Base URL for OpenAI API
         :param api_key: OpenAI API key
         :param model: Name of the model to use
+        :param client: Existing OpenAI client to reuse (optional)
         """
         self.base_url = base_url
         self.api_key = api_key
         self.model = model
-        self.client = openai.OpenAI(base_url=base_url, api_key=api_key)
+        self.client = client or openai.OpenAI(base_url=base_url, api_key=api_key)
+        # Rate limits reported with the last completion (see parse_rate_limits)
+        self.rate_limits: dict[str, float] = {}
 
     def completion(
         self,
@@ -43,6 +76,8 @@ class LLMClient:
         image_paths: Optional[list[str]] = None,
         temperature: float = 0.7,
         max_tokens: int = 8192,
+        images: Optional[list[Union[bytes, str]]] = None,
+        cache: Optional["ResponseCache"] = None,
     ) -> str:
         """
         Create chat dialogue (supports multimodal)
@@ -53,21 +88,35 @@ class LLMClient:
             image_paths: List of image paths (optional)
             temperature: Generation temperature
             max_tokens: Maximum number of tokens
+            images: Encoded images already in memory, as raw bytes or
+                base64 strings (optional)
+            cache: Response cache consulted before calling the API (optional)
 
         Returns:
             str: Model generated response content
         """
         # Create the message content
         user_content: list[dict[str, Any]] = [{"type": "text", "text": user_message}]
+        key_images: list[Union[bytes, str]] = []
         if image_paths:
             for img_path in image_paths:
                 base64_image = self.encode_image(img_path)
+                key_images.append(base64_image)
                 user_content.append(
                     {
                         "type": "image_url",
                         "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"},
                     }
                 )
+        if images:
+            for image in images:
+                key_images.append(image)
+                user_content.append(
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": self.image_data_url(image)},
+                    }
+                )
 
         messages: list[dict[str, Any]] = []
         if system_prompt:
@@ -78,21 +127,211 @@ class LLMClient:
         else:
             messages = [{"role": "user", "content": user_content}]
 
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(
+                self.model,
+                system_prompt,
+                user_message,
+                temperature,
+                max_tokens,
+                key_images,
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info("Response cache hit")
+                return cached["content"]
+
         try:
-            response = self.client.chat.completions.create(
+            raw_response = self.client.chat.completions.with_raw_response.create(
                 model=self.model,
                 messages=messages,  # type: ignore
                 temperature=temperature,
                 max_tokens=max_tokens,
             )
-            return response.choices[0].message.content or ""
+            rate_limits = parse_rate_limits(raw_response.headers)
+            if rate_limits:
+                self.rate_limits = rate_limits
+            response = raw_response.parse()
+            content = response.choices[0].message.content or ""
+
+            if key_images and response.usage:
+                logger.info(
+                    "Image tokens predicted: %d, prompt tokens billed: %d",
+                    predict_image_tokens(key_images, self.model),
+                    response.usage.prompt_tokens,
+                )
+
+            if cache is not None and cache_key and content:
+                usage = response.usage.model_dump() if response.usage else {}
+                cache.put(cache_key, content, usage)
+
+            return content
 
         except Exception as e:
             logger.error(f"API request failed: {str(e)}")
             raise e
 
     def encode_image(self, image_path: str) -> str:
-        import base64
-
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode("utf-8")
+
+    @staticmethod
+    def image_data_url(image: Union[bytes, str]) -> str:
+        """
+        Build a data URL for an in-memory image
+
+        Args:
+            image: Encoded image bytes, or an already base64-encoded string
+
+        Returns:
+            str: data URL with the MIME type detected from the image signature
+        """
+        if isinstance(image, str):
+            base64_image = image
+            header = base64.b64decode(image[:16])
+        else:
+            base64_image = base64.b64encode(image).decode("utf-8")
+            header = image[:8]
+
+        mime_type = "image/jpeg"
+        if header.startswith(b"\x89PNG"):
+            mime_type = "image/png"
+        elif header.startswith(b"BM"):
+            mime_type = "image/bmp"
+
+        return f"data:{mime_type};base64,{base64_image}"
+
+
+def parse_rate_limits(headers) -> dict[str, float]:
+    """
+    Read the x-ratelimit-* headers of an API response
+
+    Args:
+        headers: Response headers
+
+    Returns:
+        dict: limit_requests, remaining_requests, limit_tokens and
+        remaining_tokens as numbers, reset_requests and reset_tokens in
+        seconds, and checked_at (epoch seconds); empty if none were sent
+    """
+    rate_limits: dict[str, float] = {}
+    for header, name in _RATE_LIMIT_HEADERS.items():
+        value = headers.get(header)
+        if value is None:
+            continue
+        try:
+            if name.startswith("reset_"):
+                rate_limits[name] = _parse_duration(value)
+            else:
+                rate_limits[name] = float(value)
+        except ValueError:
+            continue
+    if rate_limits:
+        rate_limits["checked_at"] = time.time()
+    return rate_limits
+
+
+def _parse_duration(value: str) -> float:
+    """Seconds in a reset duration such as 20ms, 1s or 6m0s"""
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return float(value)
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(number) * units[unit] for number, unit in parts)
+
+
+def create_http_client(
+    timeout: float = 60.0,
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 30.0,
+    http2: bool = False,
+):
+    """
+    Create a keep-alive HTTP client with a tuned connection pool
+
+    Args:
+        timeout: Request timeout in seconds
+        max_connections: Maximum open connections in the pool
+        max_keepalive_connections: Idle connections kept open for reuse
+        keepalive_expiry: Seconds an idle connection is kept open
+        http2: Use HTTP/2 if the h2 package is installed
+
+    Returns:
+        httpx.Client: Client suitable for openai.OpenAI(http_client=...)
+    """
+    import httpx
+
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 requested but h2 is not installed, using HTTP/1.1")
+            http2 = False
+
+    return openai.DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(timeout, connect=min(10.0, timeout)),
+        http2=http2,
+    )
+
+
+def get_shared_client(
+    base_url: str, api_key: str, model: str, **pool_options
+) -> LLMClient:
+    """
+    Get the process-wide LLMClient for an endpoint and model
+
+    All clients for the same endpoint share one OpenAI client and its
+    connection pool, so per-page calls reuse warm keep-alive connections
+    instead of paying for a new pool and TLS handshake each time.
+
+    Args:
+        base_url: Base URL for OpenAI API
+        api_key: OpenAI API key
+        model: Name of the model to use
+        **pool_options: Passed to create_http_client on first use
+
+    Returns:
+        LLMClient: Shared, thread-safe client
+    """
+    key = (base_url, api_key, model)
+    with _shared_lock:
+        llm_client = _shared_llm_clients.get(key)
+        if llm_client is None:
+            endpoint = (base_url, api_key)
+            client = _shared_openai_clients.get(endpoint)
+            if client is None:
+                client = openai.OpenAI(
+                    base_url=base_url,
+                    api_key=api_key,
+                    http_client=create_http_client(**pool_options),
+                )
+                _shared_openai_clients[endpoint] = client
+            llm_client = LLMClient(base_url, api_key, model, client=client)
+            _shared_llm_clients[key] = llm_client
+        return llm_client
+
+
+def shared_rate_limits(model: Optional[str] = None) -> dict[str, float]:
+    """
+    Rate limits most recently reported to any shared client
+
+    Args:
+        model: Only consider clients of this model (optional)
+
+    Returns:
+        dict: See parse_rate_limits; empty before the first completion
+    """
+    with _shared_lock:
+        seen = [
+            llm_client.rate_limits
+            for (_, _, client_model), llm_client in _shared_llm_clients.items()
+            if llm_client.rate_limits and model in (None, client_model)
+        ]
+    return max(seen, key=lambda limits: limits["checked_at"], default={})
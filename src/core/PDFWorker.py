@@ -12,10 +12,16 @@ Licensed under the Apache License, Version 2.0
 """
 
 import logging
+import math
 import os
-from typing import Optional
 import sys
+from collections import Counter, deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from pickle import PicklingError
+from typing import TYPE_CHECKING, Any, Optional, Union
 
 import pypdf
 
@@ -25,10 +31,27 @@ src_dir = current_dir.parent
 if str(src_dir) not in sys.path:
     sys.path.insert(0, str(src_dir))
 
-from core.FileWorker import FileWorker
+from core.FileWorker import FileWorker, encode_base64
+from core.VisionTiling import plan_page_size, vision_scheme
+
+if TYPE_CHECKING:
+    from core.PageCache import PageCache
 
 logger = logging.getLogger(__name__)
 
+# Page classification thresholds for the text-layer fast path
+MIN_TEXT_CHARS = 40  # fewer characters: likely scanned or a figure page
+MAX_IMAGE_RATIO = 0.05  # share of the page covered by raster images
+MAX_CURVE_DRAWINGS = 10  # vector paths with curves (charts, diagrams)
+MAX_LINE_DRAWINGS = 400  # straight-line paths beyond table rules and underlines
+MAX_GARBLED_RATIO = 0.02  # share of unmappable glyphs in the text layer
+
+# Adaptive DPI policy
+MIN_FONT_PIXELS = 16  # render the page's small print at least this tall
+SMALL_FONT_PERCENTILE = 0.05  # ignore the smallest 5% of characters (footnote marks)
+MIN_IMAGE_RATIO = 0.05  # images covering less of the page do not set the DPI
+MAX_LONG_SIDE_PIXELS = 4096  # upper bound for the long edge of a rendered page
+
 
 class PDFWorker(FileWorker):
     """
@@ -42,6 +65,10 @@ class PDFWorker(FileWorker):
         self.start_page = start_page
         self.end_page = end_page
         self.output_dir = os.path.dirname(input_path)
+        # Original document and offset of input_path within it, used to key
+        # cached renders independently of page range extraction
+        self.source_path = input_path
+        self.page_offset = 0
 
         # First validate page number range
         if start_page < 1 or start_page > self.total_pages:
@@ -63,6 +90,7 @@ class PDFWorker(FileWorker):
 
         logger.info("Page extraction completed")
         self.input_path = extracted_path
+        self.page_offset = start_page - 1
 
     def get_total_pages(self) -> int:
         """
@@ -123,7 +151,18 @@ class PDFWorker(FileWorker):
             return ""
 
     def convert_to_images(
-        self, output_dir: str = ".", dpi: int = 300, fmt: str = "jpg", **kwargs
+        self,
+        output_dir: str = ".",
+        dpi: int = 300,
+        fmt: str = "jpg",
+        workers: int = 1,
+        cache: Optional["PageCache"] = None,
+        adaptive_dpi: bool = False,
+        min_dpi: int = 100,
+        max_dpi: int = 300,
+        vision_model: str = "",
+        vision_min_dpi: int = 80,
+        **kwargs,
     ) -> list[str]:
         """
         Convert each PDF page to a high-quality image
@@ -132,29 +171,64 @@ class PDFWorker(FileWorker):
             output_dir (str): Output directory for images
             dpi (int): Output image resolution (default 300)
             fmt (str): Image format (supports jpg/png, default jpg)
+            workers (int): Number of render processes (default 1, 0 = all cores)
+            cache (PageCache): Reuse and store rendered pages (optional)
+            adaptive_dpi (bool): Choose the resolution per page (see choose_dpi)
+            min_dpi (int): Lowest adaptive resolution (default 100)
+            max_dpi (int): Highest adaptive resolution (default 300)
+            vision_model (str): Size pages for this model's image tiling (optional)
+            vision_min_dpi (int): Legibility floor when sizing for a model
             **kwargs: Additional parameters
 
         Returns:
-            List[str]: List of generated image paths
+            List[str]: List of generated image paths, in page order
         """
         try:
             import fitz  # PyMuPDF
 
             os.makedirs(output_dir, exist_ok=True)
-            img_paths = []
-
-            doc = fitz.open(self.input_path)
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                # Convert DPI to zoom factor (72 DPI is baseline)
-                zoom = dpi / 72.0
-                mat = fitz.Matrix(zoom, zoom)
-                pix = page.get_pixmap(matrix=mat)  # type: ignore
-                output_path = os.path.join(output_dir, f"page_{page_num + 1:04d}.{fmt}")
-                pix.save(output_path)
-                img_paths.append(output_path)
 
-            return img_paths
+            if cache is not None or adaptive_dpi or vision_model:
+                # Cached pages are copied out; only missing pages are rendered
+                img_paths = []
+                for page_num, data in self.iter_page_images(
+                    dpi=dpi,
+                    fmt=fmt,
+                    workers=workers,
+                    cache=cache,
+                    adaptive_dpi=adaptive_dpi,
+                    min_dpi=min_dpi,
+                    max_dpi=max_dpi,
+                    vision_model=vision_model,
+                    vision_min_dpi=vision_min_dpi,
+                ):
+                    output_path = os.path.join(output_dir, f"page_{page_num:04d}.{fmt}")
+                    with open(output_path, "wb") as f:
+                        f.write(data)  # type: ignore
+                    img_paths.append(output_path)
+                return img_paths
+
+            with fitz.open(self.input_path) as doc:
+                page_count = len(doc)
+
+            if workers <= 0:
+                workers = os.cpu_count() or 1
+            workers = min(workers, page_count)
+
+            if workers <= 1:
+                return _render_page_range(
+                    self.input_path, 0, page_count, output_dir, dpi, fmt
+                )
+
+            try:
+                return self._render_parallel(page_count, output_dir, dpi, fmt, workers)
+            except (BrokenProcessPool, PicklingError, AttributeError) as e:
+                logger.warning(
+                    f"Parallel rendering unavailable ({str(e)}), rendering serially"
+                )
+                return _render_page_range(
+                    self.input_path, 0, page_count, output_dir, dpi, fmt
+                )
 
         except ImportError:
             logger.error("PyMuPDF not installed. Cannot convert PDF to images.")
@@ -165,3 +239,544 @@ class PDFWorker(FileWorker):
         except Exception as e:  # pylint: disable=broad-except
             logger.error(f"Unexpected error during PDF conversion: {str(e)}")
             return []
+
+    def _render_parallel(
+        self, page_count: int, output_dir: str, dpi: int, fmt: str, workers: int
+    ) -> list[str]:
+        """
+        Render the document in contiguous page slices across worker processes
+
+        Each worker opens its own document and renders its slice one page at a
+        time, so at most one pixmap per worker is held in memory. Slices are
+        collected in submission order to keep the result in page order.
+        """
+        slices = _split_page_range(page_count, workers)
+        logger.info(
+            "Rendering %d pages with %d worker processes", page_count, len(slices)
+        )
+
+        with ProcessPoolExecutor(max_workers=len(slices)) as executor:
+            futures = [
+                executor.submit(
+                    _render_page_range,
+                    self.input_path,
+                    first,
+                    last,
+                    output_dir,
+                    dpi,
+                    fmt,
+                )
+                for first, last in slices
+            ]
+            img_paths = []
+            for future in futures:
+                img_paths.extend(future.result())
+
+        return img_paths
+
+    def iter_page_images(
+        self,
+        dpi: int = 300,
+        fmt: str = "jpg",
+        as_base64: bool = False,
+        workers: int = 1,
+        cache: Optional["PageCache"] = None,
+        pages: Optional[list[int]] = None,
+        adaptive_dpi: bool = False,
+        min_dpi: int = 100,
+        max_dpi: int = 300,
+        vision_model: str = "",
+        vision_min_dpi: int = 80,
+        **kwargs,
+    ) -> Iterator[tuple[int, Union[bytes, str]]]:
+        """
+        Render each PDF page straight from the pixmap to encoded image bytes
+
+        Nothing is written to disk except into the page cache, if one is
+        given. With more than one worker, pages render in separate processes
+        with a bounded number in flight, and are still yielded in page order.
+
+        Args:
+            dpi (int): Output image resolution (default 300)
+            fmt (str): Image format (supports jpg/png, default jpg)
+            as_base64 (bool): Yield base64 strings instead of raw bytes
+            workers (int): Number of render processes (default 1, 0 = all cores)
+            cache (PageCache): Reuse and store rendered pages (optional)
+            pages (List[int]): Page numbers to render, starting from 1 (default all)
+            adaptive_dpi (bool): Choose the resolution per page (see choose_dpi);
+                dpi is then used for pages without text or images
+            min_dpi (int): Lowest adaptive resolution (default 100)
+            max_dpi (int): Highest adaptive resolution (default 300)
+            vision_model (str): Render each page at the size this model keeps,
+                with the fewest image tiles above vision_min_dpi (optional)
+            vision_min_dpi (int): Legibility floor when sizing for a model
+            **kwargs: Additional parameters
+
+        Returns:
+            Iterator[Tuple[int, bytes | str]]: (page number starting from 1, image)
+        """
+        try:
+            page_dpi = self.plan_page_dpis(
+                dpi,
+                pages,
+                adaptive_dpi,
+                min_dpi,
+                max_dpi,
+                vision_model,
+                vision_min_dpi,
+            )
+        except ImportError:
+            logger.error("PyMuPDF not installed. Cannot render PDF pages.")
+            return
+        indexes = list(page_dpi)
+
+        digest = ""
+        missing = indexes
+        if cache is not None:
+            digest = cache.file_digest(self.source_path)
+            missing = [
+                page_index
+                for page_index in missing
+                if not cache.contains(
+                    digest, page_index + self.page_offset, page_dpi[page_index], fmt
+                )
+            ]
+            if len(missing) < len(indexes):
+                logger.info(
+                    "Reusing %d of %d pages from page cache",
+                    len(indexes) - len(missing),
+                    len(indexes),
+                )
+
+        rendered = self._iter_pages(missing, page_dpi, fmt, workers)
+        pending = set(missing)
+
+        for page_index in indexes:
+            data = None
+            if cache is not None and page_index not in pending:
+                data = cache.get(
+                    digest, page_index + self.page_offset, page_dpi[page_index], fmt
+                )
+            if data is None:
+                if page_index in pending:
+                    _, data = next(rendered)
+                else:
+                    # Evicted since the lookup above; render it on its own
+                    _, data = next(
+                        _iter_rendered_pages(
+                            self.input_path, page_dpi, fmt, [page_index]
+                        )
+                    )
+                if cache is not None:
+                    cache.put(
+                        digest,
+                        page_index + self.page_offset,
+                        page_dpi[page_index],
+                        fmt,
+                        data,
+                    )
+            yield page_index + 1, encode_base64(data) if as_base64 else data
+
+    def plan_page_dpis(
+        self,
+        dpi: int = 300,
+        pages: Optional[list[int]] = None,
+        adaptive_dpi: bool = False,
+        min_dpi: int = 100,
+        max_dpi: int = 300,
+        vision_model: str = "",
+        vision_min_dpi: int = 80,
+        **kwargs,
+    ) -> dict[int, float]:
+        """
+        Choose the render resolution of each page to render
+
+        Takes the same render options as iter_page_images.
+
+        Returns:
+            Dict[int, float]: Page index (starts from 0) -> DPI, in render order
+
+        Raises:
+            ImportError: If PyMuPDF is not installed
+        """
+        import fitz  # PyMuPDF
+
+        with fitz.open(self.input_path) as doc:
+            page_count = len(doc)
+
+        if pages is None:
+            indexes = list(range(page_count))
+        else:
+            indexes = [page - 1 for page in pages if 1 <= page <= page_count]
+
+        if adaptive_dpi:
+            chosen = self.choose_page_dpis(dpi, min_dpi, max_dpi)
+            page_dpi = {index: chosen[index + 1] for index in indexes}
+        else:
+            page_dpi = dict.fromkeys(indexes, dpi)
+
+        if vision_model and vision_scheme(vision_model):
+            page_dpi = self._plan_vision_dpis(page_dpi, vision_model, vision_min_dpi)
+        return page_dpi
+
+    def classify_pages(self) -> list[dict[str, Any]]:
+        """
+        Score each page's text layer to decide whether it needs vision
+
+        A page is "text" when it has a readable text layer and no raster
+        images or vector figures; tables drawn with straight rules stay
+        "text" because find_tables rebuilds them. Everything else is "vision".
+
+        Returns:
+            List[dict]: Per page: page, kind, text_chars, text_coverage,
+                image_ratio, curve_drawings, line_drawings
+        """
+        try:
+            import fitz  # PyMuPDF
+        except ImportError:
+            logger.error("PyMuPDF not installed. Cannot classify PDF pages.")
+            return []
+
+        results = []
+        with fitz.open(self.input_path) as doc:
+            for page_index in range(len(doc)):
+                results.append(_classify_page(doc.load_page(page_index), page_index))
+
+        text_pages = sum(1 for result in results if result["kind"] == "text")
+        logger.info("Classified %d of %d pages as text-only", text_pages, len(results))
+        return results
+
+    def text_page_markdown(self, page_num: int) -> str:
+        """
+        Convert a page straight from its text layer, without the LLM
+
+        Args:
+            page_num (int): Page number (starts from 1)
+
+        Returns:
+            str: Markdown for the page
+        """
+        import fitz  # PyMuPDF
+
+        from core.TextLayout import page_to_markdown
+
+        with fitz.open(self.input_path) as doc:
+            return page_to_markdown(doc.load_page(page_num - 1))
+
+    def choose_page_dpis(
+        self, default_dpi: int = 200, min_dpi: int = 100, max_dpi: int = 300
+    ) -> dict[int, int]:
+        """
+        Pick a render resolution for every page (see choose_dpi)
+
+        Args:
+            default_dpi (int): Resolution for pages without text or images
+            min_dpi (int): Lowest resolution
+            max_dpi (int): Highest resolution
+
+        Returns:
+            Dict[int, int]: Page number (starts from 1) -> DPI
+        """
+        import fitz  # PyMuPDF
+
+        with fitz.open(self.input_path) as doc:
+            chosen = {
+                page_index + 1: choose_dpi(
+                    doc.load_page(page_index), default_dpi, min_dpi, max_dpi
+                )
+                for page_index in range(len(doc))
+            }
+
+        if chosen:
+            values = list(chosen.values())
+            logger.info(
+                "Adaptive DPI: %d-%d (average %.0f) across %d pages",
+                min(values),
+                max(values),
+                sum(values) / len(values),
+                len(values),
+            )
+        return chosen
+
+    def _plan_vision_dpis(
+        self, page_dpi: dict[int, float], model: str, min_dpi: int
+    ) -> dict[int, float]:
+        """
+        Lower each page's resolution to the size the model keeps (see
+        VisionTiling.plan_page_size) and log the predicted image tokens
+        """
+        import fitz  # PyMuPDF
+
+        planned = {}
+        total_tokens = 0
+        with fitz.open(self.input_path) as doc:
+            for page_index, dpi in page_dpi.items():
+                rect = doc.load_page(page_index).rect
+                plan = plan_page_size(rect.width, rect.height, dpi, model, min_dpi)
+                planned[page_index] = min(dpi, plan["dpi"])
+                total_tokens += plan["tokens"]
+                logger.debug(
+                    "Page %d: %dx%d px, %d tiles, ~%d image tokens",
+                    page_index + 1,
+                    plan["width"],
+                    plan["height"],
+                    plan["tiles"],
+                    plan["tokens"],
+                )
+
+        if planned:
+            logger.info(
+                "Predicted image tokens for %s: %d (%.0f per page)",
+                model,
+                total_tokens,
+                total_tokens / len(planned),
+            )
+        return planned
+
+    def _iter_pages(
+        self, pages: list[int], dpi: dict[int, float], fmt: str, workers: int
+    ) -> Iterator[tuple[int, bytes]]:
+        """
+        Render the given page indexes in order, in parallel where possible
+        """
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(pages))
+
+        if workers <= 1:
+            yield from _iter_rendered_pages(self.input_path, dpi, fmt, pages)
+            return
+
+        rendered = 0
+        try:
+            for page in self._iter_rendered_parallel(pages, dpi, fmt, workers):
+                rendered += 1
+                yield page
+        except (BrokenProcessPool, PicklingError, AttributeError) as e:
+            logger.warning(
+                f"Parallel rendering unavailable ({str(e)}), rendering serially"
+            )
+            yield from _iter_rendered_pages(self.input_path, dpi, fmt, pages[rendered:])
+
+    def _iter_rendered_parallel(
+        self, pages: list[int], dpi: dict[int, float], fmt: str, workers: int
+    ) -> Iterator[tuple[int, bytes]]:
+        """
+        Render pages in worker processes, keeping at most 2x workers in flight
+        """
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_open_render_document,
+            initargs=(self.input_path,),
+        ) as executor:
+            pending = deque()
+            remaining = iter(pages)
+            for page_index in remaining:
+                pending.append(
+                    (
+                        page_index,
+                        executor.submit(
+                            _render_page_bytes, page_index, dpi[page_index], fmt
+                        ),
+                    )
+                )
+                if len(pending) >= workers * 2:
+                    done_index, future = pending.popleft()
+                    yield done_index, future.result()
+            while pending:
+                done_index, future = pending.popleft()
+                yield done_index, future.result()
+
+
+def _classify_page(page: Any, page_index: int) -> dict[str, Any]:
+    """Score one page for classify_pages"""
+    page_area = abs(page.rect) or 1.0
+
+    text = page.get_text("text")
+    text_chars = len(text.strip())
+    garbled = text.count("\ufffd")
+
+    text_area = 0.0
+    for block in page.get_text("blocks"):
+        if block[6] == 0:
+            text_area += abs(page.rect & block[:4])
+
+    image_area = 0.0
+    for info in page.get_image_info():
+        image_area += abs(page.rect & info["bbox"])
+
+    curve_drawings = 0
+    line_drawings = 0
+    for drawing in page.get_drawings():
+        kinds = {item[0] for item in drawing["items"]}
+        if kinds & {"c", "qu"}:
+            curve_drawings += 1
+        else:
+            line_drawings += 1
+
+    image_ratio = min(1.0, image_area / page_area)
+    is_text = (
+        text_chars >= MIN_TEXT_CHARS
+        and image_ratio <= MAX_IMAGE_RATIO
+        and curve_drawings <= MAX_CURVE_DRAWINGS
+        and line_drawings <= MAX_LINE_DRAWINGS
+        and garbled <= text_chars * MAX_GARBLED_RATIO
+    )
+
+    return {
+        "page": page_index + 1,
+        "kind": "text" if is_text else "vision",
+        "text_chars": text_chars,
+        "text_coverage": round(min(1.0, text_area / page_area), 3),
+        "image_ratio": round(image_ratio, 3),
+        "curve_drawings": curve_drawings,
+        "line_drawings": line_drawings,
+    }
+
+
+def choose_dpi(page: Any, default_dpi: int, min_dpi: int, max_dpi: int) -> int:
+    """
+    Choose the lowest resolution that keeps a page legible
+
+    The page's small print (ignoring the smallest few characters) must render
+    at least MIN_FONT_PIXELS tall, and raster images covering a meaningful
+    part of the page are rendered at up to their native resolution. Large
+    pages are capped so their long edge stays within MAX_LONG_SIDE_PIXELS.
+    Pages with neither text nor images (e.g. outlined vector art) use
+    default_dpi.
+
+    Args:
+        page: PyMuPDF page
+        default_dpi (int): Resolution for pages without text or images
+        min_dpi (int): Lowest resolution
+        max_dpi (int): Highest resolution
+
+    Returns:
+        int: DPI rounded up to a multiple of 10
+    """
+    wanted = []
+
+    sizes: Counter = Counter()
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", []):
+            for span in line["spans"]:
+                chars = len(span["text"].strip())
+                if chars and span["size"] > 0:
+                    sizes[span["size"]] += chars
+    if sizes:
+        skip = sum(sizes.values()) * SMALL_FONT_PERCENTILE
+        for size in sorted(sizes):
+            skip -= sizes[size]
+            if skip < 0:
+                wanted.append(72.0 * MIN_FONT_PIXELS / size)
+                break
+
+    page_area = abs(page.rect) or 1.0
+    for info in page.get_image_info():
+        bbox = page.rect & info["bbox"]
+        if abs(bbox) / page_area >= MIN_IMAGE_RATIO and bbox.width > 0:
+            wanted.append(info["width"] / (bbox.width / 72.0))
+
+    dpi = max(wanted) if wanted else default_dpi
+    long_side = max(page.rect.width, page.rect.height) / 72.0
+    if long_side > 0:
+        dpi = min(dpi, MAX_LONG_SIDE_PIXELS / long_side)
+
+    dpi = max(min_dpi, min(max_dpi, dpi))
+    return int(math.ceil(dpi / 10.0) * 10)
+
+
+def _split_page_range(page_count: int, parts: int) -> list[tuple[int, int]]:
+    """
+    Split [0, page_count) into contiguous, nearly equal (first, last) slices
+
+    Args:
+        page_count (int): Number of pages in the document
+        parts (int): Number of slices to produce
+
+    Returns:
+        List[Tuple[int, int]]: Half-open page index ranges in page order
+    """
+    parts = max(1, min(parts, page_count))
+    base, extra = divmod(page_count, parts)
+    slices = []
+    first = 0
+    for index in range(parts):
+        last = first + base + (1 if index < extra else 0)
+        slices.append((first, last))
+        first = last
+    return slices
+
+
+def _render_page_range(
+    input_path: str, first: int, last: int, output_dir: str, dpi: int, fmt: str
+) -> list[str]:
+    """
+    Render pages [first, last) of a PDF to image files
+
+    Module-level so it can run inside a worker process; it opens its own
+    document handle rather than sharing one across processes.
+
+    Returns:
+        List[str]: Generated image paths, in page order
+    """
+    import fitz  # PyMuPDF
+
+    # Convert DPI to zoom factor (72 DPI is baseline)
+    zoom = dpi / 72.0
+    mat = fitz.Matrix(zoom, zoom)
+    img_paths = []
+
+    with fitz.open(input_path) as doc:
+        for page_num in range(first, last):
+            page = doc.load_page(page_num)
+            pix = page.get_pixmap(matrix=mat)  # type: ignore
+            output_path = os.path.join(output_dir, f"page_{page_num + 1:04d}.{fmt}")
+            pix.save(output_path)
+            img_paths.append(output_path)
+
+    return img_paths
+
+
+def _iter_rendered_pages(
+    input_path: str,
+    dpi: Union[int, dict[int, float]],
+    fmt: str,
+    pages: Optional[list[int]] = None,
+) -> Iterator[tuple[int, bytes]]:
+    """
+    Render the given page indexes (default: all) to encoded image bytes in memory
+
+    dpi is either one resolution for every page or a page index -> DPI map.
+    """
+    import fitz  # PyMuPDF
+
+    with fitz.open(input_path) as doc:
+        for page_num in range(len(doc)) if pages is None else pages:
+            zoom = (dpi[page_num] if isinstance(dpi, dict) else dpi) / 72.0
+            mat = fitz.Matrix(zoom, zoom)
+            pix = doc.load_page(page_num).get_pixmap(matrix=mat)  # type: ignore
+            yield page_num, pix.tobytes(output=fmt)
+
+
+# Per-process document handle used by in-memory parallel rendering
+_render_document = None
+
+
+def _open_render_document(input_path: str) -> None:
+    """Pool initializer: open the PDF once per worker process"""
+    import fitz  # PyMuPDF
+
+    global _render_document
+    _render_document = fitz.open(input_path)
+
+
+def _render_page_bytes(page_index: int, dpi: float, fmt: str) -> bytes:
+    """Render one page of the worker's document to encoded image bytes"""
+    import fitz  # PyMuPDF
+
+    zoom = dpi / 72.0
+    pix = _render_document.load_page(page_index).get_pixmap(  # type: ignore
+        matrix=fitz.Matrix(zoom, zoom)
+    )
+    return pix.tobytes(output=fmt)
@@ -0,0 +1,241 @@
+"""
+Page Cache - Persistent cache of rendered PDF pages
+
+Enhanced by Joseph Wright (github: ch0t4nk) for enterprise use
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Eviction trims the cache to this fraction of max_bytes, so it runs once per
+# batch of inserts rather than on every insert once the cache is full
+EVICT_LOW_WATER = 0.9
+
+_shared_caches: dict[str, "PageCache"] = {}
+_shared_lock = threading.Lock()
+
+
+class PageCache:
+    """
+    Directory cache of encoded page images
+
+    Pages are keyed by (sha256 of the PDF, page index, DPI, colorspace,
+    format), so any run over the same document bytes and render settings
+    reuses earlier renders. Files are written atomically and the least
+    recently used ones are removed once the cache exceeds max_bytes, down to
+    EVICT_LOW_WATER of it. Sizes and last use are tracked in memory after one
+    scan of the directory when the cache is opened.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 0) -> None:
+        """
+        Open (or create) a cache directory
+
+        Args:
+            root: Cache directory
+            max_bytes: Evict least recently used pages above this size (0 = no limit)
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._digests: dict[tuple[str, int, float], str] = {}
+
+        os.makedirs(root, exist_ok=True)
+        # path -> (last used, size)
+        self._entries: dict[str, tuple[float, int]] = {
+            path: (last_used, size) for last_used, path, size in self._scan()
+        }
+        self._total_bytes = sum(size for _, size in self._entries.values())
+
+    def file_digest(self, path: str) -> str:
+        """
+        SHA-256 of a file, memoized by path, size and modification time
+
+        Returns:
+            str: Hex digest
+        """
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+        digest = self._digests.get(memo_key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    sha.update(block)
+            digest = sha.hexdigest()
+            self._digests[memo_key] = digest
+        return digest
+
+    def path_for(
+        self,
+        digest: str,
+        page_index: int,
+        dpi: int,
+        fmt: str,
+        colorspace: str = "rgb",
+    ) -> str:
+        """
+        Location of a cached page
+
+        Args:
+            digest: Document digest from file_digest
+            page_index: Page index (starts from 0)
+            dpi: Render resolution
+            fmt: Image format (jpg/png)
+            colorspace: Pixmap colorspace
+
+        Returns:
+            str: File path (which may not exist yet)
+        """
+        name = f"p{page_index:05d}_{dpi}dpi_{colorspace}.{fmt}"
+        return os.path.join(self.root, digest[:2], digest, name)
+
+    def contains(
+        self, digest: str, page_index: int, dpi: int, fmt: str, colorspace: str = "rgb"
+    ) -> bool:
+        """Check whether a page is cached"""
+        return os.path.exists(self.path_for(digest, page_index, dpi, fmt, colorspace))
+
+    def get(
+        self, digest: str, page_index: int, dpi: int, fmt: str, colorspace: str = "rgb"
+    ) -> Optional[bytes]:
+        """
+        Read a cached page and mark it as recently used
+
+        Returns:
+            bytes: Encoded image, or None on a miss
+        """
+        path = self.path_for(digest, page_index, dpi, fmt, colorspace)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                # Written by another process sharing the directory
+                self._total_bytes += len(data)
+            self._entries[path] = (time.time(), len(data))
+        return data
+
+    def put(
+        self,
+        digest: str,
+        page_index: int,
+        dpi: int,
+        fmt: str,
+        data: bytes,
+        colorspace: str = "rgb",
+    ) -> None:
+        """
+        Store a rendered page
+
+        Args:
+            digest: Document digest from file_digest
+            page_index: Page index (starts from 0)
+            dpi: Render resolution
+            fmt: Image format (jpg/png)
+            data: Encoded image bytes
+            colorspace: Pixmap colorspace
+        """
+        path = self.path_for(digest, page_index, dpi, fmt, colorspace)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache rendered page: {str(e)}")
+            return
+
+        with self._lock:
+            _, old_size = self._entries.get(path, (0.0, 0))
+            self._entries[path] = (time.time(), len(data))
+            self._total_bytes += len(data) - old_size
+            due = self.max_bytes > 0 and self._total_bytes > self.max_bytes
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Remove least recently used pages once the cache exceeds max_bytes
+
+        Pages are removed until the cache is at EVICT_LOW_WATER of max_bytes.
+
+        Returns:
+            int: Number of pages removed
+        """
+        with self._lock:
+            if self.max_bytes <= 0 or self._total_bytes <= self.max_bytes:
+                return 0
+            target = self.max_bytes * EVICT_LOW_WATER
+            entries = sorted(
+                (last_used, path, size)
+                for path, (last_used, size) in self._entries.items()
+            )
+            removed = 0
+            for _, path, size in entries:
+                if self._total_bytes <= target:
+                    break
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass  # Already removed by another process
+                except OSError:
+                    continue
+                del self._entries[path]
+                self._total_bytes -= size
+
+        if removed:
+            logger.info("Evicted %d cached pages", removed)
+        return removed
+
+    def _scan(self) -> list[tuple[float, str, int]]:
+        """List cached pages as (last used, path, size)"""
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+
+def get_shared_page_cache(root: str, **options) -> PageCache:
+    """
+    Get the process-wide PageCache for a directory
+
+    Args:
+        root: Cache directory
+        **options: Passed to PageCache on first use
+
+    Returns:
+        PageCache: Shared, thread-safe cache
+    """
+    root = os.path.abspath(root)
+    with _shared_lock:
+        cache = _shared_caches.get(root)
+        if cache is None:
+            cache = PageCache(root, **options)
+            _shared_caches[root] = cache
+        return cache
@@ -0,0 +1,218 @@
+"""
+Pipeline - Streaming render -> encode -> LLM stages with bounded queues
+
+Enhanced by Joseph Wright (github: ch0t4nk) for enterprise use
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from .FileWorker import FileWorker, encode_base64
+
+logger = logging.getLogger(__name__)
+
+# Sentinel marking the end of a stage's output
+_DONE = object()
+
+
+class _StageError:
+    """Wraps an exception raised inside a stage thread"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def staged(
+    source: Iterable[Any],
+    func: Callable[[Any], Any],
+    maxsize: int = 2,
+    name: str = "stage",
+) -> Iterator[Any]:
+    """
+    Apply func to each item of source in a background thread
+
+    Results are handed over through a queue of at most maxsize items, so the
+    stage runs ahead of its consumer by no more than maxsize items. Exceptions
+    raised in the stage are re-raised in the consumer.
+
+    Args:
+        source: Input items (may itself be another stage)
+        func: Function applied to each item
+        maxsize: Queue depth between this stage and its consumer
+        name: Thread name, used in logs
+
+    Returns:
+        Iterator: func(item) for each item, in source order
+    """
+    output: queue.Queue = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        # Poll so an abandoned consumer does not leave the thread blocked
+        while not stop.is_set():
+            try:
+                output.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run() -> None:
+        try:
+            for item in source:
+                if not put(func(item)):
+                    return
+        except BaseException as e:  # pylint: disable=broad-except
+            put(_StageError(e))
+        finally:
+            put(_DONE)
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = output.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+
+
+def ordered_map(
+    func: Callable[[Any], Any], source: Iterable[Any], concurrency: int = 4
+) -> Iterator[Any]:
+    """
+    Apply func to items of source on a thread pool, yielding results in order
+
+    At most `concurrency` calls are in flight at any time; a slow item holds
+    back later results until it finishes, so output order matches input order.
+
+    Args:
+        func: Function applied to each item
+        source: Input items
+        concurrency: Maximum number of calls in flight
+
+    Returns:
+        Iterator: func(item) for each item, in source order
+    """
+    concurrency = max(1, concurrency)
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="llm"
+    ) as executor:
+        pending: deque = deque()
+        for item in source:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= concurrency:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def convert_pages(
+    worker: FileWorker,
+    convert: Callable[[str], str],
+    queue_depth: int = 2,
+    concurrency: int = 1,
+    text_fast_path: bool = False,
+    **render_kwargs,
+) -> Iterator[tuple[int, str, float]]:
+    """
+    Stream pages through render -> encode -> LLM stages
+
+    Page N+1 renders and encodes while page N is with the model. Each stage
+    holds at most queue_depth pages, so memory scales with the queue depth
+    rather than the document length. With concurrency > 1, up to that many
+    pages are with the model at once and results still come back in order.
+
+    With text_fast_path, pages the worker classifies as text-only are
+    converted locally from the text layer and never rendered or sent to the
+    model; they are merged back into the output in page order.
+
+    Args:
+        worker: File worker providing iter_page_images
+        convert: Function turning a base64 page image into markdown
+        queue_depth: Queue depth between stages
+        concurrency: Number of LLM requests kept in flight
+        text_fast_path: Convert text-only pages locally instead of via the LLM
+        **render_kwargs: Passed to worker.iter_page_images
+
+    Returns:
+        Iterator[Tuple[int, str, float]]: (page number, markdown, seconds spent
+            converting the page)
+    """
+    local_pages: deque = deque()
+    if text_fast_path:
+        classified = worker.classify_pages()
+        if classified:
+            local_pages.extend(c["page"] for c in classified if c["kind"] == "text")
+            render_kwargs["pages"] = [
+                c["page"] for c in classified if c["kind"] != "text"
+            ]
+            logger.info(
+                "Text fast path: %d of %d pages converted locally",
+                len(local_pages),
+                len(classified),
+            )
+
+    def convert_local(page_num: int) -> tuple[int, str, float]:
+        logger.info("Converting page %d from its text layer", page_num)
+        start_time = time.time()
+        content = worker.text_page_markdown(page_num)
+        return page_num, content, time.time() - start_time
+
+    for page_num, content, seconds in _convert_rendered_pages(
+        worker, convert, queue_depth, concurrency, render_kwargs
+    ):
+        while local_pages and local_pages[0] < page_num:
+            yield convert_local(local_pages.popleft())
+        yield page_num, content, seconds
+    while local_pages:
+        yield convert_local(local_pages.popleft())
+
+
+def _convert_rendered_pages(
+    worker: FileWorker,
+    convert: Callable[[str], str],
+    queue_depth: int,
+    concurrency: int,
+    render_kwargs: dict[str, Any],
+) -> Iterator[tuple[int, str, float]]:
+    """Render -> encode -> LLM stages behind convert_pages"""
+
+    def encode(page: tuple[int, Any]) -> tuple[int, str]:
+        page_num, image = page
+        if isinstance(image, bytes):
+            image = encode_base64(image)
+        return page_num, image
+
+    def complete(page: tuple[int, str]) -> tuple[int, str, float]:
+        page_num, image = page
+        logger.info("Converting page %d to Markdown", page_num)
+        start_time = time.time()
+        content = convert(image)
+        return page_num, content, time.time() - start_time
+
+    rendered = staged(
+        worker.iter_page_images(**render_kwargs),
+        lambda page: page,
+        queue_depth,
+        "render",
+    )
+    encoded = staged(rendered, encode, queue_depth, "encode")
+    if concurrency <= 1:
+        yield from staged(encoded, complete, queue_depth, "llm")
+    else:
+        completed = ordered_map(complete, encoded, concurrency)
+        yield from staged(completed, lambda page: page, queue_depth, "collect")
@@ -0,0 +1,203 @@
+"""
+Response Cache - Persistent content-addressed cache for LLM page conversions
+
+Enhanced by Joseph Wright (github: ch0t4nk) for enterprise use
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Run eviction after this many inserts
+EVICT_EVERY = 100
+
+_shared_caches: dict[str, "ResponseCache"] = {}
+_shared_lock = threading.Lock()
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of model responses
+
+    Entries are keyed by a hash of everything that determines the output
+    (model, prompts, sampling parameters and image bytes) and hold the
+    generated markdown plus its token usage.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0, max_age_days: float = 0) -> None:
+        """
+        Open (or create) a cache database
+
+        Args:
+            path: SQLite database file
+            max_bytes: Evict least recently used entries above this size (0 = no limit)
+            max_age_days: Evict entries unused for this many days (0 = no limit)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._inserts = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                usage TEXT,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        system_prompt: Optional[str],
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        images: Optional[list[Union[bytes, str]]] = None,
+    ) -> str:
+        """
+        Hash the inputs that determine a response
+
+        Images may be raw bytes or base64 strings; both hash to the same key.
+
+        Returns:
+            str: Hex SHA-256 digest
+        """
+        digest = hashlib.sha256()
+        header = json.dumps(
+            [model, system_prompt or "", user_prompt, temperature, max_tokens]
+        )
+        digest.update(header.encode("utf-8"))
+        for image in images or []:
+            if isinstance(image, str):
+                image = base64.b64decode(image)
+            digest.update(hashlib.sha256(image).digest())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        """
+        Look up a cached response
+
+        Returns:
+            dict: {"content": str, "usage": dict} or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, usage FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return {"content": row[0], "usage": json.loads(row[1]) if row[1] else {}}
+
+    def put(self, key: str, content: str, usage: Optional[dict[str, Any]] = None):
+        """
+        Store a response
+
+        Args:
+            key: Key from make_key
+            content: Generated markdown
+            usage: Token usage reported by the API (optional)
+        """
+        usage_json = json.dumps(usage or {})
+        size = len(content.encode("utf-8")) + len(usage_json)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, content, usage_json, size, now, now),
+            )
+            self._conn.commit()
+            self._inserts += 1
+            due = self._inserts % EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Drop expired entries, then least recently used ones above max_bytes
+
+        Returns:
+            int: Number of entries removed
+        """
+        removed = 0
+        with self._lock:
+            if self.max_age_days > 0:
+                cutoff = time.time() - self.max_age_days * 86400
+                removed += self._conn.execute(
+                    "DELETE FROM responses WHERE last_used < ?", (cutoff,)
+                ).rowcount
+
+            if self.max_bytes > 0:
+                total = self._conn.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()[0]
+                if total > self.max_bytes:
+                    stale = []
+                    for key, size in self._conn.execute(
+                        "SELECT key, size FROM responses ORDER BY last_used"
+                    ):
+                        if total <= self.max_bytes:
+                            break
+                        stale.append((key,))
+                        total -= size
+                    self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+                    removed += len(stale)
+
+            self._conn.commit()
+
+        if removed:
+            logger.info("Evicted %d cached responses", removed)
+        return removed
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+def get_shared_cache(path: str, **options) -> ResponseCache:
+    """
+    Get the process-wide ResponseCache for a database path
+
+    Args:
+        path: SQLite database file
+        **options: Passed to ResponseCache on first use
+
+    Returns:
+        ResponseCache: Shared, thread-safe cache
+    """
+    path = os.path.abspath(path)
+    with _shared_lock:
+        cache = _shared_caches.get(path)
+        if cache is None:
+            cache = ResponseCache(path, **options)
+            _shared_caches[path] = cache
+        return cache
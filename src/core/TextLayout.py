@@ -0,0 +1,209 @@
+"""
+Text Layout - Local PDF text layer to Markdown conversion
+
+Converts born-digital pages straight from the PyMuPDF text layer: font size
+decides heading levels, bullet and number prefixes become lists, and ruled
+or aligned tables are rebuilt with find_tables.
+
+Enhanced by Joseph Wright (github: ch0t4nk) for enterprise use
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+"""
+
+import logging
+import re
+from collections import Counter
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Lines this much larger than body text become headings
+HEADING_SIZE_RATIO = 1.15
+
+# Distinct heading sizes mapped to #, ##, ###, ...
+MAX_HEADING_LEVELS = 4
+
+# Span font flags (see PyMuPDF TextPage documentation)
+FLAG_ITALIC = 2
+FLAG_MONOSPACE = 8
+FLAG_BOLD = 16
+
+BULLET_RE = re.compile(r"^([•·◦▪●‣⁃∙]\s*|[-–*]\s+)")
+NUMBERED_RE = re.compile(r"^(\(?\d{1,3}[.)]|\(?[a-zA-Z][.)])\s+")
+
+
+def page_to_markdown(page: Any) -> str:
+    """
+    Convert one PDF page to Markdown using its text layer only
+
+    Args:
+        page: PyMuPDF page
+
+    Returns:
+        str: Markdown for the page
+    """
+    tables = _find_tables(page)
+    table_rects = [rect for rect, _ in tables]
+
+    blocks = []
+    for block in page.get_text("dict", sort=True)["blocks"]:
+        if block.get("type") != 0:
+            continue
+        lines = [
+            line
+            for line in block["lines"]
+            if line["spans"] and not _inside_any(line["bbox"], table_rects)
+        ]
+        if lines:
+            blocks.append((block["bbox"][1], lines))
+
+    body_size = _body_font_size(blocks)
+    heading_levels = _heading_levels(blocks, body_size)
+
+    # Interleave text blocks and tables by their vertical position
+    items: list[tuple[float, str]] = []
+    for top, lines in blocks:
+        markdown = _block_to_markdown(lines, heading_levels)
+        if markdown:
+            items.append((top, markdown))
+    for rect, markdown in tables:
+        items.append((rect[1], markdown))
+    items.sort(key=lambda item: item[0])
+
+    return "\n\n".join(markdown for _, markdown in items).strip()
+
+
+def _find_tables(page: Any) -> list[tuple[tuple, str]]:
+    """Locate tables and render each as a Markdown table"""
+    import fitz  # PyMuPDF
+
+    # find_tables otherwise prints a layout-package suggestion to stdout
+    if hasattr(fitz, "no_recommend_layout"):
+        fitz.no_recommend_layout()
+
+    try:
+        found = page.find_tables()
+    except Exception as e:  # pylint: disable=broad-except
+        logger.warning(f"Table detection failed: {str(e)}")
+        return []
+
+    tables = []
+    for table in found.tables:
+        markdown = table.to_markdown(clean=False).strip()
+        if markdown:
+            tables.append((tuple(table.bbox), markdown))
+    return tables
+
+
+def _inside_any(bbox: tuple, rects: list[tuple]) -> bool:
+    """Whether the centre of bbox falls inside any of rects"""
+    x = (bbox[0] + bbox[2]) / 2
+    y = (bbox[1] + bbox[3]) / 2
+    return any(r[0] <= x <= r[2] and r[1] <= y <= r[3] for r in rects)
+
+
+def _line_size(line: dict[str, Any]) -> float:
+    """Largest font size on a line, rounded to half a point"""
+    return round(max(span["size"] for span in line["spans"]) * 2) / 2
+
+
+def _line_text(line: dict[str, Any]) -> str:
+    """Line text with inline bold/italic/code markers"""
+    parts = []
+    for span in line["spans"]:
+        text = span["text"]
+        if not text.strip():
+            parts.append(text)
+            continue
+        flags = span["flags"]
+        lead = text[: len(text) - len(text.lstrip())]
+        trail = text[len(text.rstrip()) :]
+        core = text.strip()
+        if flags & FLAG_MONOSPACE:
+            core = f"`{core}`"
+        elif flags & FLAG_BOLD:
+            core = f"**{core}**"
+        elif flags & FLAG_ITALIC:
+            core = f"*{core}*"
+        parts.append(f"{lead}{core}{trail}")
+    return "".join(parts).strip()
+
+
+def _body_font_size(blocks: list[tuple[float, list]]) -> float:
+    """Most common font size weighted by character count"""
+    sizes: Counter = Counter()
+    for _, lines in blocks:
+        for line in lines:
+            for span in line["spans"]:
+                sizes[round(span["size"] * 2) / 2] += len(span["text"].strip())
+    return sizes.most_common(1)[0][0] if sizes else 0.0
+
+
+def _heading_levels(
+    blocks: list[tuple[float, list]], body_size: float
+) -> dict[float, int]:
+    """Map font sizes clearly above body text to heading levels"""
+    sizes = {
+        _line_size(line)
+        for _, lines in blocks
+        for line in lines
+        if _line_size(line) >= body_size * HEADING_SIZE_RATIO
+    }
+    ordered = sorted(sizes, reverse=True)[:MAX_HEADING_LEVELS]
+    return {size: level for level, size in enumerate(ordered, 1)}
+
+
+def _block_to_markdown(lines: list[dict[str, Any]], heading_levels: dict) -> str:
+    """Turn one text block into headings, list items and paragraphs"""
+    output: list[str] = []
+    paragraph: list[str] = []
+    item_x0 = None  # left edge of the current list item, if any
+
+    def flush() -> None:
+        if paragraph:
+            output.append(_join_lines(paragraph))
+            paragraph.clear()
+
+    for line in lines:
+        plain = "".join(span["text"] for span in line["spans"]).strip()
+        if not plain:
+            continue
+        x0 = line["bbox"][0]
+
+        level = heading_levels.get(_line_size(line))
+        if level:
+            flush()
+            item_x0 = None
+            if output and output[-1].startswith("#" * level + " "):
+                # Wrapped heading: continue the previous heading line
+                output[-1] += " " + plain
+            else:
+                output.append(f"{'#' * level} {plain}")
+            continue
+
+        bullet = BULLET_RE.match(plain)
+        if (bullet and len(plain) > bullet.end()) or NUMBERED_RE.match(plain):
+            flush()
+            item_x0 = x0
+            text = "- " + plain[bullet.end() :] if bullet else plain
+            output.append(text)
+        elif item_x0 is not None and x0 > item_x0 + 2:
+            # Indented continuation of a wrapped list item
+            output[-1] = _join_lines([output[-1], _line_text(line)])
+        else:
+            item_x0 = None
+            paragraph.append(_line_text(line))
+
+    flush()
+    return "\n".join(output)
+
+
+def _join_lines(lines: list[str]) -> str:
+    """Join wrapped lines, undoing end-of-line hyphenation"""
+    joined = lines[0]
+    for line in lines[1:]:
+        if joined.endswith("-") and line[:1].islower():
+            joined = joined[:-1] + line
+        else:
+            joined += " " + line
+    return joined
@@ -0,0 +1,288 @@
+"""
+Vision Tiling - Image sizing and token prediction for OpenAI-style vision models
+
+High-detail images are downscaled by the provider before they are billed:
+tile models fit the image within 2048x2048, shrink its shortest side to 768px
+and charge per 512px tile; patch models charge per 32px patch up to a cap.
+Rendering pages at exactly the size the model keeps avoids uploading pixels
+that are thrown away, and lets the tile count be minimised up front.
+
+Enhanced by Joseph Wright (github: ch0t4nk) for enterprise use
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+"""
+
+import base64
+import logging
+import math
+import struct
+from typing import Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Tile models: (base tokens, tokens per 512px tile), matched by name prefix
+TILE_MODELS = {
+    "gpt-4o-mini": (2833, 5667),
+    "gpt-4o": (85, 170),
+    "gpt-4.1": (85, 170),
+    "gpt-4.5": (85, 170),
+    "gpt-4-turbo": (85, 170),
+    "gpt-5": (70, 140),
+    "o1": (75, 150),
+    "o3": (75, 150),
+}
+
+# Patch models: token multiplier applied to the 32px patch count
+PATCH_MODELS = {
+    "gpt-4.1-mini": 1.62,
+    "gpt-4.1-nano": 2.46,
+    "gpt-5-mini": 1.62,
+    "gpt-5-nano": 2.46,
+    "o4-mini": 1.72,
+}
+
+TILE_SIZE = 512
+MAX_SIDE = 2048
+SHORT_SIDE = 768
+PATCH_SIZE = 32
+MAX_PATCHES = 1536
+
+
+def _prefix_len(table: dict, model: str) -> int:
+    """Length of the longest table key prefixing the model name (0 = none)"""
+    name = model.lower().split("/")[-1]
+    return max((len(key) for key in table if name.startswith(key)), default=0)
+
+
+def _lookup(table: dict, model: str) -> Any:
+    """Longest-prefix match of a model name in a pricing table"""
+    name = model.lower().split("/")[-1]
+    matches = [key for key in table if name.startswith(key)]
+    return table[max(matches, key=len)] if matches else None
+
+
+def vision_scheme(model: str) -> str:
+    """
+    How a model bills images
+
+    Returns:
+        str: "patch", "tile", or "" when the model is unknown
+    """
+    patch = _prefix_len(PATCH_MODELS, model)
+    tile = _prefix_len(TILE_MODELS, model)
+    if patch and patch >= tile:
+        return "patch"
+    return "tile" if tile else ""
+
+
+def served_size(width: int, height: int, model: str) -> tuple[int, int]:
+    """
+    Size the provider actually keeps for a high-detail image
+
+    Args:
+        width: Uploaded width in pixels
+        height: Uploaded height in pixels
+        model: Model name
+
+    Returns:
+        Tuple[int, int]: Width and height after server-side downscaling
+    """
+    scheme = vision_scheme(model)
+    if scheme == "patch":
+        patches = math.ceil(width / PATCH_SIZE) * math.ceil(height / PATCH_SIZE)
+        if patches <= MAX_PATCHES:
+            return width, height
+        scale = math.sqrt(PATCH_SIZE * PATCH_SIZE * MAX_PATCHES / (width * height))
+        # Shrink further so whole patches fit within the cap
+        scale *= min(
+            math.floor(width * scale / PATCH_SIZE) / (width * scale / PATCH_SIZE),
+            math.floor(height * scale / PATCH_SIZE) / (height * scale / PATCH_SIZE),
+        )
+        return max(1, int(width * scale)), max(1, int(height * scale))
+
+    if scheme == "tile":
+        scale = min(1.0, MAX_SIDE / max(width, height))
+        short = min(width, height) * scale
+        if short > SHORT_SIDE:
+            scale *= SHORT_SIDE / short
+        return max(1, int(width * scale)), max(1, int(height * scale))
+
+    return width, height
+
+
+def image_tokens(width: int, height: int, model: str) -> int:
+    """
+    Predicted prompt tokens for one high-detail image
+
+    Args:
+        width: Uploaded width in pixels
+        height: Uploaded height in pixels
+        model: Model name
+
+    Returns:
+        int: Image tokens, or 0 when the model's pricing is unknown
+    """
+    scheme = vision_scheme(model)
+    w, h = served_size(width, height, model)
+    if scheme == "patch":
+        patches = min(
+            MAX_PATCHES, math.ceil(w / PATCH_SIZE) * math.ceil(h / PATCH_SIZE)
+        )
+        return math.ceil(patches * _lookup(PATCH_MODELS, model))
+    if scheme == "tile":
+        base, per_tile = _lookup(TILE_MODELS, model)
+        tiles = math.ceil(w / TILE_SIZE) * math.ceil(h / TILE_SIZE)
+        return base + per_tile * tiles
+    return 0
+
+
+def plan_page_size(
+    width_pt: float, height_pt: float, dpi: float, model: str, min_dpi: float = 80
+) -> dict[str, Any]:
+    """
+    Choose the render size for a page that the model keeps in full
+
+    Starts from the page at `dpi`, shrinks it to the size the provider would
+    downscale to anyway, then (for tile models) drops whole rows or columns of
+    tiles while the effective resolution stays at or above min_dpi.
+
+    Args:
+        width_pt: Page width in points
+        height_pt: Page height in points
+        dpi: Requested render resolution (upper bound)
+        model: Model name
+        min_dpi: Legibility floor for the effective resolution
+
+    Returns:
+        dict: width, height, dpi (render resolution), tiles, tokens
+    """
+    width = max(1, int(width_pt * dpi / 72.0))
+    height = max(1, int(height_pt * dpi / 72.0))
+    served_w, served_h = served_size(width, height, model)
+    scale = served_w / width
+
+    if vision_scheme(model) == "tile":
+        floor = min(1.0, min_dpi / dpi) if dpi > 0 else 1.0
+        best = (
+            math.ceil(served_w / TILE_SIZE) * math.ceil(served_h / TILE_SIZE),
+            scale,
+        )
+        for cols in range(1, math.ceil(served_w / TILE_SIZE) + 1):
+            for rows in range(1, math.ceil(served_h / TILE_SIZE) + 1):
+                fit = min(cols * TILE_SIZE / width, rows * TILE_SIZE / height, scale)
+                tiles = math.ceil(width * fit / TILE_SIZE) * math.ceil(
+                    height * fit / TILE_SIZE
+                )
+                if fit >= floor and (tiles, -fit) < (best[0], -best[1]):
+                    best = (tiles, fit)
+        scale = best[1]
+
+    # Renderers round pixmap sizes up, so derive the resolution from the
+    # target pixel size and round it down; the page then never spills into
+    # another tile or patch
+    target_w = max(1, int(width * scale))
+    target_h = max(1, int(height * scale))
+    render_dpi = min(target_w * 72.0 / width_pt, target_h * 72.0 / height_pt)
+    render_dpi = math.floor(render_dpi * 100) / 100
+    width = math.ceil(width_pt * render_dpi / 72.0)
+    height = math.ceil(height_pt * render_dpi / 72.0)
+    tokens = image_tokens(width, height, model)
+    tiles = math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE)
+
+    return {
+        "width": width,
+        "height": height,
+        "dpi": render_dpi,
+        "tiles": tiles,
+        "tokens": tokens,
+    }
+
+
+def image_size(image: Union[bytes, str]) -> Optional[tuple[int, int]]:
+    """
+    Read width and height from a PNG or JPEG header without decoding pixels
+
+    Args:
+        image: Encoded image bytes or a base64 string
+
+    Returns:
+        Tuple[int, int]: (width, height), or None if the format is not recognised
+    """
+    if isinstance(image, str):
+        # Headers sit near the start; decode a prefix before the whole image
+        data = base64.b64decode(image[:8192])
+        size = _header_size(data)
+        return size if size else _header_size(base64.b64decode(image))
+    return _header_size(image)
+
+
+def _header_size(data: bytes) -> Optional[tuple[int, int]]:
+    """Parse PNG IHDR or the first JPEG SOFn segment"""
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return width, height
+
+    if data[:2] == b"\xff\xd8":
+        offset = 2
+        while offset + 9 < len(data):
+            if data[offset] != 0xFF:
+                offset += 1
+                continue
+            marker = data[offset + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+                offset += 1 if marker == 0xFF else 2
+                continue
+            length = struct.unpack(">H", data[offset + 2 : offset + 4])[0]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", data[offset + 5 : offset + 9])
+                return width, height
+            offset += 2 + length
+    return None
+
+
+def predict_image_tokens(images: list[Union[bytes, str]], model: str) -> int:
+    """
+    Predicted image tokens for a request's images
+
+    Args:
+        images: Encoded images as bytes or base64 strings
+        model: Model name
+
+    Returns:
+        int: Total predicted image tokens (images of unknown format count as 0)
+    """
+    total = 0
+    for image in images:
+        size = image_size(image)
+        if size:
+            total += image_tokens(size[0], size[1], model)
+    return total
+
+
+def fit_image(data: bytes, model: str, fmt: str = "jpg") -> bytes:
+    """
+    Downscale an encoded image to the size the model keeps
+
+    Images already within that size are returned unchanged.
+
+    Args:
+        data: Encoded image bytes
+        model: Model name
+        fmt: Output format when the image is resized (jpg/png)
+
+    Returns:
+        bytes: Encoded image
+    """
+    size = image_size(data)
+    if not size:
+        return data
+    width, height = served_size(size[0], size[1], model)
+    if (width, height) == size:
+        return data
+
+    import fitz  # PyMuPDF
+
+    pix = fitz.Pixmap(data)
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)  # drop alpha; JPEG cannot carry it
+    return fitz.Pixmap(pix, width, height, None).tobytes(output=fmt)
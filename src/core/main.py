@@ -23,12 +23,18 @@ from pathlib import Path
 try:
     from src.core import LLMClient
     from src.core.FileWorker import create_worker
+    from src.core.PageCache import get_shared_page_cache
+    from src.core.Pipeline import convert_pages
+    from src.core.ResponseCache import get_shared_cache
     from src.core.Util import remove_markdown_warp
 except ImportError:
     # If running from within src/core, use relative imports
     sys.path.append(str(Path(__file__).parent.parent.parent))
     from src.core import LLMClient
     from src.core.FileWorker import create_worker
+    from src.core.PageCache import get_shared_page_cache
+    from src.core.Pipeline import convert_pages
+    from src.core.ResponseCache import get_shared_cache
     from src.core.Util import remove_markdown_warp
 
 # Import config using relative path
@@ -55,11 +61,43 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def get_response_cache():
+    """
+    Get the shared response cache, or None when LLM_CACHE is disabled
+
+    Returns:
+        ResponseCache: Process-wide cache backed by config.LLM_CACHE_PATH
+    """
+    if not config.LLM_CACHE:
+        return None
+    return get_shared_cache(
+        str(config.LLM_CACHE_PATH),
+        max_bytes=config.LLM_CACHE_MAX_MB * 1024 * 1024,
+        max_age_days=config.LLM_CACHE_MAX_AGE_DAYS,
+    )
+
+
+def get_page_cache():
+    """
+    Get the shared rendered-page cache, or None when PAGE_CACHE is disabled
+
+    Returns:
+        PageCache: Process-wide cache backed by config.PAGE_CACHE_PATH
+    """
+    if not config.PAGE_CACHE:
+        return None
+    return get_shared_page_cache(
+        str(config.PAGE_CACHE_PATH),
+        max_bytes=config.PAGE_CACHE_MAX_MB * 1024 * 1024,
+    )
+
+
 def completion(
     message,
     model="",
     system_prompt="",
     image_paths=None,
+    images=None,
     temperature=0.5,
     max_tokens=8192,
     retry_times=3,
@@ -72,6 +110,7 @@ def completion(
         model (str): Model name
         system_prompt (str, optional): System prompt, defaults to empty string
         image_paths (List[str], optional): List of image paths, defaults to None
+        images (List[bytes], optional): List of in-memory encoded images, defaults to None
         temperature (float, optional): Temperature for text generation, defaults to 0.5
         max_tokens (int, optional): Maximum number of tokens for generated text, defaults to 8192
     Returns:
@@ -93,8 +132,10 @@ def completion(
         if not model:
             model = "gpt-4o"
 
-    # Initialize LLMClient
-    client = LLMClient.LLMClient(base_url=base_url, api_key=api_key, model=model)
+    # Reuse the process-wide pooled client (keep-alive connections)
+    client = LLMClient.get_shared_client(
+        base_url, api_key, model, **config.get_http_client_config()
+    )
     # Call completion method with retry mechanism
     for _ in range(retry_times):
         try:
@@ -102,8 +143,10 @@ def completion(
                 user_message=message,
                 system_prompt=system_prompt,
                 image_paths=image_paths,
+                images=images,
                 temperature=temperature,
                 max_tokens=max_tokens,
+                cache=get_response_cache(),
             )
             return response
         except (RuntimeError, ValueError, ConnectionError) as e:
@@ -113,11 +156,12 @@ def completion(
     return ""
 
 
-def convert_image_to_markdown(image_path):
+def convert_image_to_markdown(image_path=None, image_data=None):
     """
     Convert image to Markdown format
     Args:
-        image_path (str): Path to the image
+        image_path (str, optional): Path to the image
+        image_data (bytes | str, optional): Encoded image bytes or base64 string
     Returns:
         str: Converted Markdown string
     """
@@ -139,7 +183,8 @@ Output Example:
     response = completion(
         message=user_prompt,
         system_prompt=system_prompt,
-        image_paths=[image_path],
+        image_paths=[image_path] if image_path else None,
+        images=[image_data] if image_data else None,
         temperature=0.3,
         max_tokens=8192,
     )
@@ -147,6 +192,31 @@ Output Example:
     return response
 
 
+def emit_markdown(text):
+    """
+    Write markdown to stdout immediately, tolerating consoles without Unicode
+    Args:
+        text (str): Markdown text to write
+    """
+    try:
+        # Try to print directly first
+        print(text, end="", flush=True)
+    except UnicodeEncodeError:
+        try:
+            # Handle Unicode characters that can't be displayed in console
+            print(
+                text.encode("utf-8", errors="replace").decode(
+                    "utf-8", errors="replace"
+                ),
+                end="",
+                flush=True,
+            )
+        except UnicodeEncodeError:
+            # Fallback: write to stdout with UTF-8 encoding
+            sys.stdout.buffer.write(text.encode("utf-8", errors="replace"))
+            sys.stdout.buffer.flush()
+
+
 if __name__ == "__main__":
     start_page = 1
     end_page = 0
@@ -211,45 +281,28 @@ if __name__ == "__main__":
         logger.error(str(e))
         exit(1)
 
-    # convert to images
-    img_paths = worker.convert_to_images(output_dir=str(output_dir))
-    logger.info("Image conversion completed")
-
-    # convert to markdown
-    markdown = ""
-    for img_path in sorted(img_paths):
-        img_path = img_path.replace("\\", "/")
-        logger.info("Converting image %s to Markdown", img_path)
-        content = convert_image_to_markdown(img_path)
+    # Stream pages through render -> encode -> LLM; each page's markdown is
+    # written out as soon as it arrives instead of after the whole document
+    pages = convert_pages(
+        worker,
+        lambda image: convert_image_to_markdown(image_data=image),
+        queue_depth=config.PIPELINE_QUEUE_DEPTH,
+        text_fast_path=config.TEXT_FAST_PATH,
+        workers=config.RENDER_WORKERS,
+        cache=get_page_cache(),
+        **config.get_render_config(),
+    )
+    for page_num, content, _ in pages:
         if content:
             # 写入文件
             with open(
-                os.path.join(output_dir, f"{os.path.basename(img_path)}.md"),
+                os.path.join(output_dir, f"page_{page_num:04d}.md"),
                 "w",
                 encoding="utf-8",
             ) as f:
                 f.write(content)
-            markdown += content
-            markdown += "\n\n"
-
-    # Output Markdown
-    try:
-        # Try to print directly first
-        print(markdown)
-    except UnicodeEncodeError:
-        try:
-            # Handle Unicode characters that can't be displayed in console
-            print(
-                markdown.encode("utf-8", errors="replace").decode(
-                    "utf-8", errors="replace"
-                )
-            )
-        except UnicodeEncodeError:
-            # Fallback: write to stdout with UTF-8 encoding
-            import sys
-
-            sys.stdout.buffer.write(markdown.encode("utf-8", errors="replace"))
-            sys.stdout.buffer.flush()
+            emit_markdown(content + "\n\n")
+    emit_markdown("\n")
     logger.info("Image conversion to Markdown completed")
     # Remote output path
     shutil.rmtree(output_dir)
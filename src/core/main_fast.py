@@ -13,6 +13,7 @@ Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
 Licensed under the Apache License, Version 2.0
 """
 
+import argparse
 import importlib.util
 import logging
 import os
@@ -25,12 +26,18 @@ from pathlib import Path
 try:
     from src.core import LLMClient
     from src.core.FileWorker import create_worker
+    from src.core.PageCache import get_shared_page_cache
+    from src.core.Pipeline import convert_pages
+    from src.core.ResponseCache import get_shared_cache
     from src.core.Util import remove_markdown_warp
 except ImportError:
     # If running from within src/core, use relative imports
     sys.path.append(str(Path(__file__).parent.parent.parent))
     from src.core import LLMClient
     from src.core.FileWorker import create_worker
+    from src.core.PageCache import get_shared_page_cache
+    from src.core.Pipeline import convert_pages
+    from src.core.ResponseCache import get_shared_cache
     from src.core.Util import remove_markdown_warp
 
 # Import config using relative path
@@ -57,11 +64,43 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def get_response_cache():
+    """
+    Get the shared response cache, or None when LLM_CACHE is disabled
+
+    Returns:
+        ResponseCache: Process-wide cache backed by config.LLM_CACHE_PATH
+    """
+    if not config.LLM_CACHE:
+        return None
+    return get_shared_cache(
+        str(config.LLM_CACHE_PATH),
+        max_bytes=config.LLM_CACHE_MAX_MB * 1024 * 1024,
+        max_age_days=config.LLM_CACHE_MAX_AGE_DAYS,
+    )
+
+
+def get_page_cache():
+    """
+    Get the shared rendered-page cache, or None when PAGE_CACHE is disabled
+
+    Returns:
+        PageCache: Process-wide cache backed by config.PAGE_CACHE_PATH
+    """
+    if not config.PAGE_CACHE:
+        return None
+    return get_shared_page_cache(
+        str(config.PAGE_CACHE_PATH),
+        max_bytes=config.PAGE_CACHE_MAX_MB * 1024 * 1024,
+    )
+
+
 def completion_fast(
     message,
     model="",
     system_prompt="",
     image_paths=None,
+    images=None,
     temperature=0.1,  # Lower for speed
     max_tokens=4096,  # Reduced for speed
     retry_times=3,
@@ -83,8 +122,10 @@ def completion_fast(
         if not model:
             model = "gpt-4o"
 
-    # Initialize LLMClient
-    client = LLMClient.LLMClient(base_url=base_url, api_key=api_key, model=model)
+    # Reuse the process-wide pooled client (keep-alive connections)
+    client = LLMClient.get_shared_client(
+        base_url, api_key, model, **config.get_http_client_config()
+    )
     # Call completion method with retry mechanism
     for _ in range(retry_times):
         try:
@@ -92,8 +133,10 @@ def completion_fast(
                 user_message=message,
                 system_prompt=system_prompt,
                 image_paths=image_paths,
+                images=images,
                 temperature=temperature,
                 max_tokens=max_tokens,
+                cache=get_response_cache(),
             )
             return response
         except (RuntimeError, OSError, ValueError, TypeError) as e:
@@ -103,8 +146,8 @@ def completion_fast(
     return ""
 
 
-def convert_image_to_markdown_fast(image_path):
-    """Fast image conversion with shorter prompt"""
+def convert_image_to_markdown_fast(image_path=None, image_data=None):
+    """Fast image conversion with shorter prompt (image path, bytes or base64)"""
     system_prompt = """Convert this image to Markdown. Output only Markdown text content, no image references."""
 
     user_prompt = """Convert this document page to Markdown format:
@@ -118,7 +161,8 @@ def convert_image_to_markdown_fast(image_path):
     response = completion_fast(
         message=user_prompt,
         system_prompt=system_prompt,
-        image_paths=[image_path],
+        image_paths=[image_path] if image_path else None,
+        images=[image_data] if image_data else None,
         temperature=0.1,  # Lower for consistency and speed
         max_tokens=4096,  # Reduced for speed
     )
@@ -165,76 +209,54 @@ def clean_non_existent_image_references(markdown_content):
     return cleaned_content
 
 
-if __name__ == "__main__":
-    # Get configuration from environment variables set by convert_fast.py
-    output_filename = os.environ.get("MARKPDF_OUTPUT_FILE", "output.md")
-
-    start_page = 1
-    end_page = 0
-    if len(sys.argv) > 2:
-        start_page = int(sys.argv[1])
-        end_page = int(sys.argv[2])
-    elif len(sys.argv) > 1:
-        start_page = 1
-        end_page = int(sys.argv[1])
-
-    # Read binary data from standard input
-    input_data = sys.stdin.buffer.read()
-    if not input_data:
-        logger.error("No input data received")
-        logger.error(
-            "Usage: python main_fast.py [start_page] [end_page] < path_to_input.pdf"
-        )
-        exit(1)
-
-    # Create output directory
-    output_dir = (
-        config.DEFAULT_TEMP_FOLDER / f"output/{time.strftime('%Y%m%d%H%M%S')}_fast"
-    )
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    # File type detection (same as original)
-    input_filename = os.path.basename(sys.stdin.buffer.name)
-    input_ext = os.path.splitext(input_filename)[1]
-
-    if not input_ext or input_filename == "<stdin>":
-        if input_data.startswith(b"%PDF-"):
-            input_ext = ".pdf"
-            logger.info("Recognized as PDF file by file content")
-        elif input_data.startswith(b"\xff\xd8\xff\xdb"):
-            input_ext = ".jpeg"
-            logger.info("Recognized as JPEG file by file content")
-        elif input_data.startswith(b"\xff\xd8\xff\xe0"):
-            input_ext = ".jpg"
-            logger.info("Recognized as JPG file by file content")
-        elif input_data.startswith(b"\x89\x50\x4e\x47"):
-            input_ext = ".png"
-            logger.info("Recognized as PNG file by file content")
-        elif input_data.startswith(b"\x42\x4d"):
-            input_ext = ".bmp"
-            logger.info("Recognized as BMP file by file content")
-        else:
-            logger.error("Unsupported file type")
-            exit(1)
-
-    input_path = os.path.join(output_dir, f"input{input_ext}")
-    with open(input_path, "wb") as f:
-        f.write(input_data)
-
-    # create file worker
+def emit_markdown(text):
+    """Write markdown to stdout for convert_fast.py as soon as it is ready"""
+    # Use sys.stdout.buffer.write to handle Unicode properly
     try:
-        worker = create_worker(input_path, start_page, end_page)
-    except ValueError as e:
-        logger.error(str(e))
-        exit(1)
+        sys.stdout.buffer.write(text.encode("utf-8"))
+        sys.stdout.buffer.flush()
+    except (UnicodeEncodeError, AttributeError):
+        # Fallback: write to stderr log only
+        logger.info("Unicode encoding issue - markdown saved to files only")
+
 
-    # convert to images
-    img_paths = worker.convert_to_images(output_dir=str(output_dir))
-    logger.info("Image conversion completed")
+def convert_file(
+    input_path,
+    output_dir,
+    write=emit_markdown,
+    start_page=1,
+    end_page=0,
+    concurrency=None,
+    text_fast_path=None,
+):
+    """
+    Convert a PDF or image to markdown, writing each page as soon as it is ready
+
+    Args:
+        input_path: PDF or image file
+        output_dir: Directory for the per-page markdown files
+        write: Called with each markdown piece in order (default: stdout)
+        start_page: First page to convert (PDF only)
+        end_page: Last page to convert (0 = last page)
+        concurrency: Page requests kept in flight (default: PAGE_CONCURRENCY)
+        text_fast_path: Convert text-only pages locally (default: TEXT_FAST_PATH)
+
+    Returns:
+        dict: total_pages, processing_time, average_page_time and
+        content_length of the conversion
+
+    Raises:
+        ValueError: If the input type is not supported
+    """
+    if concurrency is None:
+        concurrency = config.PAGE_CONCURRENCY
+    if text_fast_path is None:
+        text_fast_path = config.TEXT_FAST_PATH
+
+    worker = create_worker(input_path, start_page, end_page)
 
     # convert to markdown with progress tracking
-    markdown = ""
-    total_pages = len(img_paths)
+    total_pages = 0
 
     # Collect processing metadata
     processing_start_time = time.time()
@@ -242,15 +264,20 @@ if __name__ == "__main__":
     total_content_length = 0
     cleaned_images_count = 0
 
-    for i, img_path in enumerate(sorted(img_paths), 1):
-        img_path = img_path.replace("\\", "/")
-        logger.info(f"Converting page {i}/{total_pages}: {os.path.basename(img_path)}")
-
-        page_start_time = time.time()
-        content = convert_image_to_markdown_fast(img_path)
-        page_end_time = time.time()
-
-        page_duration = page_end_time - page_start_time
+    # Pages stream through render -> encode -> LLM, rendered straight to
+    # memory; each page is written as soon as its markdown is ready
+    pages = convert_pages(
+        worker,
+        lambda image: convert_image_to_markdown_fast(image_data=image),
+        queue_depth=config.PIPELINE_QUEUE_DEPTH,
+        concurrency=concurrency,
+        text_fast_path=text_fast_path,
+        workers=config.RENDER_WORKERS,
+        cache=get_page_cache(),
+        **config.get_render_config(),
+    )
+    for i, content, page_duration in pages:
+        total_pages += 1
         page_times.append(page_duration)
 
         if content:
@@ -262,9 +289,6 @@ if __name__ == "__main__":
 
             total_content_length += len(content)
 
-            # Don't copy page screenshots - we only need the markdown content
-            # Page screenshots (page_0001.jpg) are just temporary files for LLM processing
-
             # Write individual page file to temp directory (will be cleaned up)
             page_md_file = os.path.join(output_dir, f"page_{i:04d}.md")
             with open(page_md_file, "w", encoding="utf-8") as f:
@@ -272,9 +296,7 @@ if __name__ == "__main__":
                 f.write(content)
 
             # Add page to combined markdown without page image reference
-            markdown += f"---\n# Page {i}\n---\n\n"
-            markdown += content
-            markdown += "\n\n"
+            write(f"---\n# Page {i}\n---\n\n{content}\n\n")
 
             logger.info(f"Page {i} completed in {page_duration:.1f}s")
 
@@ -292,6 +314,7 @@ if __name__ == "__main__":
 
 - **Total Pages:** {total_pages}
 - **Processing Time:** {total_processing_time:.1f}s
+- **Concurrency:** {concurrency}
 - **Average Page Time:** {avg_page_time:.1f}s
 - **Fastest Page:** {fastest_page:.1f}s
 - **Slowest Page:** {slowest_page:.1f}s
@@ -301,15 +324,111 @@ if __name__ == "__main__":
 
 """
 
-    markdown += metadata
+    write(metadata)
+
+    return {
+        "total_pages": total_pages,
+        "processing_time": total_processing_time,
+        "average_page_time": avg_page_time,
+        "content_length": total_content_length,
+    }
+
+
+if __name__ == "__main__":
+    # Get configuration from environment variables set by convert_fast.py
+    output_filename = os.environ.get("MARKPDF_OUTPUT_FILE", "output.md")
+
+    parser = argparse.ArgumentParser(
+        description="Fast PDF/image to Markdown conversion (input on stdin)"
+    )
+    parser.add_argument("pages", nargs="*", type=int, help="[start_page] end_page")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=config.PAGE_CONCURRENCY,
+        help="Page requests kept in flight at once (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--text-fast-path",
+        action=argparse.BooleanOptionalAction,
+        default=config.TEXT_FAST_PATH,
+        help="Convert text-only pages locally; only pages with figures use the model",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the response cache and always call the model",
+    )
+    args = parser.parse_args()
+    if args.no_cache:
+        os.environ["LLM_CACHE"] = "false"
+
+    start_page = 1
+    end_page = 0
+    if len(args.pages) > 1:
+        start_page = args.pages[0]
+        end_page = args.pages[1]
+    elif len(args.pages) > 0:
+        start_page = 1
+        end_page = args.pages[0]
+
+    # Read binary data from standard input
+    input_data = sys.stdin.buffer.read()
+    if not input_data:
+        logger.error("No input data received")
+        logger.error(
+            "Usage: python main_fast.py [start_page] [end_page] [--concurrency N] < path_to_input.pdf"
+        )
+        exit(1)
+
+    # Create output directory
+    output_dir = (
+        config.DEFAULT_TEMP_FOLDER / f"output/{time.strftime('%Y%m%d%H%M%S')}_fast"
+    )
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # File type detection (same as original)
+    input_filename = os.path.basename(sys.stdin.buffer.name)
+    input_ext = os.path.splitext(input_filename)[1]
+
+    if not input_ext or input_filename == "<stdin>":
+        if input_data.startswith(b"%PDF-"):
+            input_ext = ".pdf"
+            logger.info("Recognized as PDF file by file content")
+        elif input_data.startswith(b"\xff\xd8\xff\xdb"):
+            input_ext = ".jpeg"
+            logger.info("Recognized as JPEG file by file content")
+        elif input_data.startswith(b"\xff\xd8\xff\xe0"):
+            input_ext = ".jpg"
+            logger.info("Recognized as JPG file by file content")
+        elif input_data.startswith(b"\x89\x50\x4e\x47"):
+            input_ext = ".png"
+            logger.info("Recognized as PNG file by file content")
+        elif input_data.startswith(b"\x42\x4d"):
+            input_ext = ".bmp"
+            logger.info("Recognized as BMP file by file content")
+        else:
+            logger.error("Unsupported file type")
+            exit(1)
+
+    input_path = os.path.join(output_dir, f"input{input_ext}")
+    with open(input_path, "wb") as f:
+        f.write(input_data)
 
-    # Output Markdown to stdout for convert_fast.py
-    # Use sys.stdout.buffer.write to handle Unicode properly
     try:
-        sys.stdout.buffer.write(markdown.encode("utf-8"))
-    except (UnicodeEncodeError, AttributeError):
-        # Fallback: write to stderr log only
-        logger.info("Unicode encoding issue - markdown saved to files only")
+        stats = convert_file(
+            input_path,
+            output_dir,
+            start_page=start_page,
+            end_page=end_page,
+            concurrency=args.concurrency,
+            text_fast_path=args.text_fast_path,
+        )
+    except ValueError as e:
+        logger.error(str(e))
+        exit(1)
+    total_processing_time = stats["processing_time"]
+    avg_page_time = stats["average_page_time"]
 
     logger.info("Fast conversion completed")
     logger.info(
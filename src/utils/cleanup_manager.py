@@ -100,10 +100,18 @@ class CleanupManager:
             for jsonl_file in temp_batch_dir.glob("batch_requests_*.jsonl"):
                 self.safe_remove_file(jsonl_file)
 
-            # Remove all batch info files
-            for batch_info in temp_batch_dir.glob("batch_info_*.json"):
+            # Remove resume state of interrupted multipart uploads
+            for upload_state in temp_batch_dir.glob("batch_requests_*.upload.json"):
+                self.safe_remove_file(upload_state)
+
+            # Remove all batch info files, including imported legacy ones
+            for batch_info in temp_batch_dir.glob("batch_info_*.json*"):
                 self.safe_remove_file(batch_info)
 
+            # Remove the batch job store (with its WAL and shared-memory files)
+            for job_store_file in temp_batch_dir.glob("batch_jobs.sqlite3*"):
+                self.safe_remove_file(job_store_file)
+
             # Remove all PDF-specific subdirectories (temp_batch/pdf_name/)
             for pdf_dir in temp_batch_dir.iterdir():
                 if pdf_dir.is_dir():
@@ -200,8 +208,11 @@ class CleanupManager:
         if temp_folder.exists():
             self.log(f"📁 Cleaning temp folder: {temp_folder}")
 
-            # Remove all subdirectories in temp
+            # Remove all subdirectories in temp, keeping the persistent
+            # response and page caches (they manage their own size)
             for item in temp_folder.iterdir():
+                if item.name == "cache":
+                    continue
                 if item.is_dir():
                     self.safe_remove_directory(item)
                 elif item.is_file():
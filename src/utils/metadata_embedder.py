@@ -260,13 +260,17 @@ def enhance_converted_files(converted_dir, batch_data, linting_stats=None):
         for md_file in converted_path.glob("*.md"):
             if not md_file.name.endswith("_summary.md"):  # Skip existing summaries
                 file_info = {}
-                # Find matching file data
+                document = md_file.name.replace("_batch.md", "")
+                # Find matching file data, preferring an exact document match
                 for file_data in embedder.files_data:
-                    if file_data.get("name", "").replace(".pdf", "") in md_file.name:
+                    name = file_data.get("name", "").replace(".pdf", "")
+                    if name == document:
                         file_info = file_data
                         break
+                    if not file_info and name and name in md_file.name:
+                        file_info = file_data
 
-                embedder.add_file_metadata(str(md_file), {"filename": file_info})
+                embedder.add_file_metadata(str(md_file), {document: file_info})
                 print(f"   📝 Added metadata to {md_file.name}")
 
     # Create session summary
@@ -0,0 +1,690 @@
+#!/usr/bin/env python3
+"""
+Mock OpenAI Server - Offline OpenAI-compatible API for load and resilience tests
+
+Enterprise Enhancement for PDFtoMD
+Copyright (c) 2025 Joseph Wright (github: ch0t4nk)
+Licensed under the Apache License, Version 2.0
+
+Measuring throughput ceilings and retry behaviour against the real API costs
+money and needs network access. This server implements the parts of the API
+the converters use, so it can be set as OPENAI_API_BASE for LLMClient,
+BatchPDFConverter and PDFBatchMaster on an air-gapped box:
+
+- POST /v1/chat/completions (text and image_url content parts)
+- GET /v1/models
+- /v1/files: upload, retrieve, content, delete
+- /v1/uploads: create, add part, complete
+- /v1/batches: create, retrieve, cancel (run by the local batch emulator)
+
+Responses are deterministic canned markdown derived from each request, with
+configurable latency distribution, generation speed (tokens per second),
+request and token rate limits reported in x-ratelimit-* headers (and enforced
+with 429s), and random 429/5xx injection. Seeding the server makes the
+injected faults and latencies repeatable.
+
+Usage:
+    python mock_openai_server.py --port 8000 --latency lognormal:0.5,0.4 \\
+        --tokens-per-second 80 --rpm 500 --tpm 200000 --error-rate 0.02
+"""
+
+import argparse
+import email
+import email.policy
+import hashlib
+import json
+import math
+import random
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+# Make src/batch importable for the local batch emulator
+src_dir = Path(__file__).parent.parent
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from batch.local_batch import (  # noqa: E402
+    LocalBatches,
+    LocalFiles,
+    LocalNotFoundError,
+    new_id,
+)
+
+# Status codes of injected server errors
+SERVER_ERRORS = (500, 502, 503)
+
+# Words the canned markdown is made of
+WORDS = (
+    "system data page table value result method analysis model process "
+    "document section figure report input output level control signal "
+    "standard design sample measure range source format"
+).split()
+
+# Seconds an upload stays open
+UPLOAD_EXPIRY = 3600
+
+
+def parse_latency(spec):
+    """
+    Parse a latency distribution
+
+    Args:
+        spec: "fixed:S", "uniform:MIN,MAX", "normal:MEAN,STDDEV",
+            "lognormal:MEDIAN,SIGMA" or "exponential:MEAN" (seconds)
+
+    Returns:
+        callable: Called with a random.Random; returns seconds (never negative)
+    """
+    name, _, args = spec.partition(":")
+    try:
+        values = [float(v) for v in args.split(",")] if args else []
+    except ValueError:
+        raise ValueError(f"Invalid latency: {spec}") from None
+
+    distributions = {
+        "fixed": (1, lambda rng, s: s),
+        "uniform": (2, lambda rng, low, high: rng.uniform(low, high)),
+        "normal": (2, lambda rng, mean, stddev: rng.gauss(mean, stddev)),
+        "lognormal": (
+            2,
+            lambda rng, median, sigma: rng.lognormvariate(math.log(median), sigma),
+        ),
+        "exponential": (1, lambda rng, mean: rng.expovariate(1 / mean)),
+    }
+    if name not in distributions or len(values) != distributions[name][0]:
+        raise ValueError(f"Invalid latency: {spec}")
+    sample = distributions[name][1]
+    return lambda rng: max(sample(rng, *values), 0.0)
+
+
+def canned_markdown(digest, words=120):
+    """Deterministic markdown page for a request digest"""
+    rng = random.Random(digest)
+    paragraphs = []
+    remaining = words
+    while remaining > 0:
+        count = min(remaining, rng.randint(20, 50))
+        text = " ".join(rng.choice(WORDS) for _ in range(count))
+        paragraphs.append(text[0].upper() + text[1:] + ".")
+        remaining -= count
+    table = "\n".join(
+        ["| Item | Value |", "|---|---|"]
+        + [f"| {rng.choice(WORDS)} | {rng.randint(1, 999)} |" for _ in range(3)]
+    )
+    return (
+        f"# {rng.choice(WORDS).title()} {digest[:8]}\n\n"
+        + "\n\n".join(paragraphs[:1] + [table] + paragraphs[1:])
+        + "\n"
+    )
+
+
+def estimate_tokens(text):
+    """Rough token count of text (about four characters per token)"""
+    return math.ceil(len(text) / 4)
+
+
+class MockOpenAIServer:
+    """Threaded OpenAI-compatible mock server"""
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        model="mock-model",
+        latency="fixed:0",
+        tokens_per_second=0,
+        rpm=0,
+        tpm=0,
+        error_rate=0.0,
+        rate_limit_rate=0.0,
+        image_tokens=765,
+        markdown_words=120,
+        seed=None,
+        storage_dir=None,
+        batch_concurrency=8,
+        verbose=False,
+    ):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 = any free port)
+            model: Model listed by /v1/models
+            latency: Time before a response starts (see parse_latency)
+            tokens_per_second: Completion tokens generated per second on top
+                of the latency (0 = instantly)
+            rpm: Requests per minute before chat completions get 429s
+                (0 = unlimited, no rate limit headers)
+            tpm: Tokens per minute before chat completions get 429s
+                (0 = unlimited)
+            error_rate: Share of chat completions failing with a 5xx
+            rate_limit_rate: Share of chat completions failing with a 429
+                regardless of the limits
+            image_tokens: Prompt tokens counted per image
+            markdown_words: Words in each canned markdown page
+            seed: Seed for latencies and injected faults (default: random)
+            storage_dir: Directory for files and batches (default: a new
+                temporary directory)
+            batch_concurrency: Requests of one batch in flight at once
+            verbose: Log every request to stderr
+        """
+        self.model = model
+        self.latency = parse_latency(latency)
+        self.tokens_per_second = tokens_per_second
+        self.rpm = rpm
+        self.tpm = tpm
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.image_tokens = image_tokens
+        self.markdown_words = markdown_words
+        self.verbose = verbose
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = deque()  # (time, tokens) of requests in the last minute
+        self.stats = {"requests": 0, "completions": 0, "status": {}}
+
+        storage_dir = Path(storage_dir or tempfile.mkdtemp(prefix="mock_openai_"))
+        self.files = LocalFiles(storage_dir / "files")
+        self.uploads = {}
+        # Batch requests go straight to complete(), without HTTP or rate limits
+        completions = SimpleNamespace(create=self._batch_completion)
+        completions.with_raw_response = completions
+        self.batches = LocalBatches(
+            SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+            self.files,
+            storage_dir / "batches",
+            batch_concurrency,
+        )
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        # Connection threads are joined on stop, after their sockets close
+        self.httpd.daemon_threads = False
+        self.httpd.mock = self
+        self._connections = set()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """URL to use as OPENAI_API_BASE"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, name="mock-openai", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving, close kept-alive connections and the socket"""
+        self.httpd.shutdown()
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    # -- chat completions -----------------------------------------------------
+
+    def complete(self, body, limited=True):
+        """
+        Answer a chat completion request
+
+        Args:
+            body: Request body
+            limited: Apply rate limits and 429 injection (synchronous
+                requests); 5xx injection applies to batch requests too
+
+        Returns:
+            tuple: (status code, headers, response body)
+        """
+        messages = body.get("messages")
+        if not isinstance(messages, list) or not messages:
+            return _error(400, "messages must be a non-empty list")
+        if body.get("stream"):
+            return _error(400, "Streaming is not supported by the mock server")
+
+        text, images = _message_content(messages)
+        digest = hashlib.sha256(
+            json.dumps(messages, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        content = canned_markdown(digest, self.markdown_words)
+        prompt_tokens = estimate_tokens(text) + images * self.image_tokens
+        completion_tokens = estimate_tokens(content)
+        finish_reason = "stop"
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+        if max_tokens and completion_tokens > max_tokens:
+            content = content[: max_tokens * 4]
+            completion_tokens = max_tokens
+            finish_reason = "length"
+
+        headers = {}
+        with self._lock:
+            delay = self.latency(self._rng)
+            roll = self._rng.random()
+            rate_limit_rate = self.rate_limit_rate if limited else 0
+            fault = None
+            if limited:
+                headers, limited_for = self._take_rate_limit(
+                    prompt_tokens + completion_tokens
+                )
+                if limited_for is not None:
+                    fault = 429
+                    headers["retry-after"] = str(math.ceil(limited_for))
+            if fault is None and roll < rate_limit_rate:
+                fault = 429
+                headers["retry-after"] = "1"
+            elif fault is None and roll < rate_limit_rate + self.error_rate:
+                fault = self._rng.choice(SERVER_ERRORS)
+
+        if fault == 429:
+            return _error(
+                429, "Rate limit reached (mock)", "rate_limit_exceeded", headers
+            )
+        if self.tokens_per_second:
+            delay += completion_tokens / self.tokens_per_second
+        time.sleep(delay)
+        if fault:
+            return _error(fault, "The server had an error (mock)", None, headers)
+
+        completion = {
+            "id": new_id("chatcmpl-"),
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model") or self.model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason,
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+        with self._lock:
+            self.stats["completions"] += 1
+        return 200, headers, completion
+
+    def _take_rate_limit(self, tokens):
+        """
+        Count a request against the per-minute limits (lock held)
+
+        Returns:
+            tuple: (x-ratelimit-* headers, seconds until the request would
+            fit, or None if it was admitted)
+        """
+        if not self.rpm and not self.tpm:
+            return {}, None
+
+        now = time.monotonic()
+        while self._window and self._window[0][0] <= now - 60:
+            self._window.popleft()
+        used_tokens = sum(t for _, t in self._window)
+
+        admitted = not (
+            (self.rpm and len(self._window) >= self.rpm)
+            or (self.tpm and used_tokens + tokens > self.tpm)
+        )
+        if admitted:
+            self._window.append((now, tokens))
+            used_tokens += tokens
+        # Until the oldest request in the window stops counting
+        reset = self._window[0][0] + 60 - now if self._window else 0
+        limited_for = None if admitted else max(reset, 1)
+
+        headers = {}
+        if self.rpm:
+            headers["x-ratelimit-limit-requests"] = str(self.rpm)
+            headers["x-ratelimit-remaining-requests"] = str(
+                max(self.rpm - len(self._window), 0)
+            )
+            headers["x-ratelimit-reset-requests"] = _duration(reset)
+        if self.tpm:
+            headers["x-ratelimit-limit-tokens"] = str(self.tpm)
+            headers["x-ratelimit-remaining-tokens"] = str(
+                max(self.tpm - used_tokens, 0)
+            )
+            headers["x-ratelimit-reset-tokens"] = _duration(reset)
+        return headers, limited_for
+
+    def _batch_completion(self, **body):
+        status, headers, payload = self.complete(body, limited=False)
+        return SimpleNamespace(
+            status_code=status, headers=headers, text=json.dumps(payload)
+        )
+
+    # -- uploads --------------------------------------------------------------
+
+    def create_upload(self, body):
+        upload_id = new_id("upload_")
+        now = int(time.time())
+        self.uploads[upload_id] = {
+            "id": upload_id,
+            "object": "upload",
+            "bytes": body.get("bytes"),
+            "filename": body.get("filename"),
+            "purpose": body.get("purpose"),
+            "status": "pending",
+            "created_at": now,
+            "expires_at": now + UPLOAD_EXPIRY,
+            "file": None,
+            "parts": {},
+        }
+        return 200, {}, _public_upload(self.uploads[upload_id])
+
+    def add_upload_part(self, upload_id, data):
+        upload = self.uploads.get(upload_id)
+        if upload is None or upload["status"] != "pending":
+            return _error(404, f"No such upload: {upload_id}")
+        part_id = new_id("part_")
+        upload["parts"][part_id] = data
+        return (
+            200,
+            {},
+            {
+                "id": part_id,
+                "object": "upload.part",
+                "created_at": int(time.time()),
+                "upload_id": upload_id,
+            },
+        )
+
+    def complete_upload(self, upload_id, part_ids):
+        upload = self.uploads.get(upload_id)
+        if upload is None or upload["status"] != "pending":
+            return _error(404, f"No such upload: {upload_id}")
+        if any(part_id not in upload["parts"] for part_id in part_ids):
+            return _error(400, "Unknown part ID")
+        data = b"".join(upload["parts"][part_id] for part_id in part_ids)
+        if upload["bytes"] is not None and len(data) != upload["bytes"]:
+            return _error(400, "Parts do not add up to the declared size")
+        file_object = self.files.create((upload["filename"], data), upload["purpose"])
+        upload.update(status="completed", file=file_object.model_dump(mode="json"))
+        return 200, {}, _public_upload(upload)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routes requests to the MockOpenAIServer"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def setup(self):
+        super().setup()
+        with self.server.mock._lock:
+            self.server.mock._connections.add(self.connection)
+
+    def finish(self):
+        with self.server.mock._lock:
+            self.server.mock._connections.discard(self.connection)
+        super().finish()
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):  # noqa: A002
+        if self.server.mock.verbose:
+            super().log_message(format, *args)
+
+    def _dispatch(self, method):
+        mock = self.server.mock
+        path = self.path.split("?", 1)[0].rstrip("/")
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+
+        try:
+            result = self._route(mock, method, path, raw)
+        except (FileNotFoundError, LocalNotFoundError) as e:
+            result = _error(404, str(e))
+        except (ValueError, KeyError, TypeError) as e:
+            result = _error(400, f"Invalid request: {e}")
+
+        status, headers, payload = result
+        with mock._lock:
+            mock.stats["requests"] += 1
+            mock.stats["status"][status] = mock.stats["status"].get(status, 0) + 1
+
+        if isinstance(payload, bytes):
+            data, content_type = payload, "application/octet-stream"
+        else:
+            data, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("x-request-id", new_id("req_"))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self, mock, method, path, raw):
+        if method == "POST" and path == "/v1/chat/completions":
+            return mock.complete(json.loads(raw))
+        if method == "GET" and path == "/v1/models":
+            return (
+                200,
+                {},
+                {
+                    "object": "list",
+                    "data": [
+                        {
+                            "id": mock.model,
+                            "object": "model",
+                            "created": 0,
+                            "owned_by": "mock",
+                        }
+                    ],
+                },
+            )
+
+        if method == "POST" and path == "/v1/files":
+            fields = self._form(raw)
+            file_object = mock.files.create(
+                fields["file"], fields["purpose"][1].decode("utf-8")
+            )
+            return 200, {}, file_object.model_dump(mode="json")
+        match = re.fullmatch(r"/v1/files/([^/]+)(/content)?", path)
+        if match:
+            file_id, content = match.groups()
+            if method == "DELETE":
+                return 200, {}, mock.files.delete(file_id)
+            if content:
+                return 200, {}, mock.files.content(file_id).content
+            return 200, {}, mock.files.retrieve(file_id).model_dump(mode="json")
+
+        if method == "POST" and path == "/v1/uploads":
+            return mock.create_upload(json.loads(raw))
+        match = re.fullmatch(r"/v1/uploads/([^/]+)/(parts|complete)", path)
+        if method == "POST" and match:
+            upload_id, action = match.groups()
+            if action == "parts":
+                return mock.add_upload_part(upload_id, self._form(raw)["data"][1])
+            return mock.complete_upload(upload_id, json.loads(raw)["part_ids"])
+
+        if method == "POST" and path == "/v1/batches":
+            body = json.loads(raw)
+            batch = mock.batches.create(
+                input_file_id=body["input_file_id"],
+                endpoint=body["endpoint"],
+                completion_window=body["completion_window"],
+                metadata=body.get("metadata"),
+            )
+            return 200, {}, batch.model_dump(mode="json")
+        match = re.fullmatch(r"/v1/batches/([^/]+)(/cancel)?", path)
+        if match:
+            batch_id, cancel = match.groups()
+            if cancel and method == "POST":
+                return 200, {}, mock.batches.cancel(batch_id).model_dump(mode="json")
+            if method == "GET":
+                return 200, {}, mock.batches.retrieve(batch_id).model_dump(mode="json")
+
+        return _error(404, f"Unknown endpoint: {method} {path}")
+
+    def _form(self, raw):
+        """Fields of a multipart/form-data body as (filename, bytes)"""
+        message = email.message_from_bytes(
+            f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode() + raw,
+            policy=email.policy.HTTP,
+        )
+        return {
+            part.get_param("name", header="content-disposition"): (
+                part.get_filename(),
+                part.get_payload(decode=True),
+            )
+            for part in message.iter_parts()
+        }
+
+
+def _message_content(messages):
+    """Text and number of images across all messages"""
+    text = []
+    images = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            text.append(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                text.append(part.get("text", ""))
+            elif part.get("type") == "image_url":
+                images += 1
+    return "\n".join(text), images
+
+
+def _error(status, message, code=None, headers=None):
+    error_type = {
+        400: "invalid_request_error",
+        404: "invalid_request_error",
+        429: "requests",
+    }.get(status, "server_error")
+    return (
+        status,
+        headers or {},
+        {
+            "error": {
+                "message": message,
+                "type": error_type,
+                "param": None,
+                "code": code,
+            }
+        },
+    )
+
+
+def _duration(seconds):
+    """Reset duration in the API's format, e.g. 1m2.5s or 120ms"""
+    if seconds < 1:
+        return f"{round(seconds * 1000)}ms"
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes)}m{seconds:.3g}s" if minutes else f"{seconds:.3g}s"
+
+
+def _public_upload(upload):
+    return {key: value for key, value in upload.items() if key != "parts"}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline OpenAI-compatible mock server for load and resilience tests"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default="mock-model")
+    parser.add_argument(
+        "--latency",
+        default="fixed:0",
+        help="fixed:S, uniform:MIN,MAX, normal:MEAN,SD, lognormal:MEDIAN,SIGMA "
+        "or exponential:MEAN (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--tokens-per-second",
+        type=float,
+        default=0,
+        help="Completion tokens generated per second (default: instant)",
+    )
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute")
+    parser.add_argument("--tpm", type=int, default=0, help="Tokens per minute")
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Share of requests failing with 5xx",
+    )
+    parser.add_argument(
+        "--rate-limit-rate",
+        type=float,
+        default=0.0,
+        help="Share of requests failing with 429",
+    )
+    parser.add_argument("--markdown-words", type=int, default=120)
+    parser.add_argument("--seed", type=int, help="Seed for latencies and faults")
+    parser.add_argument("--storage-dir", help="Directory for files and batches")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    try:
+        server = MockOpenAIServer(
+            host=args.host,
+            port=args.port,
+            model=args.model,
+            latency=args.latency,
+            tokens_per_second=args.tokens_per_second,
+            rpm=args.rpm,
+            tpm=args.tpm,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            markdown_words=args.markdown_words,
+            seed=args.seed,
+            storage_dir=args.storage_dir,
+            verbose=args.verbose,
+        )
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not start mock server: {e}")
+        return 1
+
+    print(f"🧪 Mock OpenAI server on {server.base_url}")
+    print(f'   Set OPENAI_API_BASE="{server.base_url}" to use it')
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopped")
+    finally:
+        server.stop()
+        print(f"📊 {server.stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
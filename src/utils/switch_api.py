@@ -38,6 +38,7 @@ def switch_to_openai():
 OPENAI_API_KEY="your-openai-api-key-here"
 OPENAI_API_BASE="https://api.openai.com/v1"
 OPENAI_DEFAULT_MODEL="gpt-4o-mini"
+BATCH_BACKEND="openai"
 
 # LM Studio Configuration (Local) - INACTIVE
 # OPENAI_API_KEY="lm-studio"
@@ -60,6 +61,8 @@ def switch_to_lmstudio():
 OPENAI_API_KEY="lm-studio"
 OPENAI_API_BASE="http://192.168.56.1:1234/v1"
 OPENAI_DEFAULT_MODEL="Qwen2-VL-7B-Instruct"
+# LM Studio has no Batch API; batches run locally against chat completions
+BATCH_BACKEND="local"
 
 # OpenAI Configuration (Cloud) - INACTIVE
 # SECURITY: Never hardcode real API keys - use placeholder only
@@ -80,6 +83,7 @@ def show_current():
         print("🔧 Current API Configuration (via SSOT):")
         print(f"   API Base: {config.OPENAI_API_BASE}")
         print(f"   Model: {config.OPENAI_DEFAULT_MODEL}")
+        print(f"   Batch backend: {config.BATCH_BACKEND}")
 
         # Mask the API key for security - enhanced masking to prevent information disclosure
         api_key = config.OPENAI_API_KEY
@@ -0,0 +1,275 @@
+import json
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+import batch.batch_api as batch_api
+import batch.multipart_upload as multipart_upload
+from batch.batch_api import BatchPDFConverter, split_batch_markdown
+from batch.batch_scheduler import RetryLater
+from batch.job_store import PAGE_DONE, PAGE_FAILED, PAGE_QUEUED, JobStore
+
+PAGES = {
+    1: "# Title\n\nIntro text.",
+    2: "Above the rule\n\n---\n\nBelow the rule\n\n---",
+    3: "| a | b |\n|---|---|\n| 1 | 2 |",
+}
+
+USAGE = {
+    "pages": 3,
+    "prompt_tokens": 3000,
+    "completion_tokens": 600,
+    "total_tokens": 3600,
+    "cost": 0.0012,
+}
+
+
+class FakeFiles:
+    def __init__(self, contents):
+        self.contents = contents
+
+    def content(self, file_id):
+        return SimpleNamespace(text=self.contents[file_id])
+
+
+class FakeClient:
+    def __init__(self, batches, contents):
+        self.batches = SimpleNamespace(retrieve=batches.__getitem__)
+        self.files = FakeFiles(contents)
+
+
+@pytest.fixture
+def converter(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEFAULT_OUTPUT_FOLDER", str(tmp_path / "outputs"))
+    monkeypatch.setenv("DEFAULT_TEMP_FOLDER", str(tmp_path / "temp"))
+    (tmp_path / "outputs" / "converted").mkdir(parents=True)
+    converter = BatchPDFConverter(client=FakeClient({}, {}))
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    monkeypatch.setattr(converter, "_get_job_store", lambda: store)
+    return converter
+
+
+def write_pages(directory, pages):
+    directory.mkdir(exist_ok=True)
+    pairs = []
+    for page_num, content in sorted(pages.items()):
+        page_file = directory / f"{page_num:05d}.md"
+        page_file.write_text(content, encoding="utf-8")
+        pairs.append((page_num, str(page_file)))
+    return pairs
+
+
+def output_file(tmp_path, pdf_name):
+    return tmp_path / "outputs" / "converted" / f"{pdf_name}_batch.md"
+
+
+def test_batch_markdown_round_trips_pages_with_rules(converter, tmp_path):
+    pages = write_pages(tmp_path / "pages", PAGES)
+    converter._write_batch_markdown("doc", pages, USAGE, ["- **Batch ID:** b\n"], False)
+
+    text = output_file(tmp_path, "doc").read_text(encoding="utf-8")
+    assert split_batch_markdown(text) == PAGES
+
+
+def test_merge_keeps_existing_pages_and_prefers_new_ones(converter, tmp_path):
+    pages = write_pages(tmp_path / "first", PAGES)
+    converter._write_batch_markdown("doc", pages, USAGE, [], True)
+
+    late = write_pages(tmp_path / "late", {2: "Page two, retried", 4: "Page four"})
+    merged = converter._merge_existing_pages("doc", late)
+    assert [page_num for page_num, _ in merged] == [1, 2, 3, 4]
+
+    contents = {}
+    for page_num, page_file in merged:
+        with open(page_file, encoding="utf-8") as f:
+            contents[page_num] = f.read()
+    assert contents == {
+        1: PAGES[1],
+        2: "Page two, retried",
+        3: PAGES[3],
+        4: "Page four",
+    }
+
+
+def test_harvest_reads_error_files_of_finished_batches(converter):
+    store = converter._get_job_store()
+    mapping = {f"doc_page_{n:04d}": ("doc", n, "") for n in range(1, 5)}
+    store.create_job("chunked_1", "chunked", status="submitted")
+    store.add_shard("chunked_1", 4, mapping, status="submitted", batch_id="batch_1")
+    store.mark_pages("chunked_1", ["doc_page_0001", "doc_page_0002"], PAGE_DONE)
+
+    error_line = {
+        "custom_id": "doc_page_0003",
+        "response": {"status_code": 500, "body": {"error": {"message": "boom"}}},
+    }
+    batch = SimpleNamespace(
+        id="batch_1",
+        status="in_progress",
+        output_file_id="file-out",
+        error_file_id="file-err",
+    )
+    converter.client = FakeClient(
+        {"batch_1": batch}, {"file-err": json.dumps(error_line) + "\n"}
+    )
+    assert converter.harvest_failed_requests("chunked_1") is None
+
+    batch.status = "completed"
+    missing = converter.harvest_failed_requests("chunked_1")
+    assert missing == [
+        ("doc_page_0003", "doc", 3, PAGE_FAILED),
+        ("doc_page_0004", "doc", 4, PAGE_QUEUED),
+    ]
+
+
+def test_resubmit_missing_renders_only_missing_pages(converter, monkeypatch):
+    store = converter._get_job_store()
+    mapping = {f"doc_page_{n:04d}": ("doc", n, "") for n in range(1, 4)}
+    store.create_job("batch_1", "single", status="completed")
+    store.add_shard("batch_1", 3, mapping, status="failed")
+    store.mark_pages("batch_1", ["doc_page_0002"], PAGE_DONE)
+
+    written = []
+    monkeypatch.setattr(converter, "_open_scheduler", lambda job_id: None)
+    monkeypatch.setattr(
+        converter,
+        "_write_and_schedule",
+        lambda pdf_files, batch_file, scheduler, pages: written.append(pages) or 2,
+    )
+    assert converter.resubmit_missing("batch_1") == 2
+    assert written == [{"doc.pdf": [1, 3]}]
+    assert store.get_job("batch_1")["status"] == "submitted"
+    assert converter.resubmit_missing("unknown") is None
+
+
+class StallingUploads:
+    def __init__(self):
+        self.stalled = {b"cccc"}
+        self.sent = []
+        self.parts = SimpleNamespace(create=self.create_part)
+
+    def create(self, **kwargs):
+        return SimpleNamespace(id="upload_1", expires_at=time.time() + 3600)
+
+    def create_part(self, upload_id, data):
+        self.sent.append(data)
+        if data in self.stalled:
+            raise openai.APITimeoutError(request=None)
+        return SimpleNamespace(id=f"part_{data.decode()}")
+
+    def complete(self, upload_id, part_ids):
+        return SimpleNamespace(file=SimpleNamespace(id="file_1"))
+
+
+def test_kept_batch_file_upload_resumes_after_connection_errors(
+    converter, tmp_path, monkeypatch
+):
+    monkeypatch.setenv("BATCH_UPLOAD_PART_MB", str(4 / (1024 * 1024)))
+    monkeypatch.setenv("BATCH_UPLOAD_PART_WORKERS", "1")
+    monkeypatch.setattr(batch_api.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(multipart_upload.time, "sleep", lambda seconds: None)
+    uploads = StallingUploads()
+    converter.client = SimpleNamespace(
+        uploads=uploads,
+        batches=SimpleNamespace(
+            create=lambda **kwargs: SimpleNamespace(
+                id="batch_1", status="validating", request_counts=None
+            )
+        ),
+    )
+    batch_file = tmp_path / "batch_requests_1_part001.jsonl"
+    batch_file.write_bytes(b"aaaabbbbccccdd")
+
+    with pytest.raises(RetryLater):
+        converter._submit_batch_file(batch_file, 2, {}, save_info=False, keep_file=True)
+    # Every attempt resumed the same upload: sent parts were not sent again
+    assert uploads.sent.count(b"aaaa") == 1
+    assert uploads.sent.count(b"cccc") == 9
+    assert batch_file.exists()
+    assert multipart_upload.upload_state_file(batch_file).exists()
+
+    uploads.stalled.clear()
+    uploads.sent.clear()
+    batch_id = converter._submit_batch_file(
+        batch_file, 2, {}, save_info=False, keep_file=True
+    )
+    assert batch_id == "batch_1"
+    assert uploads.sent == [b"cccc"]
+    assert not multipart_upload.upload_state_file(batch_file).exists()
+
+
+def test_lone_shard_with_interrupted_upload_stays_a_master_batch(
+    converter, monkeypatch
+):
+    monkeypatch.setenv("BATCH_UPLOAD_PART_MB", "0")
+    monkeypatch.setattr(batch_api.time, "sleep", lambda seconds: None)
+    mapping = {"doc_page_0001": ("doc", 1, "")}
+
+    def write_batch_requests(pdf_files, batch_file, on_shard=None, pages=None):
+        shard_file = batch_file.with_name(batch_file.stem + "_part001.jsonl")
+        shard_file.write_text('{"custom_id": "doc_page_0001"}\n')
+        batch_api.mapping_file_for(shard_file).write_text(
+            json.dumps({"custom_id": "doc_page_0001", "page": mapping["doc_page_0001"]})
+            + "\n"
+        )
+        on_shard(str(shard_file), 1, dict(mapping), 1000)
+        return 1, dict(mapping), [str(shard_file)]
+
+    uploaded = []
+
+    def create_file(file, purpose):
+        if not uploaded:
+            raise openai.APITimeoutError(request=None)
+        return SimpleNamespace(id="file_1")
+
+    converter.client = SimpleNamespace(
+        files=SimpleNamespace(create=create_file),
+        batches=SimpleNamespace(
+            create=lambda **kwargs: SimpleNamespace(
+                id="batch_1", status="validating", request_counts=None
+            ),
+            retrieve=lambda batch_id: SimpleNamespace(
+                id=batch_id, status="validating", errors=None
+            ),
+        ),
+    )
+    monkeypatch.setattr(converter, "write_batch_requests", write_batch_requests)
+
+    job_id, request_count = converter.submit_pdf_files(["doc.pdf"])
+    store = converter._get_job_store()
+    assert job_id.startswith("chunked_") and request_count == 1
+    assert store.get_job(job_id)["kind"] == "chunked"
+    (shard,) = store.shards(job_id)
+    assert (shard["status"], shard["batch_id"]) == ("pending", None)
+    assert Path(shard["batch_file"]).exists()
+
+    uploaded.append(True)
+    assert converter.run_schedule(job_id)
+    assert store.batch_ids(job_id) == ["batch_1"]
+
+
+def test_unknown_model_pages_count_fallback_image_tokens(
+    converter, tmp_path, monkeypatch
+):
+    monkeypatch.setenv("BATCH_FALLBACK_IMAGE_TOKENS", "1000")
+    monkeypatch.setenv("BATCH_ENQUEUED_TOKEN_LIMIT", "2500")
+    converter.model = "unknown-vision-model"
+    converter.system_prompt = converter.user_prompt = ""
+
+    def iter_batch_pages(pdf_files, file_mapping, pages):
+        for page_num in range(1, 5):
+            custom_id = f"doc_page_{page_num:04d}"
+            file_mapping[custom_id] = ("doc", page_num, "")
+            yield custom_id, b"not an image"
+
+    monkeypatch.setattr(converter, "iter_batch_pages", iter_batch_pages)
+    shards = []
+    count, _, files = converter.write_batch_requests(
+        ["doc.pdf"],
+        tmp_path / "batch_requests.jsonl",
+        on_shard=lambda *shard: shards.append(shard),
+    )
+    assert count == 4 and len(files) == 2
+    assert [(shard[1], shard[3]) for shard in shards] == [(2, 2000), (2, 2000)]
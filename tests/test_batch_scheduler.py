@@ -0,0 +1,147 @@
+import json
+from types import SimpleNamespace
+
+from batch.batch_scheduler import FAILED, BatchScheduler, RetryLater
+from batch.job_store import JobStore
+
+
+class FakeBatches:
+    def __init__(self):
+        self.status = {}
+        self.submitted = []
+        self.removed = []
+
+    def submit(self, batch_file, request_count):
+        batch_id = f"batch_{len(self.submitted)}"
+        self.submitted.append(batch_file)
+        self.status[batch_id] = "validating"
+        return batch_id
+
+    def retrieve(self, batch_id):
+        status = self.status[batch_id]
+        errors = None
+        if status == "token_limit":
+            status = "failed"
+            errors = SimpleNamespace(
+                data=[SimpleNamespace(code="token_limit_exceeded")]
+            )
+        return SimpleNamespace(id=batch_id, status=status, errors=errors)
+
+
+def make_scheduler(store, api, token_limit):
+    return BatchScheduler(
+        store,
+        "chunked_1",
+        api.submit,
+        api.retrieve,
+        api.removed.append,
+        token_limit=token_limit,
+    )
+
+
+def test_window_restart_and_token_limit_requeue(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    api = FakeBatches()
+    scheduler = make_scheduler(store, api, token_limit=250)
+    for index in range(4):
+        scheduler.add_chunk(
+            f"part{index}.jsonl", 10, {f"p{index}": ("doc", index, "")}, 100
+        )
+
+    scheduler.pump()
+    scheduler.close()
+    assert api.submitted == ["part0.jsonl", "part1.jsonl"]
+    assert scheduler.in_flight_tokens() == 200
+
+    # A restarted process resumes from the job store
+    api.status["batch_0"] = "completed"
+    scheduler = make_scheduler(JobStore(store.path), api, token_limit=1000)
+    assert scheduler.token_limit == 250
+    assert store.file_mapping("chunked_1")["p3"] == ("doc", 3, "")
+    scheduler.pump()
+    scheduler.close()
+    assert api.submitted[2] == "part2.jsonl"
+    assert api.removed == ["part0.jsonl"]
+    assert store.batch_ids("chunked_1") == ["batch_0", "batch_1", "batch_2"]
+
+    # Rejected for the enqueued-token limit: requeued under a lower ceiling
+    api.status["batch_2"] = "token_limit"
+    scheduler.pump()
+    scheduler.close()
+    assert scheduler.token_limit == 100
+    assert scheduler.pending_count() == 2
+    assert store.batch_ids("chunked_1") == ["batch_0", "batch_1"]
+    assert store.get_job("chunked_1")["token_limit"] == 100
+
+    api.status["batch_1"] = "completed"
+    scheduler.pump()
+    scheduler.close()
+    assert api.submitted[3:] == ["part2.jsonl"]
+    assert scheduler.pending_count() == 1
+
+
+def test_chunk_over_token_limit_alone_is_split(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    api = FakeBatches()
+    scheduler = make_scheduler(store, api, token_limit=0)
+    batch_file = tmp_path / "part1.jsonl"
+    custom_ids = [f"doc_page_{i:04d}" for i in range(3)]
+    batch_file.write_text(
+        "".join(json.dumps({"custom_id": cid}) + "\n" for cid in custom_ids)
+    )
+    scheduler.add_chunk(
+        str(batch_file),
+        3,
+        {cid: ("doc", i + 1, "") for i, cid in enumerate(custom_ids)},
+        300,
+    )
+    scheduler.pump()
+    scheduler.close()
+
+    api.status["batch_0"] = "token_limit"
+    scheduler.pump()
+    scheduler.close()
+    assert api.removed == [str(batch_file)]
+    assert [c["request_count"] for c in scheduler.chunks] == [1, 2]
+    assert [c["estimated_tokens"] for c in scheduler.chunks] == [100, 200]
+    assert scheduler.token_limit == 200
+    # The first half runs alone; the second waits for it
+    assert api.submitted[1:] == [str(tmp_path / "part1a.jsonl")]
+    assert scheduler.pending_count() == 1
+    assert FAILED not in [c["status"] for c in scheduler.chunks]
+    assert store.file_mapping("chunked_1", shard_seq=2) == {
+        cid: ("doc", i + 2, "") for i, cid in enumerate(custom_ids[1:])
+    }
+    assert store.get_job("chunked_1")["total_requests"] == 3
+
+    api.status["batch_1"] = "completed"
+    scheduler.pump()
+    scheduler.close()
+    assert api.submitted[2:] == [str(tmp_path / "part1b.jsonl")]
+    assert (tmp_path / "part1b.jsonl").read_text().count("\n") == 2
+
+
+def test_chunk_stays_queued_when_submission_should_be_retried(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    api = FakeBatches()
+    attempts = []
+
+    def submit(batch_file, request_count):
+        attempts.append(batch_file)
+        if len(attempts) == 1:
+            raise RetryLater("connection reset")
+        return api.submit(batch_file, request_count)
+
+    scheduler = BatchScheduler(
+        store, "chunked_1", submit, api.retrieve, api.removed.append
+    )
+    scheduler.add_chunk("part0.jsonl", 10, {"p0": ("doc", 1, "")}, 100)
+    scheduler.pump()
+    scheduler.close()
+    assert scheduler.pending_count() == 1
+    assert scheduler.chunks[0]["batch_file"] == "part0.jsonl"
+
+    scheduler.pump()
+    scheduler.close()
+    assert attempts == ["part0.jsonl", "part0.jsonl"]
+    assert store.batch_ids("chunked_1") == ["batch_0"]
@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+from batch.batch_service import BatchService
+
+
+class FakeConverter:
+    client = object()
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+
+    def check_batch_status(self, batch_id, due_only=False):
+        return self.statuses.pop(0)
+
+    def retrieve_results(self, batch_id):
+        return False
+
+
+def test_status_normalizes_single_and_chunked_jobs():
+    counts = SimpleNamespace(completed=3, failed=1, total=4)
+    batch = SimpleNamespace(
+        status="in_progress",
+        request_counts=counts,
+        created_at=1,
+        completed_at=None,
+        failed_at=None,
+        metadata=None,
+    )
+    chunked = {"all_completed": True, "completed_requests": 4, "total_requests": 4}
+    service = BatchService(FakeConverter([batch, chunked, None]))
+
+    status = service.status("batch_1")
+    assert (status["status"], status["completed"], status["failed"]) == (
+        "in_progress",
+        3,
+        1,
+    )
+    assert not status["chunked"]
+
+    status = service.status("chunked_1")
+    assert (status["status"], status["total"], status["chunked"]) == (
+        "completed",
+        4,
+        True,
+    )
+    assert service.status("batch_2") is None
+    assert service.retrieve("batch_1")["retrieved"] is False
+
+
+def test_wait_polls_until_a_final_status():
+    batches = [
+        SimpleNamespace(
+            status=status,
+            request_counts=None,
+            created_at=1,
+            completed_at=None,
+            failed_at=None,
+        )
+        for status in ("validating", "in_progress", "completed")
+    ]
+    seen = []
+    service = BatchService(FakeConverter(batches))
+
+    status = service.wait(
+        "batch_1", poll_interval=0.01, timeout=5, on_status=seen.append
+    )
+
+    assert status["status"] == "completed"
+    assert [s["status"] for s in seen] == ["validating", "in_progress", "completed"]
+
+
+def test_chunked_job_with_failed_chunk_runs_until_every_chunk_finishes():
+    def summary(statuses, pending_chunks=0):
+        return {
+            "all_completed": False,
+            "any_failed": "failed" in statuses,
+            "pending_chunks": pending_chunks,
+            "chunk_statuses": [{"status": status} for status in statuses],
+        }
+
+    service = BatchService(
+        FakeConverter(
+            [
+                summary(["failed", "in_progress"]),
+                summary(["failed", "completed"], pending_chunks=1),
+                summary(["failed", "completed"]),
+            ]
+        )
+    )
+    assert [service.status("chunked_1")["status"] for _ in range(3)] == [
+        "in_progress",
+        "in_progress",
+        "failed",
+    ]
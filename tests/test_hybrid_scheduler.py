@@ -0,0 +1,144 @@
+import pytest
+
+from batch.hybrid_scheduler import HybridScheduler, _shared_rate_limits
+from batch.job_store import get_job_store
+from core.LLMClient import parse_rate_limits
+
+PAGES = {"a.pdf": 4, "b.pdf": 10, "c.pdf": 10, "d.pdf": 5, "e.pdf": 1000}
+
+
+class FakeService:
+    def __init__(self):
+        self.submitted = []
+        self.batch_id = "batch_1"
+
+    def submit(self, pdf_files=None, pages=None):
+        self.submitted.append((pdf_files, pages))
+        return {"batch_id": self.batch_id, "request_count": 0, "files": len(pdf_files)}
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setenv("PAGE_CONCURRENCY", "1")
+    monkeypatch.setenv("HYBRID_PAGE_SECONDS", "10")
+    monkeypatch.setenv("HYBRID_PREVIEW_PAGES", "0")
+    converted = []
+
+    def convert(pdf_file, end_page, suffix):
+        converted.append((pdf_file, end_page, suffix))
+        return True
+
+    scheduler = HybridScheduler(
+        service=FakeService(),
+        convert=convert,
+        page_count=PAGES.get,
+        # 10 seconds per page is the bottleneck: 0.1 pages per second
+        rate_limits=lambda: {"limit_requests": 600, "limit_tokens": 6e9},
+        turnarounds=[1200, 3600, 2400],
+        # $0.15 per page batched, $0.30 synchronously
+        page_tokens=(1_000_000, 0),
+    )
+    scheduler.converted = converted
+    return scheduler
+
+
+def test_plan_routes_by_deadline_and_budget(scheduler):
+    routes = scheduler.plan(
+        [
+            {"documents": ["a.pdf"]},
+            {"documents": ["b.pdf"], "deadline": 600},
+            {"documents": ["c.pdf"], "deadline": 600, "budget": 2.0},
+            {"documents": ["d.pdf"], "preview_pages": 2},
+            {"documents": ["e.pdf"], "deadline": 60},
+        ]
+    )
+    by_document = {route["document"]: route for route in routes}
+
+    # Earliest deadline first
+    assert [route["document"] for route in routes] == [
+        "e.pdf",
+        "b.pdf",
+        "c.pdf",
+        "a.pdf",
+        "d.pdf",
+    ]
+    assert scheduler.batch_turnaround() == 3600
+
+    # No deadline: the discounted batch path
+    assert by_document["a.pdf"]["route"] == "batch"
+    assert by_document["a.pdf"]["cost"] == pytest.approx(0.6)
+
+    # Batch cannot meet the deadline, sync can
+    assert by_document["b.pdf"]["route"] == "sync"
+    assert by_document["b.pdf"]["eta"] == pytest.approx(100)
+    assert by_document["b.pdf"]["meets_deadline"]
+
+    # The budget only covers three synchronous pages
+    route = by_document["c.pdf"]
+    assert (route["route"], route["sync_pages"]) == ("split", 3)
+    assert route["within_budget"] and not route["meets_deadline"]
+
+    # Preview pages go synchronously, the rest through batch
+    assert (by_document["d.pdf"]["route"], by_document["d.pdf"]["sync_pages"]) == (
+        "split",
+        2,
+    )
+
+    # Sync would be slower than batch, so nothing is gained by paying more
+    assert by_document["e.pdf"]["route"] == "batch"
+    assert not by_document["e.pdf"]["meets_deadline"]
+
+
+def test_run_submits_batched_pages_then_converts_sync_pages(scheduler):
+    result = scheduler.run(
+        [
+            {"documents": ["a.pdf", "d.pdf"], "preview_pages": 2},
+            {"documents": ["b.pdf"], "deadline": 600},
+        ]
+    )
+
+    assert scheduler.service.submitted == [
+        (["a.pdf", "d.pdf"], {"a.pdf": [3, 4], "d.pdf": [3, 4, 5]})
+    ]
+    assert result["batch"]["batch_id"] == "batch_1"
+    assert scheduler.converted == [
+        ("b.pdf", 0, "_fast"),
+        ("a.pdf", 2, "_preview"),
+        ("d.pdf", 2, "_preview"),
+    ]
+    assert result["sync"] == {"b.pdf": True, "a.pdf": True, "d.pdf": True}
+    assert result["ok"]
+
+
+def test_run_fails_when_batched_pages_are_not_submitted(scheduler):
+    scheduler.service.batch_id = None
+    result = scheduler.run([{"documents": ["a.pdf"]}, {"documents": ["b.pdf"]}])
+    assert result["batch"]["batch_id"] is None
+    assert not result["ok"]
+
+
+def test_exhausted_rate_limit_delays_sync(scheduler):
+    limits = parse_rate_limits(
+        {
+            "x-ratelimit-limit-requests": "600",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "1m30s",
+            "x-ratelimit-limit-tokens": "6000000000",
+            "x-ratelimit-reset-tokens": "20ms",
+        }
+    )
+    assert limits["reset_requests"] == 90
+    assert limits["reset_tokens"] == pytest.approx(0.02)
+    assert parse_rate_limits({}) == {}
+
+    assert scheduler.sync_seconds(1, limits) == pytest.approx(100, abs=1)
+
+
+def test_new_process_plans_with_recorded_rate_limits(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEFAULT_TEMP_FOLDER", str(tmp_path / "temp"))
+    monkeypatch.setenv("OPENAI_DEFAULT_MODEL", "gpt-4o-mini")
+    store = get_job_store(tmp_path / "temp" / "temp_batch" / "batch_jobs.sqlite3")
+    limits = {"limit_requests": 30.0, "limit_tokens": 1e6, "checked_at": 1.0}
+    store.record_rate_limits("gpt-4o-mini", limits)
+
+    assert _shared_rate_limits() == limits
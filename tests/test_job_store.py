@@ -0,0 +1,101 @@
+import json
+from types import SimpleNamespace
+
+from batch.job_store import PAGE_DONE, PAGE_FAILED, JobStore
+
+
+def test_pages_statuses_and_legacy_import(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    store.create_job("chunked_1", "chunked")
+    store.add_shard(
+        "chunked_1", 2, {"a_page_0001": ("a", 1, ""), "a_page_0002": ("a", 2, "")}
+    )
+    seq = store.add_shard("chunked_1", 1, {"b_page_0001": ("b", 1, "")})
+    store.update_shard("chunked_1", seq, status="submitted", batch_id="batch_2")
+
+    batch = SimpleNamespace(
+        id="batch_2", status="completed", output_file_id="file_out", error_file_id=None
+    )
+    assert store.record_batch(batch) == "chunked_1"
+    assert store.shards("chunked_1")[1]["output_file_id"] == "file_out"
+    assert store.batch_ids("chunked_1") == ["batch_2"]
+    assert store.get_job("chunked_1")["total_requests"] == 3
+
+    store.mark_pages("chunked_1", ["a_page_0002"], PAGE_FAILED)
+    store.mark_pages("chunked_1", ["a_page_0001", "b_page_0001"], PAGE_DONE)
+    assert store.missing_pages("chunked_1", "a") == [
+        ("a_page_0002", "a", 2, PAGE_FAILED)
+    ]
+    assert store.page_counts("chunked_1") == {PAGE_DONE: 2, PAGE_FAILED: 1}
+
+    store.update_job("chunked_1", status="completed")
+    assert store.jobs(active_only=True) == []
+
+    # batch_info_<id>.json files from earlier versions are imported once
+    info = {"batch_id": "batch_9", "file_mapping": {"c_page_0001": ["c", 1, ""]}}
+    (tmp_path / "batch_info_batch_9.json").write_text(json.dumps(info))
+    assert store.import_legacy(tmp_path) == 1
+    assert store.import_legacy(tmp_path) == 0
+    assert store.file_mapping("batch_9") == {"c_page_0001": ("c", 1, "")}
+    assert store.job_for_batch("batch_9") == "batch_9"
+    assert [job["job_id"] for job in store.jobs(active_only=True)] == ["batch_9"]
+
+    store.rename_job("batch_9", "batch_10", "single")
+    assert store.file_mapping("batch_10") == {"c_page_0001": ("c", 1, "")}
+    store.delete_job("batch_10")
+    assert store.missing_pages("batch_10") == []
+
+
+def test_resubmitted_pages_move_to_the_new_shard(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    store.create_job("batch_1", "single")
+    pages = {f"a_page_000{num}": ("a", num, "") for num in (1, 2, 3)}
+    store.add_shard("batch_1", 3, pages, status="submitted", batch_id="batch_1")
+    store.mark_pages("batch_1", ["a_page_0001"], PAGE_DONE)
+    store.mark_pages("batch_1", ["a_page_0001", "a_page_0002"], PAGE_FAILED)
+    assert [page[0] for page in store.missing_pages("batch_1")] == [
+        "a_page_0002",
+        "a_page_0003",
+    ]
+
+    retry = {cid: pages[cid] for cid in ("a_page_0002", "a_page_0003")}
+    seq = store.add_shard("batch_1", 2, retry)
+    assert store.get_job("batch_1")["total_requests"] == 3
+    assert store.unresolved_shards("batch_1") == {seq}
+    assert store.file_mapping("batch_1", status="queued") == retry
+
+
+def test_turnarounds_of_completed_batches(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    store = JobStore(path)
+    store.create_job("batch_1", "single")
+    store.add_shard("batch_1", 1, {}, batch_id="batch_1")
+    submitted_at = store.shards("batch_1")[0]["submitted_at"]
+
+    batch = SimpleNamespace(id="batch_1", status="in_progress", completed_at=None)
+    store.record_batch(batch)
+    assert store.batch_turnarounds() == []
+
+    batch = SimpleNamespace(
+        id="batch_1", status="completed", completed_at=submitted_at + 600
+    )
+    store.record_batch(batch)
+    # Later checks do not move the recorded completion
+    store.record_batch(SimpleNamespace(id="batch_1", status="completed"))
+    store.close()
+
+    assert JobStore(path).batch_turnarounds() == [600]
+
+
+def test_rate_limits_are_kept_per_model(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    store = JobStore(path)
+    assert store.rate_limits("gpt-4o") == {}
+
+    store.record_rate_limits("gpt-4o", {"limit_requests": 500.0, "checked_at": 2.0})
+    store.record_rate_limits("gpt-4o", {"limit_requests": 100.0, "checked_at": 1.0})
+    store.record_rate_limits("gpt-4o-mini", {"limit_tokens": 2e6, "checked_at": 3.0})
+    assert JobStore(path).rate_limits("gpt-4o") == {
+        "limit_requests": 500.0,
+        "checked_at": 2.0,
+    }
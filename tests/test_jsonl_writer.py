@@ -0,0 +1,82 @@
+import base64
+import io
+import json
+import os
+
+import pytest
+
+from batch.jsonl_writer import (
+    JsonlRequestWriter,
+    RequestTemplate,
+    ShardedRequestWriter,
+    build_request,
+)
+
+
+def test_streamed_lines_match_json_dumps():
+    template = RequestTemplate("gpt-4o-mini", 'Sys "prompt"\n', "Convert ✓", 0.1, 512)
+    handle = io.BytesIO()
+    writer = JsonlRequestWriter(handle, template, chunk_size=3 * 7)
+
+    images = [b"", b"\xff\xd8" + bytes(range(256)) * 3, b"x" * 21]
+    for index, image in enumerate(images):
+        writer.write(f"doc_page_{index:04d}", image)
+
+    lines = handle.getvalue().decode("utf-8").splitlines()
+    assert len(lines) == writer.requests_written == 3
+    assert writer.bytes_written == len(handle.getvalue())
+    for index, (line, image) in enumerate(zip(lines, images)):  # noqa: B905
+        expected = build_request(
+            f"doc_page_{index:04d}",
+            "data:image/jpeg;base64," + base64.b64encode(image).decode(),
+            "gpt-4o-mini",
+            'Sys "prompt"\n',
+            "Convert ✓",
+            0.1,
+            512,
+        )
+        assert json.loads(line) == expected
+
+
+def test_chunk_size_must_be_multiple_of_three():
+    template = RequestTemplate("m", "s", "u", 0.0, 1)
+    with pytest.raises(ValueError):
+        JsonlRequestWriter(io.BytesIO(), template, chunk_size=1000)
+
+
+def test_sharded_writer_respects_byte_and_request_limits(tmp_path):
+    template = RequestTemplate("m", "s", "u", 0.0, 1)
+    image = b"\x01" * 300
+    line_size = template.request_size("doc_page_0000", len(image))
+    closed = []
+    writer = ShardedRequestWriter(
+        tmp_path / "batch.jsonl",
+        template,
+        max_bytes=line_size * 3 + 10,
+        max_requests=2,
+        on_shard=lambda path, index, count: closed.append((index, count)),
+    )
+    with writer:
+        indexes = [writer.write(f"doc_page_{i:04d}", image) for i in range(5)]
+
+    assert indexes == [1, 1, 2, 2, 3]
+    assert closed == [(1, 2), (2, 2), (3, 1)]
+    for path, count, size in writer.shards:
+        assert os.path.getsize(path) == size == count * line_size
+    assert writer.shards[0][0].endswith("batch_part001.jsonl")
+
+    writer = ShardedRequestWriter(tmp_path / "b.jsonl", template, max_bytes=line_size)
+    with writer:
+        writer.write("doc_page_0000", image)
+        writer.write("doc_page_0001", image)
+    assert [count for _, count, _ in writer.shards] == [1, 1]
+    with pytest.raises(ValueError):
+        writer.write("doc_page_0002", image + b"x" * 3)
+
+
+def test_sharded_writer_cuts_on_estimated_tokens(tmp_path):
+    template = RequestTemplate("gpt-4o-mini", "Sys", "Convert", 0.1, 512)
+    writer = ShardedRequestWriter(tmp_path / "batch.jsonl", template, max_tokens=250)
+    with writer:
+        indexes = [writer.write(f"doc_page_{i:04d}", b"x", 100) for i in range(5)]
+    assert indexes == [1, 1, 2, 2, 3]
@@ -0,0 +1,136 @@
+import json
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from batch.local_batch import LocalBatchClient
+from batch.result_spool import parse_result_line
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.with_raw_response = self
+        self.calls = []
+
+    def create(self, **body):
+        self.calls.append(body)
+        if body["messages"][0]["content"] == "fail":
+            raise openai.APIConnectionError(request=None)
+        completion = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "model": body["model"],
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "# Page"},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        }
+        return SimpleNamespace(
+            status_code=200,
+            headers={"x-request-id": "req_1"},
+            text=json.dumps(completion),
+        )
+
+
+def fake_client():
+    completions = FakeCompletions()
+    return SimpleNamespace(
+        chat=SimpleNamespace(completions=completions), models=None
+    ), completions
+
+
+def request(custom_id, content):
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {"model": "local", "messages": [{"role": "user", "content": content}]},
+    }
+
+
+def submit(client, tmp_path, lines):
+    batch_file = tmp_path / "batch_requests.jsonl"
+    batch_file.write_text("".join(json.dumps(line) + "\n" for line in lines))
+    with open(batch_file, "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    return client.batches.wait(batch.id, timeout=10)
+
+
+def test_batch_runs_against_chat_completions(tmp_path):
+    chat_client, completions = fake_client()
+    client = LocalBatchClient(chat_client, tmp_path / "store", concurrency=2)
+
+    batch = submit(
+        client,
+        tmp_path,
+        [
+            request("a_page_0001", "ok"),
+            request("a_page_0002", "fail"),
+            request("a_page_0003", "ok"),
+        ],
+    )
+
+    assert batch.status == "completed"
+    assert (batch.request_counts.completed, batch.request_counts.failed) == (2, 1)
+    assert len(completions.calls) == 3
+
+    with client.files.with_streaming_response.content(batch.output_file_id) as f:
+        results = sorted(parse_result_line(line) for line in f.iter_lines())
+    assert [r[:2] for r in results] == [
+        ("a_page_0001", "# Page"),
+        ("a_page_0003", "# Page"),
+    ]
+    assert results[0][2]["total_tokens"] == 15
+
+    errors = client.files.content(batch.error_file_id).text.splitlines()
+    assert json.loads(errors[0])["custom_id"] == "a_page_0002"
+    assert json.loads(errors[0])["error"]["code"] == "APIConnectionError"
+
+    # Another client on the same storage sees the finished batch
+    other = LocalBatchClient(chat_client, tmp_path / "store")
+    assert other.batches.retrieve(batch.id).output_file_id == batch.output_file_id
+
+
+def test_invalid_input_fails_the_batch(tmp_path):
+    chat_client, completions = fake_client()
+    client = LocalBatchClient(chat_client, tmp_path / "store")
+
+    batch = submit(
+        client, tmp_path, [request("a_page_0001", "ok"), request("a_page_0001", "ok")]
+    )
+
+    assert batch.status == "failed"
+    assert batch.errors.data[0].code == "duplicate_custom_id"
+    assert completions.calls == []
+
+
+def test_join_waits_for_running_batches_and_missing_ids_are_not_found(tmp_path):
+    chat_client, _ = fake_client()
+    client = LocalBatchClient(chat_client, tmp_path / "store")
+    batch_file = tmp_path / "batch_requests.jsonl"
+    batch_file.write_text(json.dumps(request("a_page_0001", "ok")) + "\n")
+    input_file = client.files.create(file=batch_file, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+
+    client.batches.join()
+    assert client.batches.running() == []
+    assert client.batches.retrieve(batch.id).status == "completed"
+
+    with pytest.raises(openai.NotFoundError):
+        client.batches.retrieve("batch_missing")
+    with pytest.raises(openai.NotFoundError):
+        client.files.content("file-missing")
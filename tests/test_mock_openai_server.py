@@ -0,0 +1,102 @@
+import json
+import time
+
+import openai
+import pytest
+
+from batch.multipart_upload import upload_batch_file
+from core.LLMClient import LLMClient
+from utils.mock_openai_server import MockOpenAIServer, parse_latency
+
+IMAGE = {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}}
+
+
+@pytest.fixture
+def server(tmp_path):
+    with MockOpenAIServer(storage_dir=tmp_path, rpm=3, tpm=1_000_000, seed=1) as server:
+        yield server
+
+
+def client_for(server):
+    return openai.OpenAI(api_key="mock", base_url=server.base_url, max_retries=0)
+
+
+def test_chat_completions_are_deterministic_and_rate_limited(server):
+    llm = LLMClient(server.base_url, "mock", "mock-model", client=client_for(server))
+
+    first = llm.completion("Convert this page", images=["AAAA"])
+    assert first.startswith("# ")
+    assert llm.rate_limits["limit_requests"] == 3
+    assert llm.rate_limits["remaining_requests"] == 2
+
+    messages = [{"role": "user", "content": [{"type": "text", "text": "x"}, IMAGE]}]
+    response = client_for(server).chat.completions.create(
+        model="mock-model", messages=messages
+    )
+    assert response.usage.prompt_tokens == 1 + server.image_tokens
+    assert (
+        client_for(server)
+        .chat.completions.create(model="m", messages=messages)
+        .choices[0]
+        .message.content
+        == response.choices[0].message.content
+    )
+
+    with pytest.raises(openai.RateLimitError):
+        client_for(server).chat.completions.create(model="m", messages=messages)
+    assert server.stats["status"][429] == 1
+
+
+def test_injected_server_errors(tmp_path):
+    with MockOpenAIServer(storage_dir=tmp_path, error_rate=1.0) as server:
+        with pytest.raises(openai.InternalServerError):
+            client_for(server).chat.completions.create(
+                model="m", messages=[{"role": "user", "content": "x"}]
+            )
+
+
+def test_files_uploads_and_batches(server, tmp_path):
+    client = client_for(server)
+    batch_file = tmp_path / "batch_requests.jsonl"
+    with open(batch_file, "w") as f:
+        for i in range(1, 4):
+            body = {
+                "model": "mock-model",
+                "messages": [{"role": "user", "content": [IMAGE]}],
+                "max_tokens": 10 if i == 3 else 4096,
+            }
+            request = {
+                "custom_id": f"doc_page_{i:04d}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body,
+            }
+            f.write(json.dumps(request) + "\n")
+
+    # Multipart upload through the Uploads API
+    input_file = upload_batch_file(client, batch_file, part_bytes=100)
+    assert client.files.retrieve(input_file.id).bytes == batch_file.stat().st_size
+
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    deadline = time.time() + 10
+    while batch.status not in ("completed", "failed") and time.time() < deadline:
+        time.sleep(0.05)
+        batch = client.batches.retrieve(batch.id)
+
+    assert batch.status == "completed"
+    assert batch.request_counts.completed == 3
+    lines = client.files.content(batch.output_file_id).text.splitlines()
+    results = {json.loads(line)["custom_id"]: json.loads(line) for line in lines}
+    body = results["doc_page_0003"]["response"]["body"]
+    assert body["choices"][0]["finish_reason"] == "length"
+    assert body["usage"]["completion_tokens"] == 10
+
+
+def test_parse_latency():
+    assert parse_latency("fixed:0.5")(None) == 0.5
+    with pytest.raises(ValueError):
+        parse_latency("uniform:1")
@@ -0,0 +1,57 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from batch.multipart_upload import upload_batch_file, upload_state_file
+
+
+class FakeUploads:
+    def __init__(self, fail_parts=()):
+        self.fail_parts = set(fail_parts)
+        self.sent = []
+        self.lock = threading.Lock()
+        self.parts = SimpleNamespace(create=self.create_part)
+
+    def create(self, **kwargs):
+        self.created = kwargs
+        return SimpleNamespace(id="upload_1", expires_at=time.time() + 3600)
+
+    def create_part(self, upload_id, data):
+        with self.lock:
+            self.sent.append(data)
+        if data in self.fail_parts:
+            raise openai.APIConnectionError(request=None)
+        return SimpleNamespace(id=f"part_{data.decode()}")
+
+    def complete(self, upload_id, part_ids):
+        self.completed = part_ids
+        return SimpleNamespace(file=SimpleNamespace(id="file_1"))
+
+
+def test_parts_are_retried_individually_and_resumed(tmp_path):
+    batch_file = tmp_path / "batch_requests_1.jsonl"
+    batch_file.write_bytes(b"aaaabbbbccccdd")
+    uploads = FakeUploads(fail_parts=[b"cccc"])
+    client = SimpleNamespace(uploads=uploads)
+
+    with pytest.raises(openai.APIConnectionError):
+        upload_batch_file(client, batch_file, part_bytes=4, workers=3, retries=2)
+    assert uploads.sent.count(b"cccc") == 2
+    assert upload_state_file(batch_file).exists()
+
+    uploads.fail_parts.clear()
+    uploads.sent.clear()
+    uploaded = upload_batch_file(client, batch_file, part_bytes=4, workers=3)
+
+    assert uploaded.id == "file_1"
+    assert uploads.sent == [b"cccc"]
+    assert uploads.completed == ["part_aaaa", "part_bbbb", "part_cccc", "part_dd"]
+    assert uploads.created["bytes"] == 14
+    assert not upload_state_file(batch_file).exists()
+
+    # Files within one part use a single files.create request
+    client.files = SimpleNamespace(create=lambda file, purpose: file.read())
+    assert upload_batch_file(client, batch_file, part_bytes=0) == b"aaaabbbbccccdd"
@@ -0,0 +1,42 @@
+import os
+
+from core.PageCache import PageCache
+
+
+def test_put_get_keys_on_render_settings(tmp_path):
+    cache = PageCache(str(tmp_path / "pages"))
+    cache.put("ab" * 32, 0, 200, "jpg", b"page one")
+    assert cache.get("ab" * 32, 0, 200, "jpg") == b"page one"
+    assert cache.get("ab" * 32, 0, 300, "jpg") is None
+    assert cache.get("ab" * 32, 0, 200, "png") is None
+    assert not cache.contains("ab" * 32, 1, 200, "jpg")
+
+
+def test_evicts_least_recently_used_above_budget(tmp_path):
+    cache = PageCache(str(tmp_path / "pages"), max_bytes=25)
+    digest = "cd" * 32
+    for page_index in range(2):
+        cache.put(digest, page_index, 200, "jpg", b"x" * 10)
+        path = cache.path_for(digest, page_index, 200, "jpg")
+        os.utime(path, (page_index, page_index))
+    cache.get(digest, 0, 200, "jpg")
+    cache.put(digest, 2, 200, "jpg", b"x" * 10)
+    assert cache.contains(digest, 0, 200, "jpg")
+    assert not cache.contains(digest, 1, 200, "jpg")
+    assert cache.contains(digest, 2, 200, "jpg")
+
+
+def test_overwrite_counts_once_and_evicts_to_low_water(tmp_path):
+    cache = PageCache(str(tmp_path / "pages"), max_bytes=100)
+    digest = "ef" * 32
+    for _ in range(3):
+        cache.put(digest, 0, 200, "jpg", b"x" * 30)
+    assert cache._total_bytes == 30
+
+    for page_index in range(1, 4):
+        cache.put(digest, page_index, 200, "jpg", b"x" * 30)
+    # 120 bytes > 100: trimmed to at most 90, oldest pages first
+    assert cache._total_bytes == 90
+    assert not cache.contains(digest, 0, 200, "jpg")
+    assert cache.contains(digest, 3, 200, "jpg")
+    assert PageCache(str(tmp_path / "pages"))._total_bytes == 90
@@ -0,0 +1,36 @@
+import pytest
+
+from batch.page_renderer import iter_rendered_pdfs
+
+
+def test_pages_of_many_pdfs_come_back_in_order(tmp_path):
+    fitz = pytest.importorskip("fitz")
+    paths = []
+    for name, pages in (("a", 3), ("b", 2)):
+        doc = fitz.open()
+        for num in range(pages):
+            doc.new_page(width=100, height=100).insert_text((10, 50), f"{name}{num}")
+        doc.save(tmp_path / f"{name}.pdf")
+        paths.append(str(tmp_path / f"{name}.pdf"))
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+
+    errors = []
+    pdfs = [(paths[0], None), (str(tmp_path / "broken.pdf"), None), (paths[1], [2])]
+    pages = list(
+        iter_rendered_pdfs(
+            pdfs,
+            workers=2,
+            max_pages=2,
+            on_error=lambda position, error: errors.append(position),
+            dpi=36,
+        )
+    )
+
+    assert [(position, num) for position, num, _ in pages] == [
+        (0, 1),
+        (0, 2),
+        (0, 3),
+        (2, 2),
+    ]
+    assert all(image.startswith(b"\xff\xd8") for _, _, image in pages)
+    assert errors == [1]
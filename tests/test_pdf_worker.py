@@ -0,0 +1,25 @@
+import pytest
+
+from core.PDFWorker import _split_page_range, choose_dpi
+
+
+def test_split_page_range():
+    assert _split_page_range(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert _split_page_range(4, 4) == [(0, 1), (1, 2), (2, 3), (3, 4)]
+    assert _split_page_range(2, 8) == [(0, 1), (1, 2)]
+    assert _split_page_range(5, 1) == [(0, 5)]
+
+
+def test_choose_dpi_follows_smallest_font():
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    sparse = doc.new_page()
+    sparse.insert_text((72, 72), "Body text at a comfortable size", fontsize=12)
+    dense = doc.new_page()
+    for row in range(30):
+        dense.insert_text((72, 60 + row * 8), "0.001 0.002 0.003", fontsize=6)
+    doc.new_page()
+
+    assert choose_dpi(doc[0], 200, 100, 300) == 100
+    assert choose_dpi(doc[1], 200, 100, 300) == 200
+    assert choose_dpi(doc[2], 200, 100, 300) == 200
@@ -0,0 +1,26 @@
+import random
+import time
+
+import pytest
+
+from core.Pipeline import ordered_map, staged
+
+
+def test_staged_preserves_order_and_raises():
+    assert list(staged(range(10), lambda x: x * 2, maxsize=1)) == list(range(0, 20, 2))
+
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError("bad page")
+        return x
+
+    with pytest.raises(ValueError):
+        list(staged(range(5), fail_on_three))
+
+
+def test_ordered_map_keeps_input_order():
+    def slow_identity(x):
+        time.sleep(random.uniform(0, 0.01))
+        return x
+
+    assert list(ordered_map(slow_identity, range(20), concurrency=5)) == list(range(20))
@@ -0,0 +1,36 @@
+import base64
+import time
+
+from core.ResponseCache import ResponseCache
+
+
+def test_key_matches_for_bytes_and_base64():
+    image = b"\x89PNG fake page"
+    raw = ResponseCache.make_key("gpt-4o", "sys", "user", 0.5, 100, [image])
+    encoded = ResponseCache.make_key(
+        "gpt-4o", "sys", "user", 0.5, 100, [base64.b64encode(image).decode()]
+    )
+    assert raw == encoded
+    assert raw != ResponseCache.make_key("gpt-4o", "sys", "user", 0.1, 100, [image])
+
+
+def test_put_get_roundtrip(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    assert cache.get("missing") is None
+    cache.put("k", "# Page", {"total_tokens": 42})
+    assert cache.get("k") == {"content": "# Page", "usage": {"total_tokens": 42}}
+    cache.close()
+
+
+def test_evicts_least_recently_used_above_budget(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=50)
+    cache.put("old", "a" * 20)
+    time.sleep(0.01)
+    cache.put("new", "b" * 20)
+    time.sleep(0.01)
+    cache.get("old")
+    cache.put("newest", "c" * 20)
+    assert cache.evict() == 1
+    assert cache.get("new") is None
+    assert cache.get("old") is not None
+    cache.close()
@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+
+from batch.result_spool import ResultSpool
+
+
+def result_line(custom_id, content, prompt_tokens=10):
+    if content is None:
+        response = {"status_code": 500, "body": {"error": {"message": "boom"}}}
+    else:
+        response = {
+            "status_code": 200,
+            "body": {
+                "choices": [{"message": {"content": content}}],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": 1,
+                    "total_tokens": prompt_tokens + 1,
+                },
+            },
+        }
+    return json.dumps({"custom_id": custom_id, "response": response})
+
+
+def test_documents_emitted_as_soon_as_complete(tmp_path):
+    file_mapping = {
+        "a_page_0001": ("a", 1, ""),
+        "a_page_0002": ("a", 2, ""),
+        "b_page_0001": ("b", 1, ""),
+        "b_page_0002": ("b", 2, ""),
+    }
+    emitted = []
+
+    def on_document(pdf_name, pages):
+        contents = [Path(path).read_text(encoding="utf-8") for _, path in pages]
+        emitted.append((pdf_name, [num for num, _ in pages], contents))
+
+    spool = ResultSpool(tmp_path / "spool", file_mapping, on_document)
+    spool.add_line(result_line("a_page_0002", "A2"))
+    spool.add_line(result_line("b_page_0002", None))
+    spool.add_line(result_line("a_page_0001", "A1"))
+    assert [name for name, *_ in emitted] == ["a"]
+    assert emitted[0][1:] == ([1, 2], ["A1", "A2"])
+
+    # Unmapped pages are grouped by their custom_id and written at the end
+    spool.add_line(result_line("c_page_0003", "C3"))
+    spool.add_line("")
+    spool.add_line(result_line("b_page_0001", "B1"))
+    assert [name for name, *_ in emitted] == ["a", "b"]
+    assert emitted[1][1:] == ([1], ["B1"])
+
+    assert spool.finish() == ["a", "b", "c"]
+    assert spool.failed == 1
+    assert not (tmp_path / "spool").exists()
@@ -0,0 +1,103 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from batch.status_monitor import StatusMonitor
+
+
+def make_batch(status, done=0, total=100):
+    counts = SimpleNamespace(completed=done, failed=0, total=total)
+    return SimpleNamespace(status=status, request_counts=counts)
+
+
+def test_sweep_checks_batches_concurrently_under_the_limit():
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def retrieve(batch_id):
+        with lock:
+            active.append(batch_id)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(batch_id)
+        return make_batch("completed", 100)
+
+    monitor = StatusMonitor(retrieve, concurrency=4)
+    start = time.monotonic()
+    results = monitor.sweep([f"batch_{i}" for i in range(12)])
+
+    assert time.monotonic() - start < 12 * 0.05 / 2
+    assert max(peak) <= 4
+    assert len(results) == 12 and all(monitor.is_final(b) for b in results)
+    # Finished batches are answered without another request
+    monitor.sweep(["batch_0"])
+    assert len(peak) == 12
+
+
+def test_intervals_follow_status_and_progress():
+    now = [0.0]
+    transitions = []
+    replies = {}
+
+    def retrieve(batch_id):
+        if isinstance(replies[batch_id], Exception):
+            raise replies[batch_id]
+        return replies[batch_id]
+
+    monitor = StatusMonitor(
+        retrieve,
+        base_interval=30,
+        min_interval=5,
+        max_interval=600,
+        on_transition=lambda b, old, batch: transitions.append((b, old, batch.status)),
+        clock=lambda: now[0],
+    )
+
+    replies["slow"] = make_batch("validating")
+    replies["fast"] = make_batch("in_progress", 0)
+    monitor.sweep(["slow", "fast"])
+    assert monitor.states["slow"]["interval"] == 30
+
+    now[0] = 30
+    replies["fast"] = make_batch("in_progress", 60)
+    monitor.sweep(["slow", "fast"], due_only=True)
+    # Still validating: back off; 40 requests left at 2/s: check again in 10s
+    assert monitor.states["slow"]["interval"] == 45
+    assert monitor.states["fast"]["interval"] == 10
+    assert monitor.delay(["slow", "fast"]) == 10
+
+    now[0] = 40
+    replies["fast"] = make_batch("finalizing", 100)
+    replies["slow"] = RuntimeError("rate limited")
+    results = monitor.sweep(["slow", "fast"], due_only=True)
+    assert results["slow"].status == "validating"  # not due, not asked
+    assert monitor.states["fast"]["interval"] == 5
+
+    now[0] = 75
+    results = monitor.sweep(["slow"], due_only=True)
+    assert isinstance(results["slow"], RuntimeError)
+    assert monitor.states["slow"]["interval"] == 30
+
+    assert transitions == [
+        ("slow", None, "validating"),
+        ("fast", None, "in_progress"),
+        ("fast", "in_progress", "finalizing"),
+    ]
+
+
+def test_sweep_pairs_each_result_with_its_batch():
+    def retrieve(batch_id):
+        if batch_id == "broken":
+            raise ConnectionError("reset")
+        return make_batch("in_progress" if batch_id == "a" else "completed")
+
+    monitor = StatusMonitor(retrieve)
+    results = monitor.sweep(["a", "broken", "b", "a"])
+
+    assert list(results) == ["a", "broken", "b"]
+    assert results["a"].status == "in_progress"
+    assert isinstance(results["broken"], ConnectionError)
+    assert results["b"].status == "completed"
+    assert monitor.is_final("b") and not monitor.is_final("a")
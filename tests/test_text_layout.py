@@ -0,0 +1,32 @@
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from core.PDFWorker import PDFWorker  # noqa: E402
+
+
+def _make_pdf(path):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Installation", fontsize=18)
+    page.insert_text((72, 100), "Connect the supplied cable before switching on.")
+    page.insert_text((72, 120), "- Unpack the box")
+    page.insert_text((72, 134), "- Connect the cable")
+    page = doc.new_page()
+    page.insert_text((72, 72), "Figure 1 shows the signal chain of the amplifier.")
+    for i in range(20):
+        page.draw_circle((200 + i * 10, 300), 40)
+    doc.save(str(path))
+
+
+def test_classifies_and_converts_text_pages(tmp_path):
+    pdf_path = tmp_path / "mixed.pdf"
+    _make_pdf(pdf_path)
+    worker = PDFWorker(str(pdf_path))
+
+    kinds = [page["kind"] for page in worker.classify_pages()]
+    assert kinds == ["text", "vision"]
+
+    markdown = worker.text_page_markdown(1)
+    assert markdown.startswith("# Installation")
+    assert "- Unpack the box\n- Connect the cable" in markdown
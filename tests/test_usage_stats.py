@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from batch.usage_stats import UsageAggregator, load_usage_stats, usage_pages_file
+
+
+def test_aggregates_saved_per_page_document_and_batch(tmp_path):
+    usage = UsageAggregator("batch_1", tmp_path)
+    page_usage = {"prompt_tokens": 1000, "completion_tokens": 500, "total_tokens": 1500}
+    usage.add("a_page_0001", "a", 1, page_usage)
+    usage.add("a_page_0002", "a", 2, page_usage)
+    usage.add("a_page_0002", "a", 2, page_usage)  # repeated result
+    usage.add("b_page_0001", "b", 1, page_usage)
+    usage.add("b_page_0002", "b", 2, None)  # failed request
+
+    assert usage.document_stats("a")["pages"] == 2
+    summary = usage.save()
+
+    assert summary["total_requests"] == 3
+    assert summary["failed_requests"] == 1
+    assert summary["token_breakdown"]["total_tokens"] == 4500
+    assert summary["total_cost"] == pytest.approx(3 * (0.00015 + 0.0003))
+    assert [d["file"] for d in summary["file_details"]] == ["a.pdf", "b.pdf"]
+    assert summary["documents"]["a"]["cost_per_page"] == pytest.approx(0.00045)
+
+    assert load_usage_stats(tmp_path, "batch_1") == summary
+    assert load_usage_stats(tmp_path, "batch_2") is None
+    with open(usage_pages_file(tmp_path, "batch_1")) as f:
+        pages = [json.loads(line) for line in f]
+    assert [(p["document"], p["page"]) for p in pages] == [("a", 1), ("a", 2), ("b", 1)]
+
+
+def test_resume_adds_late_results_to_saved_usage(tmp_path):
+    page_usage = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+    usage = UsageAggregator("batch_1", tmp_path)
+    usage.add("a_page_0001", "a", 1, page_usage)
+    usage.add("a_page_0002", "a", 2, None)
+    usage.save()
+
+    usage = UsageAggregator("batch_1", tmp_path, resume=True)
+    usage.add("a_page_0001", "a", 1, page_usage)  # ingested before
+    usage.add("a_page_0002", "a", 2, page_usage)
+    summary = usage.save()
+
+    assert summary["documents"]["a"]["pages"] == 2
+    assert summary["failed_requests"] == 0
+    with open(usage_pages_file(tmp_path, "batch_1")) as f:
+        assert len(f.readlines()) == 2
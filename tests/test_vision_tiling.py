@@ -0,0 +1,23 @@
+import math
+
+from core.VisionTiling import image_tokens, plan_page_size, served_size
+
+
+def test_tile_model_tokens_match_published_examples():
+    assert served_size(2048, 4096, "gpt-4o") == (768, 1536)
+    assert image_tokens(1024, 1024, "gpt-4o") == 765
+    assert image_tokens(2048, 4096, "gpt-4o") == 1105
+    assert image_tokens(1024, 1024, "unknown-local-model") == 0
+
+
+def test_plan_drops_tiles_above_legibility_floor():
+    # A4 at 200 DPI is served as 768x1086 (6 tiles); 724x1024 needs only 4
+    plan = plan_page_size(595.3, 841.9, 200, "gpt-4o", min_dpi=80)
+    assert plan["tiles"] == 4
+    assert plan["height"] <= 1024
+    assert plan["tokens"] == 85 + 170 * 4
+
+    # With a floor above what 4 tiles allow, the served size is kept
+    plan = plan_page_size(595.3, 841.9, 200, "gpt-4o", min_dpi=90)
+    assert plan["tiles"] == 6
+    assert math.isclose(plan["width"], 768, abs_tol=1)